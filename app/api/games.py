@@ -1,78 +1,242 @@
 """app/api/games.py - Today's games, pitcher heatmaps, vs-team stats"""
+import contextvars
 import logging
-import statsapi
-import requests
-import io
-import csv
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from fastapi import Depends
-from app.db.session import get_db
+from app.core.auth import require_admin
+from app.core.breaker import CircuitOpenError
+from app.core import jsonlib
+from app.core.cache import get_cache
+from app.core.responses import TimedJSONResponse
+from app.db.session import get_db, new_session
+from app.models.schemas import HeatmapResponse, LineupMatchups, VsTeamLine
+from app.services import heatmap, ingest
+from app.services.archive import ArchiveUnavailable, PitchArchive
+from app.services.gamefeed import GameFeedStore, fetch_game_feed
+from app.services.matchups import MatchupService
 from app.services.mlb import MLBService
+from app.services.plate_appearances import PlateAppearanceService
+from app.services.scout import ScoutService
+from app.services import upstream
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-SAVANT_BASE = "https://baseballsavant.mlb.com/statcast_search/csv"
+# Shared-cache TTLs (seconds)
+TTL_LIVE = 300
+TTL_TEAM = 6 * 3600
+TTL_PERSON = 86400
+TTL_FINAL_GAME = 30 * 86400
+TTL_HEATMAP = 3600
+TTL_VS_TEAM = 6 * 3600
+
+HEATMAP_GAMES = 12
+# fields of a heatmap pitch, also the columns read from the Parquet archive
+HEATMAP_COLUMNS = ["game_date", "stand", "balls", "strikes", "plate_x", "plate_z", "pitch_type",
+                   "pitch_name", "start_speed", "zone", "description"]
+HEATMAP_FEED_WORKERS = 4
+# How long a streamed request waits on another worker's in-flight build of the same heatmap
+HEATMAP_BUILD_WAIT = 60
+
+
+def _as_of(stored_at: float) -> str:
+    return datetime.utcfromtimestamp(stored_at).isoformat() + "Z"
+
+
+def _encoded(payload, stale_as_of: str = None) -> TimedJSONResponse:
+    """Return a payload pre-encoded, skipping FastAPI's jsonable_encoder walk.
+
+    A payload built from an expired cache entry is flagged with X-Data-Stale.
+    """
+    return TimedJSONResponse(payload, headers={"X-Data-Stale": stale_as_of} if stale_as_of else None)
+
+
+def _game_pitches(game_pk: int) -> dict:
+    """Every pitch with plate coordinates in one game, tagged with its pitcher.
+
+    Cached across workers; completed games never change, so they are kept for a month.
+    The same pass stores the game's plate appearances and pitches in the database.
+    """
+    def fetch():
+        parsed = fetch_game_feed(game_pk)
+        try:
+            db = new_session()
+            try:
+                GameFeedStore(db).store(parsed)
+            finally:
+                db.close()
+        except Exception as e:
+            logger.warning(f"Could not store plate appearances for game {game_pk}: {e}")
+        pitches = [
+            {
+                "pitcher_id": p["pitcher_id"],
+                "game_date": p["game_date"],
+                "stand": p["stand"],
+                "balls": p["balls"],
+                "strikes": p["strikes"],
+                "plate_x": p["plate_x"],
+                "plate_z": p["plate_z"],
+                "pitch_type": p["pitch_type"],
+                "pitch_name": p["pitch_name"],
+                "start_speed": p["start_speed"],
+                "zone": p["zone"],
+                "description": p["description"],
+            }
+            for p in parsed["pitches"].rows()
+            if p["plate_x"] is not None and p["plate_z"] is not None
+        ]
+        return {"final": parsed["final"], "pitches": pitches}
+
+    return get_cache().get_or_set(
+        f"game_pitches:v3:{game_pk}",  # v3: pitches carry batter side, count, type code and date
+        lambda v: TTL_FINAL_GAME if v["final"] else TTL_LIVE,
+        fetch,
+        name="game_feed",
+    )
+
+
+def _today_games() -> list[dict]:
+    """Today's schedule with probable pitchers, cached across workers."""
+    today = "2025-09-19"
+    data = get_cache().get_or_set(
+        f"schedule:{today}",
+        TTL_LIVE,
+        lambda: upstream.fetch_json(
+            f"{upstream.STATSAPI_BASE}/schedule",
+            params={"date": today, "sportId": 1, "hydrate": "probablePitcher"},
+            endpoint="schedule",
+        ),
+        name="schedule",
+    )
+    results = []
+    for date in data.get("dates", []):
+        for game in date.get("games", []):
+            away = game["teams"]["away"]
+            home = game["teams"]["home"]
+            away_pitcher = away.get("probablePitcher", {})
+            home_pitcher = home.get("probablePitcher", {})
+            results.append({
+                "game_id": game.get("gamePk"),
+                "game_datetime": game.get("gameDate"),
+                "game_type": game.get("gameType"),
+                "status": game.get("status", {}).get("detailedState"),
+                "venue_name": game.get("venue", {}).get("name", ""),
+                "away_name": away.get("team", {}).get("name", ""),
+                "away_id": away.get("team", {}).get("id"),
+                "home_name": home.get("team", {}).get("name", ""),
+                "home_id": home.get("team", {}).get("id"),
+                "away_probable_pitcher": away_pitcher.get("fullName", ""),
+                "away_pitcher_id": away_pitcher.get("id"),
+                "home_probable_pitcher": home_pitcher.get("fullName", ""),
+                "home_pitcher_id": home_pitcher.get("id"),
+            })
+    return results
 
 
 @router.get("/today")
 def get_today_games():
     """Get today's MLB schedule with probable pitcher IDs."""
     try:
-        today = "2025-09-19"
-        r = requests.get(
-            "https://statsapi.mlb.com/api/v1/schedule",
-            params={"date": today, "sportId": 1, "hydrate": "probablePitcher"},
-            timeout=10
-        )
-        data = r.json()
-        results = []
-        for date in data.get("dates", []):
-            for game in date.get("games", []):
-                away = game["teams"]["away"]
-                home = game["teams"]["home"]
-                away_pitcher = away.get("probablePitcher", {})
-                home_pitcher = home.get("probablePitcher", {})
-                results.append({
-                    "game_id": game.get("gamePk"),
-                    "game_datetime": game.get("gameDate"),
-                    "game_type": game.get("gameType"),
-                    "status": game.get("status", {}).get("detailedState"),
-                    "venue_name": game.get("venue", {}).get("name", ""),
-                    "away_name": away.get("team", {}).get("name", ""),
-                    "away_id": away.get("team", {}).get("id"),
-                    "home_name": home.get("team", {}).get("name", ""),
-                    "home_id": home.get("team", {}).get("id"),
-                    "away_probable_pitcher": away_pitcher.get("fullName", ""),
-                    "away_pitcher_id": away_pitcher.get("id"),
-                    "home_probable_pitcher": home_pitcher.get("fullName", ""),
-                    "home_pitcher_id": home_pitcher.get("id"),
-                })
-        return results
+        return _today_games()
     except Exception as e:
         logger.error(f"Schedule fetch failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/pitcher-heatmap/{mlb_id}")
-def get_pitcher_heatmap(mlb_id: int, season: int = 2024):
-    """Fetch pitcher's pitch location data from MLB game feeds."""
+@router.get("/{game_pk}/preview")
+def get_game_preview(game_pk: int, db: Session = Depends(get_db)):
+    """AI preview of one game, built around its probable starters."""
+    data = get_cache().get_or_set(
+        f"schedule_game:{game_pk}",
+        TTL_LIVE,
+        lambda: upstream.fetch_json(
+            f"{upstream.STATSAPI_BASE}/schedule",
+            params={"gamePk": game_pk, "sportId": 1, "hydrate": "probablePitcher"},
+            endpoint="schedule",
+        ),
+        name="schedule",
+    )
+    games = [g for d in data.get("dates", []) for g in d.get("games", [])]
+    if not games:
+        raise HTTPException(status_code=404, detail=f"Game {game_pk} not found")
+    game = games[0]
+
+    svc = MLBService(db)
+
+    def starter(side: str) -> dict:
+        probable = game["teams"][side].get("probablePitcher", {})
+        if not probable.get("id"):
+            return {}
+        player = svc.get_or_fetch_player(probable["id"])
+        return {
+            "name": probable.get("fullName", player.full_name),
+            "throws": player.throws,
+            "career": svc.get_career_stats(probable["id"], "pitching"),
+        }
+
+    summary = {
+        "game_id": game_pk,
+        "away_name": game["teams"]["away"].get("team", {}).get("name", ""),
+        "home_name": game["teams"]["home"].get("team", {}).get("name", ""),
+        "venue_name": game.get("venue", {}).get("name", ""),
+    }
     try:
-        # Get team ID for this pitcher
-        player_data = requests.get(
-            f"https://statsapi.mlb.com/api/v1/people/{mlb_id}",
+        preview = ScoutService(db).game_preview(summary, starter("away"), starter("home"))
+    except Exception as e:
+        logger.error(f"Preview failed for game {game_pk}: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"game_id": game_pk, "preview": preview}
+
+
+def _build_heatmap(mlb_id: int, season: int) -> dict:
+    """Pitch locations for a pitcher from a sample of his team's games.
+
+    Raises when the upstream is unavailable so a failed build never replaces
+    the last good heatmap in the cache.
+    """
+    pitches = []
+    game_pks = _heatmap_game_pks(mlb_id, season)
+    failed = 0
+    for gp, game_pitches in _pitcher_game_feeds(mlb_id, game_pks):
+        if game_pitches is None:
+            failed += 1
+            continue
+        pitches.extend(game_pitches)
+    if game_pks and failed == len(game_pks):
+        raise RuntimeError(f"all {failed} game feeds failed")
+
+    return {"pitches": pitches, "total_pitches": len(pitches)}
+
+
+def _heatmap_game_pks(mlb_id: int, season: int) -> list[int]:
+    """Up to HEATMAP_GAMES of the pitcher's team's games, spread across the season."""
+    # Get team ID for this pitcher
+    cache = get_cache()
+    player_data = cache.get_or_set(
+        f"person_team:{mlb_id}",
+        TTL_PERSON,
+        lambda: upstream.fetch_json(
+            f"{upstream.STATSAPI_BASE}/people/{mlb_id}",
             params={"hydrate": "currentTeam"},
-            timeout=10
-        ).json()
-        team_id = player_data.get("people", [{}])[0].get("currentTeam", {}).get("id")
-        if not team_id:
-            return {"pitches": [], "total_pitches": 0}
-
-        # Get team's games for the season
-        sched = requests.get(
-            "https://statsapi.mlb.com/api/v1/schedule",
+            endpoint="person",
+        ),
+        name="person",
+    )
+    team_id = player_data.get("people", [{}])[0].get("currentTeam", {}).get("id")
+    if not team_id:
+        return []
+
+    # Get team's games for the season
+    sched = cache.get_or_set(
+        f"team_schedule:{team_id}:{season}",
+        TTL_TEAM,
+        lambda: upstream.fetch_json(
+            f"{upstream.STATSAPI_BASE}/schedule",
             params={
                 "teamId": team_id,
                 "startDate": f"{season}-04-01",
@@ -80,120 +244,430 @@ def get_pitcher_heatmap(mlb_id: int, season: int = 2024):
                 "sportId": 1,
                 "gameType": "R"
             },
-            timeout=10
-        ).json()
+            endpoint="schedule",
+        ),
+        name="schedule",
+    )
 
-        game_pks = []
-        for date in sched.get("dates", []):
-            for game in date.get("games", []):
-                game_pks.append(game.get("gamePk"))
+    game_pks = []
+    for date in sched.get("dates", []):
+        for game in date.get("games", []):
+            game_pks.append(game.get("gamePk"))
 
-        # Sample up to 12 games spread across the season
-        if len(game_pks) > 12:
-            step = len(game_pks) // 12
-            game_pks = game_pks[::step][:12]
+    # Sample games spread across the season
+    if len(game_pks) > HEATMAP_GAMES:
+        step = len(game_pks) // HEATMAP_GAMES
+        game_pks = game_pks[::step][:HEATMAP_GAMES]
+    return game_pks
 
-        pitches = []
-        for gp in game_pks:
+
+def _pitcher_game_feeds(mlb_id: int, game_pks: list[int]):
+    """Yield (game_pk, the pitcher's pitches) as each game feed arrives; None for a failed game.
+
+    Feeds are fetched on a few threads so one slow game doesn't hold up the
+    rest; each task runs in a copy of the request context so upstream calls
+    still count towards the request's metrics. An open circuit is re-raised.
+    """
+    with ThreadPoolExecutor(max_workers=HEATMAP_FEED_WORKERS, thread_name_prefix="heatmap-feed") as pool:
+        futures = {
+            pool.submit(contextvars.copy_context().run, _game_pitches, gp): gp
+            for gp in game_pks
+        }
+        for future in as_completed(futures):
+            gp = futures[future]
             try:
-                game_data = statsapi.get("game", {"gamePk": gp})
-                plays = game_data.get("liveData", {}).get("plays", {}).get("allPlays", [])
-                for play in plays:
-                    pitcher_id = play.get("matchup", {}).get("pitcher", {}).get("id")
-                    if pitcher_id != mlb_id:
-                        continue
-                    for event in play.get("playEvents", []):
-                        if not event.get("isPitch"):
-                            continue
-                        pd = event.get("pitchData", {})
-                        coords = pd.get("coordinates", {})
-                        px = coords.get("pX")
-                        pz = coords.get("pZ")
-                        if px is None or pz is None:
-                            continue
-                        pitches.append({
-                            "plate_x": px,
-                            "plate_z": pz,
-                            "pitch_name": event.get("details", {}).get("type", {}).get("description", ""),
-                            "start_speed": pd.get("startSpeed"),
-                            "zone": pd.get("zone"),
-                            "description": event.get("details", {}).get("description", ""),
-                        })
+                game = future.result()
+            except CircuitOpenError:
+                for f in futures:
+                    f.cancel()
+                raise
             except Exception as ge:
                 logger.warning(f"Game {gp} failed: {ge}")
+                yield gp, None
                 continue
+            yield gp, [
+                {k: v for k, v in p.items() if k != "pitcher_id"}
+                for p in game["pitches"]
+                if p["pitcher_id"] == mlb_id
+            ]
+
+
+def _heatmap_payload(result: dict, keep) -> dict:
+    pitches = heatmap.filter_pitches(result["pitches"], keep)
+    return {
+        "pitches": pitches,
+        "total_pitches": len(pitches),
+        "season_pitches": result["total_pitches"],
+        "pitch_types": sorted({p["pitch_name"] for p in result["pitches"] if p.get("pitch_name")}),
+        "summary": heatmap.summarize(pitches),
+    }
+
+
+def _ndjson(chunk: dict) -> bytes:
+    return jsonlib.dumps(chunk) + b"\n"
+
+
+def _stream_heatmap(mlb_id: int, season: int, keep):
+    """NDJSON chunks: one "game" line per feed as it is parsed, then a "summary" line.
+
+    A cached heatmap goes out as a single "game" line. An expired one is
+    still served, flagged stale with its as_of on the summary line, while a
+    single background refresh runs, as in the non-streaming endpoint. With
+    nothing cached the build streams inline under the same refresh lease;
+    a request that finds another worker mid-build waits for its result.
+    """
+    key = f"heatmap:v2:{mlb_id}:{season}"
+    cache = get_cache()
+    entry = cache.get_entry(key)
+    if entry is None and not cache.try_refresh_lease(key):
+        entry = _await_entry(cache, key)
+        if entry is None:
+            yield _ndjson({"type": "error", "error": "heatmap build in progress elsewhere did not finish"})
+            return
+    if entry is not None:
+        value, stored_at, expires_at = entry
+        stale = {}
+        if expires_at < time.time():
+            cache.revalidate(key, TTL_HEATMAP, lambda: _build_heatmap(mlb_id, season))
+            stale = {"stale": True, "as_of": _as_of(stored_at)}
+        payload = _heatmap_payload(value, keep)
+        yield _ndjson({"type": "game", "game_pk": None, "pitches": payload.pop("pitches")})
+        yield _ndjson({"type": "summary", **payload, **stale})
+        return
+
+    try:
+        pitches = []
+        failed = 0
+        try:
+            game_pks = _heatmap_game_pks(mlb_id, season)
+            yield _ndjson({"type": "start", "games": len(game_pks)})
+            for gp, game_pitches in _pitcher_game_feeds(mlb_id, game_pks):
+                if game_pitches is None:
+                    failed += 1
+                    continue
+                pitches.extend(game_pitches)
+                yield _ndjson({"type": "game", "game_pk": gp, "pitches": heatmap.filter_pitches(game_pitches, keep)})
+        except Exception as e:
+            logger.error(f"Heatmap stream failed for {mlb_id}: {e}")
+            yield _ndjson({"type": "error", "error": str(e)})
+            return
+        if game_pks and failed == len(game_pks):
+            yield _ndjson({"type": "error", "error": f"all {failed} game feeds failed"})
+            return
+
+        result = {"pitches": pitches, "total_pitches": len(pitches)}
+        cache.set(key, result, TTL_HEATMAP)
+    finally:
+        cache.release_refresh_lease(key)
+    payload = _heatmap_payload(result, keep)
+    del payload["pitches"]
+    yield _ndjson({"type": "summary", "failed_games": failed, **payload})
+
+
+def _await_entry(cache, key: str, timeout: float = HEATMAP_BUILD_WAIT):
+    """Poll for an entry another worker is building; None if it doesn't appear in time."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        time.sleep(0.25)
+        entry = cache.get_entry(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+@router.get("/pitcher-heatmap/{mlb_id}", responses={200: {"model": HeatmapResponse}})
+def get_pitcher_heatmap(
+    mlb_id: int,
+    season: int = 2024,
+    pitch_type: str = None,
+    batter_hand: str = Query(None, pattern="^[LR]$"),
+    count: str = None,
+    date_from: str = None,
+    date_to: str = None,
+    stream: bool = False,
+    source: str = Query("mlb", pattern="^(mlb|archive)$"),
+    seasons: str = Query(None, pattern=r"^\d{4}(,\d{4})*$"),
+):
+    """Fetch pitcher's pitch location data from MLB game feeds.
 
-        return {"pitches": pitches, "total_pitches": len(pitches)}
+    The full season sample is cached once; filters (pitch type code or name,
+    batter hand, count as "1-2" or ahead/behind/even/two_strikes/first_pitch,
+    date range) are applied to it server-side, and the response carries the
+    filtered set's pitch mix, velocity and zone distribution.
 
+    During upstream trouble the last good result is served with "stale": true
+    while a single background refresh runs.
+
+    With stream=true the response is NDJSON, emitted game by game as each
+    feed is parsed so the client can start plotting before the slowest one.
+
+    source=archive reads every archived pitch instead of a sample of feeds,
+    straight from the local Parquet archive, for one or more seasons
+    (seasons=2022,2023,2024).
+    """
+    try:
+        keep = heatmap.make_filter(pitch_type, batter_hand, count, date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if source == "archive":
+        season_list = [int(s) for s in seasons.split(",")] if seasons else [season]
+        try:
+            rows = PitchArchive().read_rows(mlb_id, season_list, HEATMAP_COLUMNS)
+        except ArchiveUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        pitches = [p for p in rows if p["plate_x"] is not None and p["plate_z"] is not None]
+        return _encoded(_heatmap_payload({"pitches": pitches, "total_pitches": len(pitches)}, keep))
+    if stream:
+        return StreamingResponse(_stream_heatmap(mlb_id, season, keep), media_type="application/x-ndjson")
+
+    try:
+        result, stored_at, stale = get_cache().get_or_revalidate(
+            f"heatmap:v2:{mlb_id}:{season}",
+            TTL_HEATMAP,
+            lambda: _build_heatmap(mlb_id, season),
+            name="heatmap",
+        )
     except Exception as e:
         logger.error(f"Heatmap failed for {mlb_id}: {e}")
-        return {"pitches": [], "total_pitches": 0, "error": str(e)}
+        return _encoded({"pitches": [], "total_pitches": 0, "error": str(e)})
 
+    payload = _heatmap_payload(result, keep)
+    if stale:
+        payload.update(stale=True, as_of=_as_of(stored_at))
+    return _encoded(payload, payload.get("as_of"))
 
-@router.get("/pitcher-vs-team/{pitcher_id}/{team_id}")
-def get_pitcher_vs_team(pitcher_id: int, team_id: int, db: Session = Depends(get_db)):
-    """Get pitcher's career stats vs each batter on a team's roster."""
-    try:
-        # Get active roster
-        roster_data = statsapi.get("team_roster", {"teamId": team_id, "rosterType": "active"})
-        roster = roster_data.get("roster", [])
 
-        results = []
-        for player in roster:
-            pid = player.get("person", {}).get("id")
-            pname = player.get("person", {}).get("fullName", "")
-            pos = player.get("position", {}).get("abbreviation", "")
+def _roster(team_id: int) -> list[dict]:
+    """A team's active roster, cached across workers."""
+    roster_data = get_cache().get_or_set(
+        f"roster:{team_id}",
+        TTL_TEAM,
+        lambda: upstream.statsapi_get("team_roster", {"teamId": team_id, "rosterType": "active"}),
+        name="roster",
+    )
+    return roster_data.get("roster", [])
 
-            if pos in ["SP", "RP", "P", "CL"]:
-                continue
 
-            try:
-                r = requests.get(
-                    f"https://statsapi.mlb.com/api/v1/people/{pitcher_id}/stats",
+def _build_vs_team(pitcher_id: int, team_id: int) -> list[dict]:
+    """Pitcher's career line against each position player on a team's active roster."""
+    cache = get_cache()
+    roster = _roster(team_id)
+
+    results = []
+    for player in roster:
+        pid = player.get("person", {}).get("id")
+        pname = player.get("person", {}).get("fullName", "")
+        pos = player.get("position", {}).get("abbreviation", "")
+
+        if pos in ["SP", "RP", "P", "CL"]:
+            continue
+
+        try:
+            data = cache.get_or_set(
+                f"vs_player:{pitcher_id}:{pid}",
+                TTL_PERSON,
+                lambda: upstream.fetch_json(
+                    f"{upstream.STATSAPI_BASE}/people/{pitcher_id}/stats",
                     params={
                         "stats": "vsPlayerTotal",
                         "opposingPlayerId": pid,
                         "group": "pitching",
                         "sportId": 1,
                     },
-                    timeout=10
-                )
-                data = r.json()
-                splits = []
-                for stat_group in data.get("stats", []):
-                    if stat_group.get("type", {}).get("displayName") == "vsPlayerTotal":
-                        splits = stat_group.get("splits", [])
-                        break
-
-                if not splits:
-                    continue
+                    endpoint="vs_player",
+                ),
+                name="vs_player",
+            )
+        except Exception as inner_e:
+            logger.warning(f"Could not get {pname} vs pitcher {pitcher_id}: {inner_e}")
+            if upstream.is_outage(inner_e):
+                # an outage fails the whole build: get_or_revalidate then keeps serving the
+                # last complete roster instead of caching a partial one as fresh
+                raise
+            # a per-player error (4xx, bad data) only costs that batter's line
+            continue
 
-                s = splits[0].get("stat", {})
-                ab = s.get("atBats", 0)
-                if ab < 3:
-                    continue
+        splits = []
+        for stat_group in (data or {}).get("stats", []):
+            if stat_group.get("type", {}).get("displayName") == "vsPlayerTotal":
+                splits = stat_group.get("splits", [])
+                break
+
+        if not splits:
+            continue
+
+        s = splits[0].get("stat", {})
+        ab = s.get("atBats", 0)
+        if ab < 3:
+            continue
+
+        results.append({
+            "mlb_id": pid,
+            "full_name": pname,
+            "position": pos,
+            "atBats": ab,
+            "hits": s.get("hits", 0),
+            "homeRuns": s.get("homeRuns", 0),
+            "walks": s.get("baseOnBalls", 0),
+            "strikeOuts": s.get("strikeOuts", 0),
+            "avg": s.get("avg", ".000"),
+            "obp": s.get("obp", ".000"),
+            "slg": s.get("slg", ".000"),
+            "ops": s.get("ops", ".000"),
+            "numberOfPitches": s.get("numberOfPitches", 0),
+        })
+
+    return sorted(results, key=lambda x: x["atBats"], reverse=True)
+
+
+def _roster_batters(team_id: int) -> dict[int, dict]:
+    """Position players on a team's active roster, keyed by player id."""
+    return {
+        p["person"]["id"]: p
+        for p in _roster(team_id)
+        if p.get("person", {}).get("id") and p.get("position", {}).get("abbreviation", "") not in ["SP", "RP", "P", "CL"]
+    }
+
+
+def _local_vs_team(db: Session, pitcher_id: int, team_id: int) -> list[dict]:
+    """Same shape as _build_vs_team, aggregated from stored plate appearances in one query."""
+    batters = _roster_batters(team_id)
+    lines = PlateAppearanceService(db).vs_pitcher(pitcher_id, list(batters))
+    results = []
+    for batter_id, line in lines.items():
+        if line["atBats"] < 3:
+            continue
+        player = batters[batter_id]
+        results.append({
+            "mlb_id": batter_id,
+            "full_name": player.get("person", {}).get("fullName", ""),
+            "position": player.get("position", {}).get("abbreviation", ""),
+            **line,
+        })
+    return sorted(results, key=lambda x: x["atBats"], reverse=True)
 
-                results.append({
-                    "mlb_id": pid,
-                    "full_name": pname,
-                    "position": pos,
-                    "atBats": ab,
-                    "hits": s.get("hits", 0),
-                    "homeRuns": s.get("homeRuns", 0),
-                    "walks": s.get("baseOnBalls", 0),
-                    "strikeOuts": s.get("strikeOuts", 0),
-                    "avg": s.get("avg", ".000"),
-                    "obp": s.get("obp", ".000"),
-                    "slg": s.get("slg", ".000"),
-                    "ops": s.get("ops", ".000"),
-                    "numberOfPitches": s.get("numberOfPitches", 0),
-                })
-            except Exception as inner_e:
-                logger.warning(f"Could not get {pname} vs pitcher {pitcher_id}: {inner_e}")
-                continue
 
-        return sorted(results, key=lambda x: x["atBats"], reverse=True)
+@router.get("/pitcher-vs-team/{pitcher_id}/{team_id}", responses={200: {"model": list[VsTeamLine]}})
+def get_pitcher_vs_team(
+    pitcher_id: int,
+    team_id: int,
+    source: str = Query("mlb", pattern="^(mlb|local)$"),
+    db: Session = Depends(get_db),
+):
+    """Get pitcher's career stats vs each batter on a team's roster.
+
+    source=local aggregates stored plate appearances instead of one vsPlayerTotal
+    call per batter; it only covers games already ingested. A stale result
+    (served while upstream is unavailable) carries an X-Data-Stale header.
+    """
+    if source == "local":
+        try:
+            return _encoded(_local_vs_team(db, pitcher_id, team_id))
+        except Exception as e:
+            logger.error(f"Local pitcher vs team failed: {e}")
+            return _encoded([])
+    try:
+        results, stored_at, stale = get_cache().get_or_revalidate(
+            f"vs_team:{pitcher_id}:{team_id}",
+            TTL_VS_TEAM,
+            lambda: _build_vs_team(pitcher_id, team_id),
+            name="vs_team",
+        )
+        return _encoded(results, _as_of(stored_at) if stale else None)
 
     except Exception as e:
         logger.error(f"Pitcher vs team failed: {e}")
-        return []
+        return _encoded([])
+
+
+def _matchups(db: Session, lineups: list[dict], season: int) -> list[dict]:
+    """Model every batter in each lineup ({pitcher_id, team_id, ...}) against its pitcher in one pass."""
+    rosters = {lu["team_id"]: _roster_batters(lu["team_id"]) for lu in lineups}
+    pairs = [(lu["pitcher_id"], batter_id) for lu in lineups for batter_id in rosters[lu["team_id"]]]
+    predictions = {(p["pitcher_id"], p["batter_id"]): p for p in MatchupService(db).predict(pairs, season)}
+    results = []
+    for lu in lineups:
+        batters, throws = [], None
+        for batter_id, player in rosters[lu["team_id"]].items():
+            line = predictions.get((lu["pitcher_id"], batter_id))
+            if line is None:
+                continue
+            throws = line["throws"]
+            batters.append({
+                "mlb_id": batter_id,
+                "full_name": player.get("person", {}).get("fullName", ""),
+                "position": player.get("position", {}).get("abbreviation", ""),
+                "bats": line["bats"],
+                "batter_pa": line["batter_pa"],
+                "pitcher_pa": line["pitcher_pa"],
+                "probabilities": line["probabilities"],
+                "avg": line["avg"],
+                "obp": line["obp"],
+                "slg": line["slg"],
+            })
+        results.append({**lu, "throws": throws, "season": season, "batters": sorted(batters, key=lambda b: b["obp"], reverse=True)})
+    return results
+
+
+@router.get("/matchups/{pitcher_id}/{team_id}", responses={200: {"model": LineupMatchups}})
+def get_lineup_matchups(pitcher_id: int, team_id: int, season: int = 2024, db: Session = Depends(get_db)):
+    """Modeled per-PA outcome probabilities for each batter on a team's roster against one pitcher.
+
+    Season rates and platoon splits from stored plate appearances, regressed
+    toward the league for small samples and combined with log5.
+    """
+    try:
+        results = _matchups(db, [{"pitcher_id": pitcher_id, "team_id": team_id}], season)
+    except Exception as e:
+        logger.error(f"Lineup matchups failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return _encoded(results[0])
+
+
+@router.get("/today/matchups", responses={200: {"model": list[LineupMatchups]}})
+def get_slate_matchups(season: int = 2024, db: Session = Depends(get_db)):
+    """Lineup matchups for every probable starter on today's slate, modeled in a single pass."""
+    lineups = []
+    try:
+        for game in _today_games():
+            for side, opponent in (("away", "home"), ("home", "away")):
+                if game[f"{side}_pitcher_id"] and game[f"{opponent}_id"]:
+                    lineups.append({
+                        "game_id": game["game_id"],
+                        "pitcher_id": game[f"{side}_pitcher_id"],
+                        "pitcher_name": game[f"{side}_probable_pitcher"],
+                        "team_id": game[f"{opponent}_id"],
+                        "team_name": game[f"{opponent}_name"],
+                    })
+        return _encoded(_matchups(db, lineups, season))
+    except Exception as e:
+        logger.error(f"Slate matchups failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/ingest", status_code=202, dependencies=[Depends(require_admin)])
+def start_feed_ingest(
+    season: int = 2024,
+    workers: int = Query(None, ge=1, le=8),
+    limit: int = Query(None, ge=1),
+):
+    """Start a background job storing every unstored completed game of a season.
+
+    Feeds are parsed on a small process pool (ingest.JOB_WORKERS unless workers
+    is given) so the job doesn't starve this API worker; the CLI in
+    scripts/ingest_game_feeds.py uses every core. Poll GET /games/ingest/{job_id}
+    for progress. Needs ADMIN_TOKEN, since a job ties up upstream quota and
+    worker processes.
+    """
+    job_id = ingest.start_job(season, workers, limit)
+    if job_id is None:
+        raise HTTPException(status_code=409, detail=f"An ingest job for {season} is already running")
+    return ingest.job_status(job_id)
+
+
+@router.get("/ingest/{job_id}")
+def get_feed_ingest(job_id: str):
+    status = ingest.job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
@@ -0,0 +1,29 @@
+"""app/api/leaders.py - Season leaderboards"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.db.session import get_db
+from app.services.leaders import LeaderboardService, stat_fields
+
+router = APIRouter()
+
+
+@router.get("")
+def get_leaders(
+    stat: str,
+    season: int = 2024,
+    group: str = "hitting",
+    min_pa: float = None,
+    min_ip: float = None,
+    team: str = None,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """Top players for any stat in STAT_FIELDS_HITTING / STAT_FIELDS_PITCHING."""
+    if group not in ("hitting", "pitching"):
+        raise HTTPException(status_code=400, detail="group must be hitting or pitching")
+    if stat not in stat_fields(group):
+        raise HTTPException(status_code=400, detail=f"Unknown {group} stat: {stat}")
+    min_qualifier = min_ip if group == "pitching" else min_pa
+    svc = LeaderboardService(db)
+    return svc.get_leaders(season, stat, group, min_qualifier, team, limit, offset)
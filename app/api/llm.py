@@ -0,0 +1,17 @@
+"""app/api/llm.py - Claude usage and cost accounting"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.db.session import get_db
+from app.services.llm_usage import LLMUsageService
+
+router = APIRouter()
+
+
+@router.get("/usage")
+def get_llm_usage(
+    days: int = Query(30, ge=1, le=365),
+    feature: str = None,
+    db: Session = Depends(get_db),
+):
+    """Claude calls per day and feature: tokens (incl. prompt-cache reads/writes), latency, response-cache hits."""
+    return LLMUsageService(db).daily_summary(days, feature)
@@ -1,9 +1,16 @@
 """app/api/players.py"""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from app.core.responses import TimedJSONResponse
 from app.db.session import get_db
+from app.models.schemas import CareerSeason
+from app.services.arsenal import ArsenalService
+from app.services.comps import CompsService
+from app.services.gamelogs import GameLogService
 from app.services.mlb import MLBService
+from app.services.percentiles import PercentileService
 from app.services.scout import ScoutService
+from app.services.splits import SplitsService
 
 router = APIRouter()
 
@@ -17,6 +24,7 @@ def get_player(mlb_id: int, db: Session = Depends(get_db)):
     svc = MLBService(db)
     try:
         player = svc.get_or_fetch_player(mlb_id)
+        svc.record_view(mlb_id)
         return {
             "mlb_id": player.mlb_id,
             "full_name": player.full_name,
@@ -32,37 +40,108 @@ def get_player(mlb_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
-@router.get("/{mlb_id}/stats/career")
+@router.get("/{mlb_id}/stats/career", responses={200: {"model": list[CareerSeason]}})
 def get_career_stats(mlb_id: int, group: str = "hitting", db: Session = Depends(get_db)):
     svc = MLBService(db)
     svc.get_or_fetch_player(mlb_id)
-    return svc.get_career_stats(mlb_id, group)
+    # returned pre-encoded: skips FastAPI's jsonable_encoder walk over every season's stats
+    return TimedJSONResponse(PercentileService(db).attach(mlb_id, group, svc.get_career_stats(mlb_id, group)))
 
 @router.get("/{mlb_id}/stats/season")
 def get_season_stats(mlb_id: int, season: int = 2024, group: str = "hitting", db: Session = Depends(get_db)):
     svc = MLBService(db)
     svc.get_or_fetch_player(mlb_id)
     if group == "pitching":
-        return svc.get_pitching_stats(mlb_id, [season])
-    return svc.get_hitting_stats(mlb_id, [season])
+        lines = svc.get_pitching_stats(mlb_id, [season])
+    else:
+        lines = svc.get_hitting_stats(mlb_id, [season])
+    return PercentileService(db).attach(mlb_id, group, lines)
+
+@router.get("/{mlb_id}/gamelogs")
+def get_game_logs(
+    mlb_id: int,
+    season: int = 2024,
+    stat_type: str = Query("hitting", pattern="^(hitting|pitching)$"),
+    db: Session = Depends(get_db),
+):
+    return GameLogService(db).get_game_log(mlb_id, season, stat_type)
+
+@router.get("/{mlb_id}/gamelogs/rolling")
+def get_rolling_game_logs(
+    mlb_id: int,
+    season: int = 2024,
+    stat_type: str = Query("hitting", pattern="^(hitting|pitching)$"),
+    db: Session = Depends(get_db),
+):
+    """Last-7/15/30-game aggregates after each game; `latest` holds the current values."""
+    return GameLogService(db).rolling(mlb_id, season, stat_type)
+
+@router.get("/{mlb_id}/splits")
+def get_splits(
+    mlb_id: int,
+    season: int = 2024,
+    role: str = Query(None, pattern="^(batter|pitcher)$"),
+    db: Session = Depends(get_db),
+):
+    """vs LHP/RHP (or LHB/RHB), home/away, monthly and by-count lines from stored plate appearances."""
+    if role is None:
+        player = MLBService(db).get_or_fetch_player(mlb_id)
+        role = "pitcher" if player.position in ["SP", "RP", "P", "CL"] else "batter"
+    return SplitsService(db).get_splits(mlb_id, season, role)
+
+@router.get("/{mlb_id}/arsenal")
+def get_arsenal(mlb_id: int, season: int = None, db: Session = Depends(get_db)):
+    """Per pitch type: usage, velocity mean/p10/p50/p90, zone, chase, whiff and CSW rates, location centroids.
+
+    Built from stored pitches (ingested feeds and Statcast imports); omit season for the whole career.
+    """
+    return ArsenalService(db).get_arsenal(mlb_id, season)
+
+@router.get("/{mlb_id}/comps")
+def get_comps(
+    mlb_id: int,
+    season: int = None,
+    group: str = None,
+    k: int = Query(10, ge=1, le=50),
+    metric: str = Query("cosine", pattern="^(cosine|mahalanobis)$"),
+    age_adjusted: bool = False,
+    db: Session = Depends(get_db),
+):
+    if group is None:
+        player = MLBService(db).get_or_fetch_player(mlb_id)
+        group = "pitching" if player.position in ["SP", "RP", "P", "CL"] else "hitting"
+    comps = CompsService(db).get_comps(mlb_id, group, season, k, metric, age_adjusted)
+    return {"mlb_id": mlb_id, "stat_group": group, "comps": comps}
 
 @router.get("/{mlb_id}/report")
 def get_report(mlb_id: int, season: int = 2024, question: str = None, db: Session = Depends(get_db)):
-    mlb_svc = MLBService(db)
     scout_svc = ScoutService(db)
-    player = mlb_svc.get_or_fetch_player(mlb_id)
-    player_dict = {
-        "mlb_id": player.mlb_id,
-        "full_name": player.full_name,
-        "position": player.position,
-        "team": player.team,
-        "bats": player.bats,
-        "throws": player.throws,
-        "height": player.height,
-        "weight": player.weight,
-        "debut": player.debut,
-    }
-    stat_group = "pitching" if player.position in ["SP", "RP", "P", "CL"] else "hitting"
-    career = mlb_svc.get_career_stats(mlb_id, stat_group)
-    report = scout_svc.generate_report(player_dict, career, stat_group, season, question)
+    player_dict, career, stat_group, comps = scout_svc.report_inputs(mlb_id, season)
+    MLBService(db).record_view(mlb_id)
+    report = scout_svc.generate_report(player_dict, career, stat_group, season, question, comps)
     return {"report": report, "stat_group": stat_group}
+
+@router.get("/{batter_id}/matchup/{pitcher_id}")
+def get_matchup_analysis(batter_id: int, pitcher_id: int, db: Session = Depends(get_db)):
+    mlb_svc = MLBService(db)
+    players = {}
+    for mlb_id in (batter_id, pitcher_id):
+        p = mlb_svc.get_or_fetch_player(mlb_id)
+        players[mlb_id] = {
+            "mlb_id": p.mlb_id,
+            "full_name": p.full_name,
+            "position": p.position,
+            "team": p.team,
+            "bats": p.bats,
+            "throws": p.throws,
+        }
+    try:
+        analysis = ScoutService(db).matchup_analysis(
+            players[batter_id],
+            players[pitcher_id],
+            mlb_svc.get_career_stats(batter_id, "hitting"),
+            mlb_svc.get_career_stats(pitcher_id, "pitching"),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"batter_id": batter_id, "pitcher_id": pitcher_id, "analysis": analysis}
@@ -0,0 +1,29 @@
+"""app/core/auth.py - Token gate for operational endpoints"""
+import hmac
+from typing import Optional
+from fastapi import Header, HTTPException
+from app.core.config import get_settings
+
+
+def is_admin(x_admin_token: Optional[str], authorization: Optional[str]) -> bool:
+    """True if the request carries ADMIN_TOKEN, as X-Admin-Token or Authorization: Bearer."""
+    expected = get_settings().ADMIN_TOKEN
+    token = x_admin_token
+    if token is None and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    return bool(expected) and token is not None and hmac.compare_digest(token.encode(), expected.encode())
+
+
+def require_admin(
+    x_admin_token: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+):
+    """Allow the request only if it carries ADMIN_TOKEN.
+
+    Prometheus scrapers send the Bearer form. With ADMIN_TOKEN unset the
+    gated endpoints are off entirely, so a fresh deployment never exposes them.
+    """
+    if not get_settings().ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(x_admin_token, authorization):
+        raise HTTPException(status_code=401, detail="Admin token required", headers={"WWW-Authenticate": "Bearer"})
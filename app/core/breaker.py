@@ -0,0 +1,74 @@
+"""app/core/breaker.py - Per-endpoint-family circuit breakers for upstream calls"""
+import logging
+import threading
+import time
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = 5
+COOLDOWN = 30.0
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """closed -> open after FAILURE_THRESHOLD consecutive failures -> half-open after COOLDOWN.
+
+    While open, calls fail immediately instead of each waiting out a timeout.
+    In half-open state a single trial call is let through; its outcome closes
+    or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, threshold: int = FAILURE_THRESHOLD, cooldown: float = COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.cooldown or self.trial_in_flight:
+                raise CircuitOpenError(f"upstream {self.name} circuit open")
+            self.trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit {self.name} closed")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def release(self):
+        """Give up a half-open trial slot without a verdict (e.g. the call never went out)."""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.warning(f"Circuit {self.name} opened after {self.failures} failures")
+                metrics.circuit_opened.inc(self.name)
+                self.opened_at = time.monotonic()
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
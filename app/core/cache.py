@@ -0,0 +1,229 @@
+"""app/core/cache.py - Cross-process cache on a local SQLite file"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from app.core import jsonlib, metrics
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_entries_accessed ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS ix_entries_expires ON entries (expires_at);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    until REAL NOT NULL
+);
+"""
+
+# Re-stamp accessed_at at most this often so hot reads don't turn into writes
+_TOUCH_INTERVAL = 60.0
+# Check size bounds every N writes per process
+_EVICT_EVERY = 200
+# Longest a background refresh may hold its lease before another worker may retry
+_REFRESH_LEASE = 60.0
+
+_refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+
+class SharedCache:
+    """Key/value cache shared by every worker process on the host.
+
+    SQLite in WAL mode gives atomic writes and concurrent readers without an
+    external service. Entries carry a TTL; when the file grows past
+    max_entries / max_bytes the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # one connection per thread, and never reuse one inherited across a fork
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_entry(self, key: str):
+        """(value, stored_at, expires_at) including expired entries, or None."""
+        row = self._conn().execute(
+            "SELECT value, stored_at, expires_at, accessed_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, stored_at, expires_at, accessed_at = row
+        now = time.time()
+        if now - accessed_at > _TOUCH_INTERVAL:
+            self._conn().execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        try:
+            return jsonlib.loads(value), stored_at, expires_at
+        except jsonlib.DecodeError:
+            # written by an older encoder in a form this backend rejects (e.g. NaN); treat as a miss
+            return None
+
+    def get(self, key: str, default=None):
+        entry = self.get_entry(key)
+        if entry is None or entry[2] < time.time():
+            return default
+        return entry[0]
+
+    def set(self, key: str, value, ttl: float):
+        payload = jsonlib.dumps(value)
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO entries (key, value, stored_at, expires_at, accessed_at, size) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, payload, now, now + ttl, now, len(payload)),
+        )
+        self._writes += 1
+        if self._writes % _EVICT_EVERY == 0:
+            self.evict()
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix: str):
+        self._conn().execute("DELETE FROM entries WHERE key >= ? AND key < ?", (prefix, prefix + "\uffff"))
+
+    def get_or_set(self, key: str, ttl: float, fetch, name: str = "shared"):
+        """Return the cached value for key, or call fetch() and cache its result.
+
+        ttl may be a callable taking the fetched value, for results whose
+        freshness depends on their content (e.g. final vs. live games).
+        """
+        value = self.get(key)
+        metrics.record_cache(name, value is not None)
+        if value is not None:
+            return value
+        value = fetch()
+        if value is not None:
+            self.set(key, value, ttl(value) if callable(ttl) else ttl)
+        return value
+
+    def try_lease(self, key: str, seconds: float) -> bool:
+        """Claim key for seconds across all workers; False if someone else holds it."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT until FROM leases WHERE key = ?", (key,)).fetchone()
+            if row and row[0] > now:
+                conn.execute("COMMIT")
+                return False
+            conn.execute("INSERT OR REPLACE INTO leases (key, until) VALUES (?, ?)", (key, now + seconds))
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release_lease(self, key: str):
+        self._conn().execute("DELETE FROM leases WHERE key = ?", (key,))
+
+    def get_or_revalidate(self, key: str, ttl: float, fetch, name: str = "shared") -> tuple:
+        """Stale-while-revalidate lookup. Returns (value, stored_at, stale).
+
+        A fresh entry is returned as is. An expired entry is returned straight
+        away with stale=True while one background refresh (per key, across all
+        workers) calls fetch() and stores the result. With no entry at all,
+        fetch() runs inline and its exceptions propagate. fetch() should raise
+        rather than return a degraded result, so failures never replace the
+        last good value.
+        """
+        entry = self.get_entry(key)
+        now = time.time()
+        if entry is not None and entry[2] >= now:
+            metrics.record_cache(name, True)
+            return entry[0], entry[1], False
+        if entry is None:
+            metrics.record_cache(name, False)
+            value = fetch()
+            self.set(key, value, ttl)
+            return value, now, False
+
+        metrics.cache_requests.inc(name, "stale")
+        self.revalidate(key, ttl, fetch)
+        return entry[0], entry[1], True
+
+    def try_refresh_lease(self, key: str) -> bool:
+        """Claim the right to rebuild key, shared with get_or_revalidate's background refreshes."""
+        return self.try_lease(f"refresh:{key}", _REFRESH_LEASE)
+
+    def release_refresh_lease(self, key: str):
+        self.release_lease(f"refresh:{key}")
+
+    def revalidate(self, key: str, ttl: float, fetch) -> bool:
+        """Store fetch() under key on a background thread; False if any worker is already rebuilding it."""
+        if not self.try_refresh_lease(key):
+            return False
+
+        def refresh():
+            try:
+                self.set(key, fetch(), ttl)
+            except Exception as e:
+                logger.warning(f"Background refresh of {key} failed: {e}")
+            finally:
+                self.release_refresh_lease(key)
+
+        _refresher.submit(refresh)
+        return True
+
+    def evict(self):
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # keep expired rows a while: stale-while-revalidate readers may still want them
+            conn.execute("DELETE FROM entries WHERE expires_at < ?", (time.time() - 7 * 86400,))
+            conn.execute("DELETE FROM leases WHERE until < ?", (time.time(),))
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            excess = max(count - self.max_entries, 0)
+            if total > self.max_bytes and count:
+                # drop enough LRU rows (by average size) to get back under ~90% of the byte budget
+                avg = total / count
+                excess = max(excess, int((total - self.max_bytes * 0.9) / avg) + 1)
+            if excess:
+                conn.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+                    (excess,),
+                )
+                logger.info(f"Cache evicted {excess} entries")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+@lru_cache
+def get_cache() -> SharedCache:
+    settings = get_settings()
+    return SharedCache(
+        settings.CACHE_PATH,
+        max_entries=settings.CACHE_MAX_ENTRIES,
+        max_bytes=settings.CACHE_MAX_MB * 1024 * 1024,
+    )
@@ -1,11 +1,32 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
-    DATABASE_URL: str
-    ANTHROPIC_API_KEY: str
+    # Empty credentials are allowed at startup; the code that needs one fails when it's first used
+    DATABASE_URL: str = ""
+    ANTHROPIC_API_KEY: str = ""
     ENV: str = "development"
+    # Token for /metrics, /debug/profiles and POST /games/ingest; empty disables them
+    ADMIN_TOKEN: str = ""
+    PROFILING_ENABLED: bool = False
+    PROFILE_DIR: str = "profiles"
+    PROFILE_INTERVAL_MS: float = 5.0
+    CACHE_PATH: str = "cache/sr_cache.sqlite3"
+    CACHE_MAX_ENTRIES: int = 100_000
+    CACHE_MAX_MB: int = 512
+    RATE_LIMIT_PATH: str = "cache/sr_ratelimit.sqlite3"
+    # requests/second ceiling per upstream host, e.g. RATE_LIMITS='{"statsapi.mlb.com": 10}'
+    RATE_LIMITS: dict[str, float] = {"statsapi.mlb.com": 10.0}
+    RATE_LIMIT_DEFAULT: float = 5.0
+    LLM_MAX_CONCURRENCY: int = 4
+    LLM_MAX_RETRIES: int = 4
+    LLM_QUEUE_TIMEOUT: float = 120.0
+    # Parquet pitch archive (needs pyarrow), partitioned season=/pitcher_id=
+    PITCH_ARCHIVE_DIR: str = "archive/pitches"
 
     class Config:
         env_file = ".env"
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
@@ -0,0 +1,84 @@
+"""app/core/jsonlib.py - Fast JSON encode/decode: orjson, then msgspec, then the stdlib
+
+dumps() returns compact UTF-8 bytes and loads() accepts bytes or str, whichever
+backend is installed. NaN/inf encode as null on every backend, keys that
+aren't strings are stringified, and numpy values, datetimes and pydantic
+models are handled, so callers never need a jsonable_encoder pass first.
+"""
+import datetime
+import json
+import math
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+msgspec = None
+if orjson is None:
+    try:
+        import msgspec
+    except ImportError:
+        msgspec = None
+
+
+def _default(obj):
+    """Fallback for types the backend doesn't encode natively."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "tolist"):  # numpy arrays and scalars
+        return obj.tolist()
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, "__float__"):  # Decimal
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _clean(obj):
+    """Replace NaN/inf with None and stringify keys, for the stdlib encoder."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k if isinstance(k, str) else str(k): _clean(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_clean(v) for v in obj]
+    return obj
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+    DecodeError = orjson.JSONDecodeError
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+    def loads(data):
+        return orjson.loads(data)
+
+elif msgspec is not None:
+    BACKEND = "msgspec"
+    DecodeError = msgspec.DecodeError
+    _encoder = msgspec.json.Encoder(enc_hook=_default)
+    _decoder = msgspec.json.Decoder()
+
+    def dumps(obj) -> bytes:
+        return _encoder.encode(obj)
+
+    def loads(data):
+        return _decoder.decode(data)
+
+else:
+    BACKEND = "json"
+    DecodeError = json.JSONDecodeError
+
+    def dumps(obj) -> bytes:
+        return json.dumps(
+            _clean(obj), default=lambda o: _clean(_default(o)), separators=(",", ":"), ensure_ascii=False, allow_nan=False
+        ).encode()
+
+    def loads(data):
+        return json.loads(data)
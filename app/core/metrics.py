@@ -0,0 +1,218 @@
+"""app/core/metrics.py - In-process Prometheus metrics (text exposition format)"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for values, total in items:
+            lines.append(f"{self.name}{_label_str(self.labels, values)} {total}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [bucket counts..., sum, count]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = [0] * len(self.buckets) + [0.0, 0]
+                self._values[label_values] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, *label_values):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for values, state in items:
+            for bound, n in zip(self.buckets, state):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_label_str(self.labels, values, le)} {n}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_label_str(self.labels, values, le)} {state[-1]}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, values)} {state[-2]}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, values)} {state[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "sr_http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+http_latency = registry.histogram(
+    "sr_http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"))
+db_queries_per_request = registry.histogram(
+    "sr_db_queries_per_request", "Database queries issued per HTTP request.", ("route",), COUNT_BUCKETS)
+upstream_calls = registry.counter(
+    "sr_upstream_calls_total", "Upstream MLB API calls by endpoint type and outcome.", ("endpoint", "outcome"))
+upstream_latency = registry.histogram(
+    "sr_upstream_call_duration_seconds", "Upstream MLB API call latency by endpoint type.", ("endpoint",))
+llm_latency = registry.histogram(
+    "sr_llm_call_duration_seconds", "Claude call latency by feature and model.", ("feature", "model"))
+llm_tokens = registry.counter(
+    "sr_llm_tokens_total", "Claude token usage by feature, model and direction.", ("feature", "model", "direction"))
+llm_queue_wait = registry.histogram(
+    "sr_llm_queue_wait_seconds", "Time spent waiting for an LLM gateway slot.", ("feature",))
+llm_retries = registry.counter(
+    "sr_llm_retries_total", "Claude calls retried after a transient error.", ("feature",))
+cache_requests = registry.counter(
+    "sr_cache_requests_total", "Cache lookups by cache name and result (hit/miss/stale).", ("cache", "result"))
+circuit_opened = registry.counter(
+    "sr_circuit_open_total", "Times an upstream circuit breaker opened (or re-opened).", ("endpoint",))
+
+
+# Per-request state. The middleware installs a fresh dict; sync endpoints run in a
+# threadpool with a copy of the context, so mutating the dict (not re-setting the
+# var) is what makes counts visible back in the middleware.
+_request_state: ContextVar[dict | None] = ContextVar("sr_request_state", default=None)
+
+
+TIMING_PHASES = ("db", "upstream", "llm", "serialize")
+
+
+def start_request(scope: dict = None) -> dict:
+    state = {"db_queries": 0, "timings": dict.fromkeys(TIMING_PHASES, 0.0), "scope": scope}
+    _request_state.set(state)
+    return state
+
+
+def current_request() -> dict | None:
+    return _request_state.get()
+
+
+def current_route() -> str | None:
+    """Route template (e.g. /players/{mlb_id}/report) of the request being handled, if any."""
+    state = _request_state.get()
+    scope = state.get("scope") if state else None
+    if not scope:
+        return None
+    return getattr(scope.get("route"), "path", scope.get("path"))
+
+
+def add_timing(phase: str, seconds: float):
+    state = _request_state.get()
+    if state is not None:
+        state["timings"][phase] = state["timings"].get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed_phase(phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(phase, time.perf_counter() - start)
+
+
+def server_timing_header(state: dict, total: float) -> str:
+    """Format a request's phase timings as a Server-Timing header value (milliseconds)."""
+    parts = []
+    for phase, seconds in state["timings"].items():
+        entry = f"{phase};dur={seconds * 1000:.1f}"
+        if phase == "db":
+            entry += f';desc="{state["db_queries"]} queries"'
+        parts.append(entry)
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def record_db_query(seconds: float = 0.0):
+    state = _request_state.get()
+    if state is not None:
+        state["db_queries"] += 1
+        state["timings"]["db"] += seconds
+
+
+def record_cache(cache: str, hit: bool):
+    cache_requests.inc(cache, "hit" if hit else "miss")
+
+
+def record_llm_usage(feature: str, model: str, seconds: float, usage):
+    llm_latency.observe(seconds, feature, model)
+    add_timing("llm", seconds)
+    record_llm_tokens(feature, model, usage)
+
+
+def record_llm_tokens(feature: str, model: str, usage):
+    if usage is None:
+        return
+    for direction, attr in (
+        ("input", "input_tokens"),
+        ("output", "output_tokens"),
+        ("cache_read", "cache_read_input_tokens"),
+        ("cache_write", "cache_creation_input_tokens"),
+    ):
+        n = getattr(usage, attr, None)
+        if n:
+            llm_tokens.inc(feature, model, direction, amount=n)
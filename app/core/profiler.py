@@ -0,0 +1,84 @@
+"""app/core/profiler.py - Opt-in per-request sampling profiler (folded-stack output)"""
+import os
+import sys
+import threading
+import uuid
+from collections import Counter
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class SamplingProfiler:
+    """Samples Python stacks on a background thread while a request is in flight.
+
+    Only stacks that pass through this project's code are kept, so idle worker
+    threads and the event loop's own machinery drop out. Requests running
+    concurrently in the same worker can still show up in the profile; it is a
+    debugging aid, not an exact attribution.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sr-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = self._fold(frame)
+                if stack:
+                    self.samples[stack] += 1
+
+    def _fold(self, frame) -> str | None:
+        names = []
+        in_project = False
+        while frame is not None:
+            code = frame.f_code
+            filename = code.co_filename
+            if filename.startswith(PROJECT_ROOT) and "site-packages" not in filename:
+                if filename == __file__:
+                    return None
+                in_project = True
+                filename = os.path.relpath(filename, PROJECT_ROOT)
+            else:
+                filename = os.path.basename(filename)
+            names.append(f"{code.co_name} ({filename})")
+            frame = frame.f_back
+        if not in_project:
+            return None
+        return ";".join(reversed(names))
+
+    def folded(self) -> str:
+        """Brendan Gregg collapsed-stack format, readable by flamegraph.pl and speedscope."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+
+def save_profile(profiler: SamplingProfiler, directory: str) -> str:
+    os.makedirs(directory, exist_ok=True)
+    profile_id = uuid.uuid4().hex
+    with open(os.path.join(directory, f"{profile_id}.folded"), "w") as f:
+        f.write(profiler.folded())
+    return profile_id
+
+
+def load_profile(profile_id: str, directory: str) -> str | None:
+    # profile ids are uuid hex; anything else is not a file we wrote
+    if not profile_id.isalnum():
+        return None
+    path = os.path.join(directory, f"{profile_id}.folded")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read()
@@ -0,0 +1,146 @@
+"""app/core/ratelimit.py - Token-bucket rate limiter shared by all workers on a host"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    host TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    rate REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0,
+    backoff REAL NOT NULL DEFAULT 0
+);
+"""
+
+PRIORITIES = ("interactive", "background")
+# Background callers may only spend tokens while the bucket is above this fraction,
+# so a warmer running flat out still leaves headroom for user requests.
+BACKGROUND_RESERVE = 0.5
+MAX_BACKOFF = 60.0
+
+
+class RateLimitTimeout(Exception):
+    pass
+
+
+class RateLimiter:
+    """Per-host token buckets in a SQLite file, adapted with AIMD on throttling.
+
+    The configured rate is a ceiling. A 429/503 halves the host's current rate
+    and blocks it for an exponentially growing backoff (or Retry-After).
+    Each success adds back a small step towards the ceiling, so throughput
+    settles just under what the upstream tolerates.
+    """
+
+    def __init__(self, path: str, rates: dict[str, float], default_rate: float = 5.0):
+        self.path = path
+        self.rates = rates
+        self.default_rate = default_rate
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def max_rate(self, host: str) -> float:
+        return self.rates.get(host, self.default_rate)
+
+    def _burst(self, host: str) -> float:
+        return max(self.max_rate(host) * 2, 1.0)
+
+    def _load(self, conn, host: str, now: float):
+        row = conn.execute(
+            "SELECT tokens, rate, updated_at, blocked_until, backoff FROM buckets WHERE host = ?", (host,)
+        ).fetchone()
+        if row is None:
+            rate = self.max_rate(host)
+            conn.execute(
+                "INSERT INTO buckets (host, tokens, rate, updated_at) VALUES (?, ?, ?, ?)",
+                (host, self._burst(host), rate, now),
+            )
+            return self._burst(host), rate, now, 0.0, 0.0
+        return row
+
+    def acquire(self, host: str, priority: str = "interactive", timeout: float = 30.0):
+        """Block until a request to host may be sent."""
+        deadline = time.monotonic() + timeout
+        burst = self._burst(host)
+        reserve = burst * BACKGROUND_RESERVE if priority == "background" else 0.0
+        conn = self._conn()
+        while True:
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, rate, updated_at, blocked_until, _ = self._load(conn, host, now)
+                tokens = min(burst, tokens + (now - updated_at) * rate)
+                if now < blocked_until:
+                    wait = blocked_until - now
+                elif tokens - 1 >= reserve:
+                    conn.execute(
+                        "UPDATE buckets SET tokens = ?, updated_at = ? WHERE host = ?", (tokens - 1, now, host)
+                    )
+                    conn.execute("COMMIT")
+                    return
+                else:
+                    wait = (1 + reserve - tokens) / rate
+                conn.execute("UPDATE buckets SET tokens = ?, updated_at = ? WHERE host = ?", (tokens, now, host))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            if time.monotonic() + wait > deadline:
+                raise RateLimitTimeout(f"{host}: no {priority} capacity within {timeout:.0f}s")
+            time.sleep(min(wait, 1.0))
+
+    def report(self, host: str, status: int, retry_after: float = None):
+        """Feed a response status back: throttling shrinks the rate, success grows it back."""
+        throttled = status in (429, 503)
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, rate, updated_at, blocked_until, backoff = self._load(conn, host, now)
+            ceiling = self.max_rate(host)
+            if throttled:
+                backoff = min(max(backoff * 2, 1.0), MAX_BACKOFF)
+                blocked_until = now + (retry_after if retry_after else backoff)
+                rate = max(rate / 2, ceiling / 20)
+                logger.warning(f"{host} throttled ({status}); rate {rate:.2f}/s, backing off {blocked_until - now:.1f}s")
+            elif rate >= ceiling and not backoff:
+                conn.execute("COMMIT")
+                return
+            else:
+                backoff = 0.0
+                rate = min(ceiling, rate + ceiling / 50)
+            conn.execute(
+                "UPDATE buckets SET rate = ?, blocked_until = ?, backoff = ? WHERE host = ?",
+                (rate, blocked_until, backoff, host),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+@lru_cache
+def get_limiter() -> RateLimiter:
+    settings = get_settings()
+    return RateLimiter(settings.RATE_LIMIT_PATH, settings.RATE_LIMITS, settings.RATE_LIMIT_DEFAULT)
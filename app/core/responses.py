@@ -0,0 +1,15 @@
+"""app/core/responses.py - Default response class"""
+from fastapi.responses import JSONResponse
+from app.core import jsonlib, metrics
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse encoded with the fast JSON backend, timed as the "serialize" Server-Timing phase.
+
+    Heavy endpoints return one of these directly so FastAPI skips its
+    jsonable_encoder walk and the payload is encoded in a single pass.
+    """
+
+    def render(self, content) -> bytes:
+        with metrics.timed_phase("serialize"):
+            return jsonlib.dumps(content)
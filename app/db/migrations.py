@@ -0,0 +1,27 @@
+"""app/db/migrations.py - Additive schema upgrades for existing databases"""
+import logging
+from sqlalchemy import inspect, text
+from app.db.models import Base
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade(engine):
+    """Create missing tables, then add any model columns and indexes an older table lacks.
+
+    Only additive changes are handled; nothing is dropped or altered in place.
+    """
+    Base.metadata.create_all(bind=engine)
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                logger.info(f"Adding column {table.name}.{column.name}")
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}'))
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
@@ -1,5 +1,5 @@
 """app/db/models.py"""
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, JSON, UniqueConstraint, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, JSON, UniqueConstraint, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -24,6 +24,7 @@ class Player(Base):
     weight = Column(Integer)
     debut = Column(String)
     active = Column(String, default="Y")
+    view_count = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -35,7 +36,44 @@ class PlayerSeason(Base):
     team = Column(String)
     stat_group = Column(String)  # hitting, pitching, fielding
     stats = Column(JSON)
-    __table_args__ = (UniqueConstraint("mlb_id", "season", "team", "stat_group"),)
+    # bumped whenever ingest rewrites the row, so derived tables can tell in-place updates apart
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Typed copies of the key metrics in `stats` (see app/services/statlines.py)
+    games_played = Column(Integer)
+    hits = Column(Integer)
+    home_runs = Column(Integer)
+    walks = Column(Integer)
+    strike_outs = Column(Integer)
+    avg = Column(Float)
+    obp = Column(Float)
+    slg = Column(Float)
+    ops = Column(Float)
+    # hitting
+    plate_appearances = Column(Integer)
+    at_bats = Column(Integer)
+    runs = Column(Integer)
+    doubles = Column(Integer)
+    triples = Column(Integer)
+    rbi = Column(Integer)
+    stolen_bases = Column(Integer)
+    # pitching
+    games_started = Column(Integer)
+    wins = Column(Integer)
+    losses = Column(Integer)
+    saves = Column(Integer)
+    innings_pitched = Column(Float)
+    batters_faced = Column(Integer)
+    earned_runs = Column(Integer)
+    era = Column(Float)
+    whip = Column(Float)
+    k_per_9 = Column(Float)
+    bb_per_9 = Column(Float)
+    h_per_9 = Column(Float)
+    __table_args__ = (
+        UniqueConstraint("mlb_id", "season", "team", "stat_group"),
+        Index("ix_sr_player_seasons_season_group", "season", "stat_group"),
+        Index("ix_sr_player_seasons_player_group_season", "mlb_id", "stat_group", "season"),
+    )
 
 class ScoutingReport(Base):
     __tablename__ = "sr_scouting_reports"
@@ -45,3 +83,155 @@ class ScoutingReport(Base):
     report = Column(Text)
     generated_at = Column(DateTime, default=datetime.utcnow)
     __table_args__ = (UniqueConstraint("mlb_id", "season"),)
+
+class LeaderboardEntry(Base):
+    """Precomputed per-stat ranking of one player-season (see app/services/leaders.py)."""
+    __tablename__ = "sr_leaderboard"
+    id = Column(Integer, primary_key=True)
+    season = Column(Integer, nullable=False)
+    stat_group = Column(String, nullable=False)
+    stat = Column(String, nullable=False)
+    rank = Column(Integer, nullable=False)
+    mlb_id = Column(Integer, nullable=False)
+    full_name = Column(String)
+    team = Column(String)
+    value = Column(Float, nullable=False)
+    qualifier = Column(Float)  # PA for hitting, IP for pitching
+    __table_args__ = (
+        Index("ix_sr_leaderboard_lookup", "season", "stat_group", "stat", "rank"),
+        Index("ix_sr_leaderboard_team", "season", "stat_group", "stat", "team", "rank"),
+    )
+
+class LeaderboardState(Base):
+    """Snapshot of the sr_player_seasons partition a leaderboard was built from."""
+    __tablename__ = "sr_leaderboard_state"
+    id = Column(Integer, primary_key=True)
+    season = Column(Integer, nullable=False)
+    stat_group = Column(String, nullable=False)
+    source_rows = Column(Integer, nullable=False)
+    source_max_id = Column(Integer, nullable=False)
+    source_updated_at = Column(DateTime)
+    built_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (UniqueConstraint("season", "stat_group"),)
+
+class PlayerPercentiles(Base):
+    """League percentile rank (0-100) of each stat in one player-season, keyed by API stat name."""
+    __tablename__ = "sr_player_percentiles"
+    id = Column(Integer, primary_key=True)
+    mlb_id = Column(Integer, nullable=False)
+    season = Column(Integer, nullable=False)
+    stat_group = Column(String, nullable=False)
+    qualified = Column(String, default="Y")
+    percentiles = Column(JSON)
+    built_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        UniqueConstraint("mlb_id", "season", "stat_group"),
+        Index("ix_sr_player_percentiles_season_group", "season", "stat_group"),
+    )
+
+class LLMCall(Base):
+    """One Claude call (or response-cache hit that avoided one), recorded by app/services/llm.py."""
+    __tablename__ = "sr_llm_calls"
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    feature = Column(String, nullable=False)   # scouting_report, game_preview, matchup, ...
+    endpoint = Column(String)                  # route template that triggered the call
+    mlb_id = Column(Integer)
+    model = Column(String)
+    status = Column(String, default="ok")      # ok, error, busy, or a batch result type
+    cache_hit = Column(String, default="N")    # Y: served from a response cache, no tokens spent
+    input_tokens = Column(Integer, default=0)
+    output_tokens = Column(Integer, default=0)
+    cache_read_tokens = Column(Integer, default=0)
+    cache_write_tokens = Column(Integer, default=0)
+    latency_ms = Column(Float)
+    __table_args__ = (
+        Index("ix_sr_llm_calls_created_feature", "created_at", "feature"),
+    )
+
+class GameLog(Base):
+    """One player's line in one game, ingested incrementally (see app/services/gamelogs.py)."""
+    __tablename__ = "sr_game_logs"
+    id = Column(Integer, primary_key=True)
+    mlb_id = Column(Integer, nullable=False)
+    season = Column(Integer, nullable=False)
+    stat_group = Column(String, nullable=False)
+    game_pk = Column(Integer, nullable=False)
+    game_date = Column(String, nullable=False)  # YYYY-MM-DD
+    team = Column(String)
+    opponent = Column(String)
+    opponent_id = Column(Integer)
+    is_home = Column(String)  # Y/N
+    stats = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        UniqueConstraint("mlb_id", "stat_group", "game_pk"),
+        Index("ix_sr_game_logs_player_group_season_date", "mlb_id", "stat_group", "season", "game_date"),
+    )
+
+class PlateAppearance(Base):
+    """One completed plate appearance from a game feed (see app/services/gamefeed.py)."""
+    __tablename__ = "sr_plate_appearances"
+    id = Column(Integer, primary_key=True)
+    game_pk = Column(Integer, nullable=False)
+    at_bat_number = Column(Integer, nullable=False)  # atBatIndex + 1, as in Statcast
+    game_date = Column(String)
+    season = Column(Integer)
+    inning = Column(Integer)
+    half_inning = Column(String)  # top/bottom
+    batter_id = Column(Integer, nullable=False)
+    pitcher_id = Column(Integer, nullable=False)
+    stand = Column(String)        # batter side L/R
+    p_throws = Column(String)     # pitcher hand L/R
+    batter_home = Column(String)  # Y/N
+    event = Column(String)
+    event_type = Column(String)
+    balls = Column(Integer)       # final count
+    strikes = Column(Integer)
+    outs = Column(Integer)
+    rbi = Column(Integer)
+    num_pitches = Column(Integer)
+    is_ab = Column(Integer)
+    is_hit = Column(Integer)
+    total_bases = Column(Integer)
+    is_walk = Column(Integer)
+    is_hbp = Column(Integer)
+    is_sf = Column(Integer)
+    is_k = Column(Integer)
+    is_hr = Column(Integer)
+    __table_args__ = (
+        UniqueConstraint("game_pk", "at_bat_number"),
+        Index("ix_sr_plate_appearances_batter_pitcher", "batter_id", "pitcher_id"),
+        Index("ix_sr_plate_appearances_pitcher_season", "pitcher_id", "season"),
+        Index("ix_sr_plate_appearances_batter_season", "batter_id", "season"),
+    )
+
+class Pitch(Base):
+    """One pitch from a game feed; (game_pk, at_bat_number, pitch_number) matches Statcast's key."""
+    __tablename__ = "sr_pitches"
+    id = Column(Integer, primary_key=True)
+    game_pk = Column(Integer, nullable=False)
+    at_bat_number = Column(Integer, nullable=False)
+    pitch_number = Column(Integer, nullable=False)
+    game_date = Column(String)
+    season = Column(Integer)
+    pitcher_id = Column(Integer, nullable=False)
+    batter_id = Column(Integer, nullable=False)
+    stand = Column(String)
+    p_throws = Column(String)
+    balls = Column(Integer)       # count before the pitch
+    strikes = Column(Integer)
+    pitch_type = Column(String)
+    pitch_name = Column(String)
+    start_speed = Column(Float)
+    plate_x = Column(Float)
+    plate_z = Column(Float)
+    zone = Column(Integer)
+    description = Column(String)
+    is_strike = Column(Integer)
+    is_in_play = Column(Integer)
+    __table_args__ = (
+        UniqueConstraint("game_pk", "at_bat_number", "pitch_number"),
+        Index("ix_sr_pitches_pitcher_season", "pitcher_id", "season"),
+        Index("ix_sr_pitches_batter_season", "batter_id", "season"),
+    )
@@ -1,18 +1,47 @@
 """app/db/session.py"""
-from sqlalchemy import create_engine
+import time
+from functools import lru_cache
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from app.core.config import settings
-from app.db.models import Base
+from app.core import metrics
+from app.core.config import get_settings
+from app.db import migrations
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Bound to the engine on first use, so importing this module needs no DATABASE_URL
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _end_query(conn, cursor, statement, parameters, context, executemany):
+    metrics.record_db_query(time.perf_counter() - conn.info["query_start"].pop())
+
+
+@lru_cache
+def get_engine():
+    url = get_settings().DATABASE_URL
+    if not url:
+        raise RuntimeError("DATABASE_URL is not configured")
+    engine = create_engine(url)
+    event.listen(engine, "before_cursor_execute", _start_query)
+    event.listen(engine, "after_cursor_execute", _end_query)
+    SessionLocal.configure(bind=engine)
+    return engine
+
+
+def new_session():
+    get_engine()
+    return SessionLocal()
 
 def get_db():
-    db = SessionLocal()
+    db = new_session()
     try:
         yield db
     finally:
         db.close()
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    """Create/upgrade the schema. Run explicitly (scripts/init_db.py), not on app startup."""
+    migrations.upgrade(get_engine())
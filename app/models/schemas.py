@@ -13,3 +13,91 @@ class ReportRequest(BaseModel):
     mlb_id: int
     season: int = 2024
     question: Optional[str] = None
+
+
+# Response shapes of the heavy endpoints. Those routes return a pre-encoded
+# TimedJSONResponse, so the models are attached as OpenAPI `responses`, not
+# response_model: nothing validates them per request. tests/test_schemas.py
+# checks the real payloads against them instead.
+
+class HeatmapPitch(BaseModel):
+    game_date: Optional[str] = None
+    stand: Optional[str] = None
+    balls: Optional[int] = None
+    strikes: Optional[int] = None
+    plate_x: float
+    plate_z: float
+    pitch_type: Optional[str] = None
+    pitch_name: Optional[str] = None
+    start_speed: Optional[float] = None
+    zone: Optional[int] = None
+    description: Optional[str] = None
+
+class PitchMixEntry(BaseModel):
+    pitch_name: str
+    count: int
+    pct: float
+    avg_velocity: Optional[float] = None
+
+class ZoneShare(BaseModel):
+    zone: int
+    count: int
+    pct: float
+
+class HeatmapSummary(BaseModel):
+    pitch_mix: list[PitchMixEntry]
+    avg_velocity: Optional[float] = None
+    zones: list[ZoneShare]
+
+class HeatmapResponse(BaseModel):
+    pitches: list[HeatmapPitch]
+    total_pitches: int
+    season_pitches: int = 0
+    pitch_types: list[str] = []
+    summary: Optional[HeatmapSummary] = None
+    stale: bool = False
+    as_of: Optional[str] = None
+    error: Optional[str] = None
+
+class VsTeamLine(BaseModel):
+    mlb_id: int
+    full_name: str
+    position: str
+    atBats: int
+    hits: int
+    homeRuns: int
+    walks: int
+    strikeOuts: int
+    avg: str
+    obp: str
+    slg: str
+    ops: str
+    numberOfPitches: int
+
+class MatchupLine(BaseModel):
+    mlb_id: int
+    full_name: str
+    position: str
+    bats: str
+    batter_pa: int
+    pitcher_pa: int
+    probabilities: dict[str, float]
+    avg: float
+    obp: float
+    slg: float
+
+class LineupMatchups(BaseModel):
+    pitcher_id: int
+    team_id: int
+    throws: Optional[str] = None
+    season: int
+    game_id: Optional[int] = None
+    pitcher_name: Optional[str] = None
+    team_name: Optional[str] = None
+    batters: list[MatchupLine]
+
+class CareerSeason(BaseModel):
+    season: int
+    team: str = ""
+    stats: dict
+    percentiles: dict = {}
@@ -0,0 +1,224 @@
+"""app/services/archive.py - Columnar Parquet archive of pitches, partitioned by season and pitcher
+
+Layout: {PITCH_ARCHIVE_DIR}/season=2024/pitcher_id=543037/pitches.parquet
+
+One small file per pitcher-season, so a heatmap or arsenal query opens only
+the files it needs, reads only the columns it asks for, and memory-maps them
+rather than copying whole seasons into RAM. pyarrow is optional: the rest of
+the app runs without it, and archive calls raise ArchiveUnavailable.
+"""
+import glob
+import logging
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.db.models import Pitch
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# column -> Arrow type name; low-cardinality strings are dictionary-encoded
+ARCHIVE_COLUMNS = {
+    "game_pk": "int32",
+    "at_bat_number": "int16",
+    "pitch_number": "int16",
+    "game_date": "string",
+    "season": "int16",
+    "pitcher_id": "int32",
+    "batter_id": "int32",
+    "stand": "category",
+    "p_throws": "category",
+    "balls": "int8",
+    "strikes": "int8",
+    "pitch_type": "category",
+    "pitch_name": "category",
+    "description": "category",
+    "start_speed": "float32",
+    "plate_x": "float32",
+    "plate_z": "float32",
+    "zone": "int8",
+    "is_strike": "int8",
+    "is_in_play": "int8",
+}
+KEY_COLUMNS = ("game_pk", "at_bat_number", "pitch_number")
+FLOAT_DIGITS = 4
+
+
+class ArchiveUnavailable(RuntimeError):
+    pass
+
+
+def _arrow():
+    # pyarrow is a heavy, optional import; only pay for it when the archive is used
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ArchiveUnavailable("pyarrow is not installed; the pitch archive is unavailable")
+    return pa, pc, pq
+
+
+def schema():
+    pa, _, _ = _arrow()
+    types = {
+        "string": pa.string(),
+        "category": pa.dictionary(pa.int16(), pa.string()),
+        "float32": pa.float32(),
+        "int8": pa.int8(),
+        "int16": pa.int16(),
+        "int32": pa.int32(),
+    }
+    return pa.schema([(c, types[t]) for c, t in ARCHIVE_COLUMNS.items()])
+
+
+def _keys(table) -> np.ndarray:
+    """One int64 per pitch from (game_pk, at_bat_number, pitch_number)."""
+    game_pk, at_bat, pitch = (table.column(c).to_numpy(zero_copy_only=False).astype(np.int64) for c in KEY_COLUMNS)
+    return game_pk * 1_000_000 + at_bat * 1_000 + pitch
+
+
+def dedupe(table):
+    """Drop repeated pitches, keeping each one's first occurrence (as the DB importer does)."""
+    if table.num_rows == 0:
+        return table
+    _, first = np.unique(_keys(table), return_index=True)
+    keep = np.sort(first)
+    return table if len(keep) == table.num_rows else table.take(keep)
+
+
+_partition_locks: dict[str, threading.Lock] = {}
+_partition_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _partition_lock(path: str):
+    """Serialize read-merge-replace of one partition across threads and processes."""
+    with _partition_locks_guard:
+        lock = _partition_locks.setdefault(path, threading.Lock())
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        with open(f"{path}.lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class PitchArchive:
+    def __init__(self, root: str = None):
+        self.root = root or get_settings().PITCH_ARCHIVE_DIR
+
+    def partition_path(self, season: int, pitcher_id: int) -> str:
+        return os.path.join(self.root, f"season={season}", f"pitcher_id={pitcher_id}", "pitches.parquet")
+
+    def seasons(self, pitcher_id: int) -> list[int]:
+        paths = glob.glob(os.path.join(self.root, "season=*", f"pitcher_id={pitcher_id}", "pitches.parquet"))
+        return sorted(int(p.split("season=")[1].split(os.sep)[0]) for p in paths)
+
+    def to_table(self, data):
+        """An archive-schema Table from a pandas DataFrame, a {column: values} dict or a list of row dicts."""
+        pa, _, _ = _arrow()
+        target = schema()
+        if isinstance(data, list):
+            data = {c: [row.get(c) for row in data] for c in ARCHIVE_COLUMNS}
+        if isinstance(data, dict):
+            n = len(next(iter(data.values()), []))
+            arrays = [
+                pa.array(data[c], from_pandas=True).cast(field.type) if c in data else pa.nulls(n, field.type)
+                for c, field in zip(ARCHIVE_COLUMNS, target)
+            ]
+            return pa.Table.from_arrays(arrays, schema=target)
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        arrays = [
+            table.column(c).cast(field.type) if c in table.column_names else pa.nulls(table.num_rows, field.type)
+            for c, field in zip(ARCHIVE_COLUMNS, target)
+        ]
+        return pa.Table.from_arrays(arrays, schema=target)
+
+    def write(self, table) -> int:
+        """Merge pitches into their season/pitcher partitions; returns partitions written.
+
+        Each partition is read, combined with the new rows (the stored copy
+        wins on the pitch key), sorted by game and replaced atomically, all
+        under a per-partition lock so concurrent writers can't drop rows.
+        """
+        pa, pc, pq = _arrow()
+        if table.num_rows == 0:
+            return 0
+        table = table.cast(schema())
+        parts = table.select(["season", "pitcher_id"]).group_by(["season", "pitcher_id"]).aggregate([])
+        written = 0
+        for season, pitcher_id in zip(parts.column("season").to_pylist(), parts.column("pitcher_id").to_pylist()):
+            if season is None or pitcher_id is None:
+                continue
+            mask = pc.and_(pc.equal(table.column("season"), season), pc.equal(table.column("pitcher_id"), pitcher_id))
+            rows = table.filter(mask)
+            path = self.partition_path(season, pitcher_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with _partition_lock(path):
+                if os.path.exists(path):
+                    rows = pa.concat_tables([pq.read_table(path, memory_map=True).cast(rows.schema), rows])
+                rows = dedupe(rows).sort_by([(c, "ascending") for c in ("game_date",) + KEY_COLUMNS])
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                pq.write_table(rows, tmp, compression="zstd")
+                os.replace(tmp, path)
+            written += 1
+        return written
+
+    def read(self, pitcher_id: int, seasons: list[int] = None, columns: list[str] = None, filters=None):
+        """The pitcher's pitches for the given seasons (all archived ones by default).
+
+        Only the requested columns are read, files are memory-mapped, and
+        filters (pyarrow DNF, e.g. [("stand", "=", "L")]) prune row groups.
+        """
+        pa, _, pq = _arrow()
+        seasons = seasons or self.seasons(pitcher_id)
+        tables = [
+            pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+            for path in (self.partition_path(s, pitcher_id) for s in seasons)
+            if os.path.exists(path)
+        ]
+        if not tables:
+            target = schema()
+            return target.empty_table().select(columns) if columns else target.empty_table()
+        return pa.concat_tables(tables, promote_options="permissive")
+
+    def read_rows(self, pitcher_id: int, seasons: list[int] = None, columns: list[str] = None, filters=None) -> list[dict]:
+        """read() as JSON-ready dicts, float32 measurements rounded back to their feed precision."""
+        pa, pc, _ = _arrow()
+        table = self.read(pitcher_id, seasons, columns, filters)
+        for i, field in enumerate(table.schema):
+            if pa.types.is_floating(field.type):
+                table = table.set_column(i, field.name, pc.round(table.column(i).cast(pa.float64()), FLOAT_DIGITS))
+            elif pa.types.is_dictionary(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+        return table.to_pylist()
+
+    def export_from_db(self, db: Session, season: int, pitcher_ids: list[int] = None) -> int:
+        """Archive stored sr_pitches rows for a season, one pitcher at a time to bound memory."""
+        if pitcher_ids is None:
+            pitcher_ids = [
+                pid for (pid,) in db.query(Pitch.pitcher_id).filter(Pitch.season == season).distinct()
+            ]
+        written = 0
+        for pitcher_id in pitcher_ids:
+            rows = (
+                db.query(*[getattr(Pitch, c) for c in ARCHIVE_COLUMNS])
+                .filter(Pitch.season == season, Pitch.pitcher_id == pitcher_id)
+                .all()
+            )
+            if rows:
+                written += self.write(self.to_table({c: list(v) for c, v in zip(ARCHIVE_COLUMNS, zip(*rows))}))
+        logger.info(f"Archived {written} pitcher partitions for {season}")
+        return written
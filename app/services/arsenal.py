@@ -0,0 +1,158 @@
+"""app/services/arsenal.py - Per-pitch-type arsenal metrics from the local pitch store"""
+import logging
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.cache import get_cache
+from app.db.models import Pitch
+
+logger = logging.getLogger(__name__)
+
+# Rebuilt on demand and dropped whenever one of the pitcher's games is stored
+TTL_ARSENAL = 7 * 86400
+
+COLUMNS = ["season", "pitch_type", "pitch_name", "stand", "start_speed", "plate_x", "plate_z", "zone", "description"]
+IN_ZONE = range(1, 10)  # Statcast zones 1-9 are the strike zone; 11-14 are outside it
+VELO_PERCENTILES = (10, 50, 90)
+
+# Pitch outcome prefixes, matching both live-feed and imported Statcast descriptions
+SWING_PREFIXES = ("Swinging Strike", "Foul", "In play", "Missed Bunt")
+WHIFF_PREFIXES = ("Swinging Strike", "Missed Bunt", "Foul Tip")
+CALLED_STRIKE = "Called Strike"
+
+
+def cache_key(mlb_id: int, season: int = None) -> str:
+    return f"arsenal:{mlb_id}:{season or 'career'}"
+
+
+def invalidate(pitches: list[tuple[int, int]]):
+    """Drop cached arsenals for each (pitcher_id, season), and the pitchers' career arsenals."""
+    cache = get_cache()
+    for pitcher_id, season in set(pitches):
+        cache.delete(cache_key(pitcher_id, season))
+        cache.delete(cache_key(pitcher_id))
+
+
+def _round(value, digits: int = 3):
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+def arsenal_lines(df) -> list[dict]:
+    """One line per pitch type: usage, velocity, zone/chase/whiff/CSW rates and location centroids.
+
+    Every flag is a vectorized column, so each metric is one grouped sum or
+    mean over the whole frame rather than a pass per pitch.
+    """
+    if df.empty:
+        return []
+    # classify each distinct description once, then broadcast through the category codes
+    desc = df["description"].fillna("").astype("category")
+    names = desc.cat.categories.astype(str).to_series()
+    codes = desc.cat.codes.to_numpy()
+    swing = names.str.startswith(SWING_PREFIXES).to_numpy()[codes]
+    whiff = names.str.startswith(WHIFF_PREFIXES).to_numpy()[codes]
+    called = (names == CALLED_STRIKE).to_numpy()[codes]
+    zone = df["zone"]
+    in_zone = zone.isin(IN_ZONE).to_numpy()
+    out_zone = zone.notna().to_numpy() & ~in_zone
+    df = df.assign(
+        pitch_type=df["pitch_type"].fillna("UN"),
+        has_zone=zone.notna().to_numpy(),
+        in_zone=in_zone,
+        out_zone=out_zone,
+        swing=swing,
+        whiff=whiff,
+        chase=swing & out_zone,
+        csw=whiff | called,
+    )
+    g = df.groupby("pitch_type", sort=False)
+    lines = g.agg(
+        pitch_name=("pitch_name", "first"),
+        pitches=("pitch_type", "size"),
+        velo_mean=("start_speed", "mean"),
+        zoned=("has_zone", "sum"),
+        in_zone=("in_zone", "sum"),
+        out_zone=("out_zone", "sum"),
+        swings=("swing", "sum"),
+        whiffs=("whiff", "sum"),
+        chases=("chase", "sum"),
+        csw=("csw", "sum"),
+        plate_x=("plate_x", "mean"),
+        plate_z=("plate_z", "mean"),
+    )
+    velo = g["start_speed"].quantile([p / 100 for p in VELO_PERCENTILES]).unstack()
+    by_hand = df.groupby(["pitch_type", "stand"], sort=False)[["plate_x", "plate_z"]].mean()
+    hand_usage = df.groupby(["stand", "pitch_type"], sort=False).size()
+    hand_totals = df.groupby("stand", sort=False).size()
+
+    total = len(df)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lines["usage"] = lines["pitches"] / total
+        lines["zone_rate"] = lines["in_zone"] / lines["zoned"]
+        lines["chase_rate"] = lines["chases"] / lines["out_zone"]
+        lines["whiff_rate"] = lines["whiffs"] / lines["swings"]
+        lines["csw_rate"] = lines["csw"] / lines["pitches"]
+
+    result = []
+    for pitch_type, row in lines.sort_values("pitches", ascending=False).iterrows():
+        hands = {}
+        for hand in ("L", "R"):
+            if (pitch_type, hand) in by_hand.index:
+                loc = by_hand.loc[(pitch_type, hand)]
+                hands[hand] = {
+                    "usage": _round(hand_usage.get((hand, pitch_type), 0) / hand_totals[hand]),
+                    "plate_x": _round(loc["plate_x"]),
+                    "plate_z": _round(loc["plate_z"]),
+                }
+        result.append({
+            "pitch_type": pitch_type,
+            "pitch_name": row["pitch_name"],
+            "pitches": int(row["pitches"]),
+            "usage": _round(row["usage"]),
+            "velocity": {
+                "mean": _round(row["velo_mean"], 1),
+                **{f"p{p}": _round(velo.loc[pitch_type, p / 100], 1) for p in VELO_PERCENTILES},
+            },
+            "zone_rate": _round(row["zone_rate"]),
+            "chase_rate": _round(row["chase_rate"]),
+            "whiff_rate": _round(row["whiff_rate"]),
+            "csw_rate": _round(row["csw_rate"]),
+            "centroid": {"plate_x": _round(row["plate_x"]), "plate_z": _round(row["plate_z"])},
+            "by_batter_hand": hands,
+        })
+    return result
+
+
+class ArsenalService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _frame(self, mlb_id: int, season: int = None):
+        import pandas as pd
+
+        q = self.db.query(*[getattr(Pitch, c) for c in COLUMNS]).filter(Pitch.pitcher_id == mlb_id)
+        if season is not None:
+            q = q.filter(Pitch.season == season)
+        df = pd.DataFrame(q.all(), columns=COLUMNS)
+        for c in ("start_speed", "plate_x", "plate_z"):
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+        df["zone"] = pd.to_numeric(df["zone"], errors="coerce")
+        return df
+
+    def build(self, mlb_id: int, season: int = None) -> dict:
+        df = self._frame(mlb_id, season)
+        return {
+            "mlb_id": mlb_id,
+            "season": season,
+            "seasons": sorted(int(s) for s in df["season"].dropna().unique()),
+            "pitches": int(len(df)),
+            "arsenal": arsenal_lines(df),
+        }
+
+    def get_arsenal(self, mlb_id: int, season: int = None) -> dict:
+        """Cached per pitcher-season; season=None covers the whole stored career."""
+        return get_cache().get_or_set(
+            cache_key(mlb_id, season),
+            TTL_ARSENAL,
+            lambda: self.build(mlb_id, season),
+            name="arsenal",
+        )
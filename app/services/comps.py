@@ -0,0 +1,222 @@
+"""app/services/comps.py - Nearest-neighbour comparable player-seasons"""
+import logging
+import threading
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.db.models import Player, PlayerSeason
+from app.services.leaders import QUALIFIER_STAT, QUALIFY_MIN, stat_value
+
+logger = logging.getLogger(__name__)
+
+
+def _per(stats: dict, num: str, den: str, scale: float = 1.0) -> float | None:
+    n, d = stat_value(num, stats), stat_value(den, stats)
+    if n is None or not d:
+        return None
+    return n / d * scale
+
+
+# Feature extractors per stat group; rate stats only so playing time doesn't dominate
+FEATURES = {
+    "hitting": {
+        "avg": lambda s: stat_value("avg", s),
+        "obp": lambda s: stat_value("obp", s),
+        "slg": lambda s: stat_value("slg", s),
+        "hr_rate": lambda s: _per(s, "homeRuns", "plateAppearances"),
+        "bb_rate": lambda s: _per(s, "walks", "plateAppearances") or _per(s, "baseOnBalls", "plateAppearances"),
+        "k_rate": lambda s: _per(s, "strikeOuts", "plateAppearances"),
+        "sb_rate": lambda s: _per(s, "stolenBases", "plateAppearances"),
+    },
+    "pitching": {
+        "era": lambda s: stat_value("era", s),
+        "whip": lambda s: stat_value("whip", s),
+        "k9": lambda s: stat_value("strikeoutsPer9Inn", s),
+        "bb9": lambda s: stat_value("walksPer9Inn", s),
+        "h9": lambda s: stat_value("hitsPer9Inn", s),
+        "hr9": lambda s: _per(s, "homeRuns", "inningsPitched", 9),
+        "start_share": lambda s: _per(s, "gamesStarted", "gamesPlayed"),
+    },
+}
+
+
+class CompsIndex:
+    """Player-season feature matrix for one stat group, kept current incrementally from sr_player_seasons."""
+
+    def __init__(self, stat_group: str):
+        self.stat_group = stat_group
+        self.feature_names = list(FEATURES[stat_group])
+        self.keys: list[tuple[int, int]] = []      # (mlb_id, season) per matrix row
+        self.positions: dict[tuple[int, int], int] = {}
+        self.qualifiers: list[float] = []
+        self.raw = np.empty((0, len(self.feature_names) + 1))  # last column: age
+        self.last_id = 0
+        self.last_updated_at = None
+        self.lock = threading.Lock()
+        self._cache: dict = {}  # derived arrays, dropped whenever the matrix changes
+
+    def update(self, db: Session) -> int:
+        """Pull sr_player_seasons rows added or rewritten since the last update into the matrix.
+
+        Ingest updates season rows in place during the season, so rows are
+        picked up by id or by updated_at, and every (player, season) touched
+        is rebuilt from all of its rows, replacing its stale vector.
+        """
+        ps = PlayerSeason
+        changed = ps.id > self.last_id
+        if self.last_updated_at is not None:
+            # >=: rows sharing the watermark are re-read, which rebuilds them identically
+            changed = or_(changed, ps.updated_at >= self.last_updated_at)
+        else:
+            changed = or_(changed, ps.updated_at.isnot(None))
+        touched = db.query(ps.id, ps.mlb_id, ps.season, ps.updated_at).filter(ps.stat_group == self.stat_group, changed).all()
+        if not touched:
+            return 0
+        for row_id, _, _, updated_at in touched:
+            self.last_id = max(self.last_id, row_id)
+            if updated_at is not None and (self.last_updated_at is None or updated_at > self.last_updated_at):
+                self.last_updated_at = updated_at
+        keys = {(mlb_id, season) for _, mlb_id, season, _ in touched}
+
+        query = (
+            db.query(PlayerSeason, Player.birth_date)
+            .outerjoin(Player, Player.mlb_id == PlayerSeason.mlb_id)
+            .filter(PlayerSeason.stat_group == self.stat_group)
+        )
+        if self.keys:
+            ids = sorted({mlb_id for mlb_id, _ in keys})
+            rows = [
+                r for i in range(0, len(ids), 500)
+                for r in query.filter(PlayerSeason.mlb_id.in_(ids[i:i + 500])).all()
+                if (r[0].mlb_id, r[0].season) in keys
+            ]
+        else:
+            rows = query.all()
+
+        extractors = list(FEATURES[self.stat_group].values())
+        # traded player: the season-total (largest PA/IP) line stands for the season
+        best: dict[tuple[int, int], tuple] = {}
+        for row, birth_date in rows:
+            stats = row.stats or {}
+            qualifier = stat_value(QUALIFIER_STAT[self.stat_group], stats) or 0
+            key = (row.mlb_id, row.season)
+            if key in best and qualifier <= best[key][1]:
+                continue
+            age = row.season - int(birth_date[:4]) if birth_date and birth_date[:4].isdigit() else None
+            best[key] = (np.array([f(stats) for f in extractors] + [age], dtype=float), qualifier)
+
+        added, replaced = [], 0
+        for key, (vector, qualifier) in best.items():
+            pos = self.positions.get(key)
+            if pos is not None:
+                if qualifier != self.qualifiers[pos] or not np.array_equal(vector, self.raw[pos], equal_nan=True):
+                    self.raw[pos] = vector
+                    self.qualifiers[pos] = qualifier
+                    replaced += 1
+            elif qualifier >= QUALIFY_MIN[self.stat_group]:
+                self.positions[key] = len(self.keys)
+                self.keys.append(key)
+                self.qualifiers.append(qualifier)
+                added.append(vector)
+        if added:
+            self.raw = np.vstack([self.raw, np.array(added)])
+        if added or replaced:
+            self._cache.clear()
+        return len(added) + replaced
+
+    def _normalize(self, age_adjusted: bool) -> np.ndarray:
+        key = ("z", age_adjusted)
+        if key not in self._cache:
+            features = self.raw if age_adjusted else self.raw[:, :-1]
+            mean = np.nanmean(features, axis=0)
+            std = np.nanstd(features, axis=0)
+            std[~(std > 0)] = 1.0
+            z = (features - mean) / std
+            self._cache[key] = np.nan_to_num(z, nan=0.0)  # missing feature == league average
+        return self._cache[key]
+
+    def _whitened(self, age_adjusted: bool) -> np.ndarray:
+        key = ("w", age_adjusted)
+        if key not in self._cache:
+            # whiten with the inverse covariance so correlated stats (OBP/AVG) aren't double counted
+            z = self._normalize(age_adjusted)
+            cov = np.cov(z, rowvar=False) + np.eye(z.shape[1]) * 1e-6
+            self._cache[key] = z @ np.linalg.cholesky(np.linalg.inv(cov))
+        return self._cache[key]
+
+    def _player_ids(self) -> np.ndarray:
+        if "ids" not in self._cache:
+            self._cache["ids"] = np.array([k[0] for k in self.keys])
+        return self._cache["ids"]
+
+    def query(self, mlb_id: int, season: int, k: int = 10, metric: str = "cosine", age_adjusted: bool = False) -> list[dict]:
+        pos = self.positions.get((mlb_id, season))
+        if pos is None:
+            return []
+        if metric == "mahalanobis":
+            w = self._whitened(age_adjusted)
+            dist = np.linalg.norm(w - w[pos], axis=1)
+            score = 1.0 / (1.0 + dist)
+        else:
+            z = self._normalize(age_adjusted)
+            norms = np.linalg.norm(z, axis=1)
+            norms[norms == 0] = 1.0
+            score = (z @ z[pos]) / (norms * norms[pos])
+        own = self._player_ids() == mlb_id
+        score[own] = -np.inf
+        k = min(k, int((~own).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-score, k - 1)[:k]
+        top = top[np.argsort(-score[top])]
+        return [
+            {"mlb_id": self.keys[i][0], "season": self.keys[i][1], "similarity": round(float(score[i]), 4)}
+            for i in top
+        ]
+
+
+_indexes: dict[str, CompsIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(stat_group: str) -> CompsIndex:
+    with _indexes_lock:
+        if stat_group not in _indexes:
+            _indexes[stat_group] = CompsIndex(stat_group)
+        return _indexes[stat_group]
+
+
+class CompsService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_comps(
+        self,
+        mlb_id: int,
+        stat_group: str = "hitting",
+        season: int = None,
+        k: int = 10,
+        metric: str = "cosine",
+        age_adjusted: bool = False,
+    ) -> list[dict]:
+        """Top-k most similar player-seasons to one of this player's seasons (latest by default)."""
+        index = get_index(stat_group)
+        with index.lock:
+            index.update(self.db)
+            if season is None:
+                seasons = [s for (pid, s) in index.positions if pid == mlb_id]
+                if not seasons:
+                    return []
+                season = max(seasons)
+            comps = index.query(mlb_id, season, k, metric, age_adjusted)
+        if not comps:
+            return []
+        names = dict(
+            self.db.query(Player.mlb_id, Player.full_name)
+            .filter(Player.mlb_id.in_([c["mlb_id"] for c in comps]))
+            .all()
+        )
+        for c in comps:
+            c["full_name"] = names.get(c["mlb_id"], "")
+            c["for_season"] = season
+        return comps
@@ -0,0 +1,318 @@
+"""app/services/gamefeed.py - Plate appearances and pitches parsed from MLB live game feeds"""
+import logging
+from array import array
+from sqlalchemy.orm import Session
+from app.core import jsonlib
+from app.db.models import PlateAppearance, Pitch
+from app.services import arsenal, matchups, splits, upstream
+
+logger = logging.getLogger(__name__)
+
+FEED_URL = "https://statsapi.mlb.com/api/v1.1/game/{game_pk}/feed/live"
+# Server-side pruning of the live feed to the fields the parser reads (partial
+# response: a nested field needs its parents listed too). Drops boxscore,
+# rosters, hit data and every non-pitch play event payload.
+FEED_FIELDS = ",".join([
+    "gamePk", "gameData", "status", "abstractGameState", "datetime", "officialDate", "game", "pk", "season",
+    "liveData", "plays", "allPlays",
+    "about", "atBatIndex", "inning", "halfInning", "isComplete",
+    "matchup", "batter", "pitcher", "id", "batSide", "pitchHand", "code",
+    "result", "eventType", "event", "rbi", "count", "balls", "strikes", "outs",
+    "playEvents", "isPitch", "pitchNumber", "details", "type", "description", "isStrike", "isInPlay",
+    "pitchData", "startSpeed", "zone", "coordinates", "pX", "pZ",
+])
+PLAY_PREFIX = "liveData.plays.allPlays.item"
+HEADER_PREFIXES = {
+    "gamePk", "gameData.status.abstractGameState", "gameData.datetime.officialDate",
+    "gameData.game.pk", "gameData.game.season",
+}
+
+TOTAL_BASES = {"single": 1, "double": 2, "triple": 3, "home_run": 4}
+WALK_EVENTS = {"walk", "intent_walk"}
+STRIKEOUT_EVENTS = {"strikeout", "strikeout_double_play", "strikeout_triple_play"}
+SAC_FLY_EVENTS = {"sac_fly", "sac_fly_double_play"}
+# Plate appearances that don't count as at-bats
+NON_AB_EVENTS = WALK_EVENTS | SAC_FLY_EVENTS | {
+    "hit_by_pitch", "sac_bunt", "sac_bunt_double_play", "catcher_interf", "batter_interference",
+}
+# Plays that end on a baserunning event, so the batter's plate appearance never finished
+RUNNER_EVENT_PREFIXES = (
+    "caught_stealing", "pickoff", "stolen_base", "wild_pitch", "passed_ball", "balk",
+    "other_advance", "other_out", "runner_double_play", "game_advisory",
+)
+
+
+INSERT_CHUNK = 2000
+
+
+class PitchColumns:
+    """Pitch rows held column-wise in narrow typed arrays instead of one dict per pitch.
+
+    Integers use the smallest array type that fits (-1 for missing),
+    measurements are float32 (NaN for missing), and strings are stored as
+    uint16 codes into a per-column vocabulary, so a pitch costs about 50 bytes
+    instead of a ~500-byte dict. rows() yields the dicts SQLAlchemy and the
+    cache expect.
+    """
+    TYPECODES = {
+        "game_pk": "i", "at_bat_number": "h", "pitch_number": "h", "season": "h",
+        "pitcher_id": "i", "batter_id": "i",
+        "balls": "b", "strikes": "b", "zone": "b", "is_strike": "b", "is_in_play": "b",
+        "start_speed": "f", "plate_x": "f", "plate_z": "f",
+    }
+    FLOAT_COLUMNS = ("start_speed", "plate_x", "plate_z")
+    STR_COLUMNS = ("game_date", "stand", "p_throws", "pitch_type", "pitch_name", "description")
+    NAMES = tuple(TYPECODES) + STR_COLUMNS
+
+    __slots__ = ("columns", "vocab")
+
+    def __init__(self):
+        self.columns = {c: array(code) for c, code in self.TYPECODES.items()}
+        self.columns.update({c: array("H") for c in self.STR_COLUMNS})
+        # per string column: the values in code order, and value -> code
+        self.vocab = {c: ([], {}) for c in self.STR_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.columns["pitch_number"])
+
+    def _code(self, column: str, value) -> int:
+        values, codes = self.vocab[column]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    def append(self, row: dict):
+        cols = self.columns
+        for c in self.TYPECODES:
+            value = row.get(c)
+            if c in self.FLOAT_COLUMNS:
+                cols[c].append(float("nan") if value is None else float(value))
+            else:
+                cols[c].append(-1 if value is None else int(value))
+        for c in self.STR_COLUMNS:
+            cols[c].append(self._code(c, row.get(c)))
+
+    def extend(self, other: "PitchColumns"):
+        for c in self.TYPECODES:
+            self.columns[c].extend(other.columns[c])
+        for c in self.STR_COLUMNS:
+            remap = [self._code(c, value) for value in other.vocab[c][0]]
+            self.columns[c].extend(remap[code] for code in other.columns[c])
+
+    def rows(self):
+        """One dict per pitch, with missing values back as None."""
+        ints = [(c, self.columns[c]) for c in self.TYPECODES if c not in self.FLOAT_COLUMNS]
+        floats = [(c, self.columns[c]) for c in self.FLOAT_COLUMNS]
+        strs = [(c, self.columns[c], self.vocab[c][0]) for c in self.STR_COLUMNS]
+        for i in range(len(self)):
+            row = {c: (None if values[i] == -1 else values[i]) for c, values in ints}
+            for c, values in floats:
+                value = values[i]
+                row[c] = None if value != value else round(value, 4)
+            for c, values, vocab in strs:
+                row[c] = vocab[values[i]]
+            yield row
+
+
+def _header(final_state: str, game_pk, game_date: str, season) -> dict:
+    game_date = game_date or ""
+    return {
+        "final": final_state == "Final",
+        "game_pk": game_pk,
+        "game_date": game_date,
+        "season": int(season or game_date[:4] or 0) or None,
+    }
+
+
+def _parse_play(play: dict, header: dict, pas: list[dict], pitches: PitchColumns):
+    """Append one play's pitches and, if it finished a plate appearance, the PA row."""
+    game_pk, game_date, season = header["game_pk"], header["game_date"], header["season"]
+    about = play.get("about", {})
+    matchup = play.get("matchup", {})
+    result = play.get("result", {})
+    at_bat_number = about.get("atBatIndex", len(pas)) + 1
+    batter_id = matchup.get("batter", {}).get("id")
+    pitcher_id = matchup.get("pitcher", {}).get("id")
+    stand = matchup.get("batSide", {}).get("code")
+    p_throws = matchup.get("pitchHand", {}).get("code")
+    if not batter_id or not pitcher_id:
+        return
+
+    balls = strikes = 0
+    num_pitches = 0
+    for event in play.get("playEvents", []):
+        if not event.get("isPitch"):
+            continue
+        num_pitches += 1
+        details = event.get("details", {})
+        pd = event.get("pitchData", {})
+        coords = pd.get("coordinates", {})
+        pitches.append({
+            "game_pk": game_pk,
+            "at_bat_number": at_bat_number,
+            "pitch_number": event.get("pitchNumber", num_pitches),
+            "game_date": game_date,
+            "season": season,
+            "pitcher_id": pitcher_id,
+            "batter_id": batter_id,
+            "stand": stand,
+            "p_throws": p_throws,
+            "balls": balls,
+            "strikes": strikes,
+            "pitch_type": details.get("type", {}).get("code"),
+            "pitch_name": details.get("type", {}).get("description", ""),
+            "start_speed": pd.get("startSpeed"),
+            "plate_x": coords.get("pX"),
+            "plate_z": coords.get("pZ"),
+            "zone": pd.get("zone"),
+            "description": details.get("description", ""),
+            "is_strike": int(bool(details.get("isStrike"))),
+            "is_in_play": int(bool(details.get("isInPlay"))),
+        })
+        count = event.get("count", {})
+        balls, strikes = count.get("balls", balls), count.get("strikes", strikes)
+
+    event_type = result.get("eventType") or ""
+    if not about.get("isComplete", header["final"]) or not event_type or event_type.startswith(RUNNER_EVENT_PREFIXES):
+        return
+    pas.append({
+        "game_pk": game_pk,
+        "at_bat_number": at_bat_number,
+        "game_date": game_date,
+        "season": season,
+        "inning": about.get("inning"),
+        "half_inning": about.get("halfInning"),
+        "batter_id": batter_id,
+        "pitcher_id": pitcher_id,
+        "stand": stand,
+        "p_throws": p_throws,
+        "batter_home": "Y" if about.get("halfInning") == "bottom" else "N",
+        "event": result.get("event", ""),
+        "event_type": event_type,
+        "balls": play.get("count", {}).get("balls"),
+        "strikes": play.get("count", {}).get("strikes"),
+        "outs": play.get("count", {}).get("outs"),
+        "rbi": result.get("rbi", 0),
+        "num_pitches": num_pitches,
+        "is_ab": int(event_type not in NON_AB_EVENTS),
+        "is_hit": int(event_type in TOTAL_BASES),
+        "total_bases": TOTAL_BASES.get(event_type, 0),
+        "is_walk": int(event_type in WALK_EVENTS),
+        "is_hbp": int(event_type == "hit_by_pitch"),
+        "is_sf": int(event_type in SAC_FLY_EVENTS),
+        "is_k": int(event_type in STRIKEOUT_EVENTS),
+        "is_hr": int(event_type == "home_run"),
+    })
+
+
+def parse_game_feed(game_data: dict, game_pk: int = None) -> dict:
+    """Split a decoded /game feed into {final, game_pk, game_date, season, plate_appearances, pitches}.
+
+    pitches is a PitchColumns; game_pk fills in for feeds that don't carry one.
+    """
+    game = game_data.get("gameData", {})
+    header = _header(
+        game.get("status", {}).get("abstractGameState"),
+        game_data.get("gamePk") or game.get("game", {}).get("pk") or game_pk,
+        game.get("datetime", {}).get("officialDate"),
+        game.get("game", {}).get("season"),
+    )
+    pas, pitches = [], PitchColumns()
+    for play in game_data.get("liveData", {}).get("plays", {}).get("allPlays", []):
+        _parse_play(play, header, pas, pitches)
+    return {**header, "plate_appearances": pas, "pitches": pitches}
+
+
+def parse_game_stream(fp, game_pk: int = None) -> dict:
+    """parse_game_feed over a binary JSON stream, decoding one play at a time.
+
+    Uses ijson when it is installed, so only a single play is ever held as
+    Python objects; otherwise falls back to decoding the whole (pruned) feed.
+    gameData precedes liveData in the feed, so the header is known before
+    the first play arrives.
+    """
+    try:
+        import ijson
+    except ImportError:
+        return parse_game_feed(jsonlib.loads(fp.read()), game_pk)
+
+    def header_from(raw: dict) -> dict:
+        return _header(
+            raw.get("gameData.status.abstractGameState"),
+            raw.get("gamePk") or raw.get("gameData.game.pk") or game_pk,
+            raw.get("gameData.datetime.officialDate"),
+            raw.get("gameData.game.season"),
+        )
+
+    raw_header = {}
+    header = None
+    pas, pitches = [], PitchColumns()
+    builder = None
+    for prefix, event, value in ijson.parse(fp, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == PLAY_PREFIX and event == "end_map":
+                _parse_play(builder.value, header, pas, pitches)
+                builder = None
+        elif prefix == PLAY_PREFIX and event == "start_map":
+            if header is None:
+                header = header_from(raw_header)
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+        elif prefix in HEADER_PREFIXES and event in ("string", "number"):
+            raw_header[prefix] = value
+    if header is None:
+        header = header_from(raw_header)
+    return {**header, "plate_appearances": pas, "pitches": pitches}
+
+
+def fetch_game_feed(game_pk: int) -> dict:
+    """Fetch and parse one game's live feed, pruned server-side and parsed as it streams in."""
+    return upstream.fetch_parsed(
+        FEED_URL.format(game_pk=game_pk),
+        lambda fp: parse_game_stream(fp, game_pk),
+        params={"fields": FEED_FIELDS},
+        endpoint="game",
+        timeout=30,
+    )
+
+
+class GameFeedStore:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def store(self, parsed: dict) -> int:
+        """Replace a game's plate appearances and add its unstored pitches; returns the PA count.
+
+        Only final games are stored, so every row is immutable once written and
+        re-ingesting a game is idempotent. Pitches are shared with the Statcast
+        importer, so a pitch whose key is already stored keeps that first copy.
+        """
+        game_pk = parsed["game_pk"]
+        if not parsed["final"] or not game_pk:
+            return 0
+        try:
+            self.db.query(PlateAppearance).filter(PlateAppearance.game_pk == game_pk).delete(synchronize_session=False)
+            self.db.bulk_insert_mappings(PlateAppearance, parsed["plate_appearances"])
+            stored = set(
+                self.db.query(Pitch.at_bat_number, Pitch.pitch_number).filter(Pitch.game_pk == game_pk)
+            )
+            rows = []
+            for row in parsed["pitches"].rows():
+                if (row["at_bat_number"], row["pitch_number"]) in stored:
+                    continue
+                rows.append(row)
+                if len(rows) >= INSERT_CHUNK:
+                    self.db.bulk_insert_mappings(Pitch, rows)
+                    rows = []
+            self.db.bulk_insert_mappings(Pitch, rows)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        splits.invalidate(parsed["plate_appearances"])
+        arsenal.invalidate([(pa["pitcher_id"], pa["season"]) for pa in parsed["plate_appearances"]])
+        matchups.invalidate(pa["season"] for pa in parsed["plate_appearances"])
+        return len(parsed["plate_appearances"])
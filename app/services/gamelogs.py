@@ -0,0 +1,194 @@
+"""app/services/gamelogs.py - Stored game logs and rolling-window aggregates"""
+import logging
+from datetime import datetime
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.cache import get_cache
+from app.db.models import GameLog
+from app.services import upstream
+from app.services.statlines import innings_to_float, parse_stat
+
+logger = logging.getLogger(__name__)
+
+# How long a sync is trusted before asking upstream for newer games (seconds)
+TTL_SYNC_CURRENT = 3600
+TTL_SYNC_PAST = 30 * 86400
+
+ROLLING_WINDOWS = (7, 15, 30)
+
+# Counting stats summed over each window, per group
+WINDOW_COUNTS = {
+    "hitting": ("plateAppearances", "atBats", "hits", "doubles", "triples", "homeRuns",
+                "baseOnBalls", "hitByPitch", "sacFlies", "strikeOuts", "rbi", "stolenBases"),
+    "pitching": ("inningsPitched", "battersFaced", "hits", "earnedRuns", "homeRuns",
+                 "baseOnBalls", "strikeOuts"),
+}
+
+
+def _ratio(num: np.ndarray, den: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    out = np.full(num.shape, np.nan)
+    np.divide(num * scale, den, out=out, where=den > 0)
+    return out
+
+
+def window_sums(matrix: np.ndarray, window: int) -> np.ndarray:
+    """Trailing sums over the last `window` rows (fewer at the start), via one cumulative sum."""
+    n = matrix.shape[0]
+    cum = np.vstack([np.zeros((1, matrix.shape[1])), np.cumsum(matrix, axis=0)])
+    end = np.arange(1, n + 1)
+    return cum[end] - cum[np.maximum(end - window, 0)]
+
+
+def window_rates(stat_group: str, sums: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    if stat_group == "pitching":
+        ip = sums["inningsPitched"]
+        return {
+            "ip": ip,
+            "era": _ratio(sums["earnedRuns"], ip, 9),
+            "whip": _ratio(sums["baseOnBalls"] + sums["hits"], ip),
+            "k_per_9": _ratio(sums["strikeOuts"], ip, 9),
+            "bb_per_9": _ratio(sums["baseOnBalls"], ip, 9),
+            "strikeOuts": sums["strikeOuts"],
+        }
+    ab = sums["atBats"]
+    on_base = sums["hits"] + sums["baseOnBalls"] + sums["hitByPitch"]
+    total_bases = sums["hits"] + sums["doubles"] + 2 * sums["triples"] + 3 * sums["homeRuns"]
+    obp = _ratio(on_base, ab + sums["baseOnBalls"] + sums["hitByPitch"] + sums["sacFlies"])
+    slg = _ratio(total_bases, ab)
+    return {
+        "pa": sums["plateAppearances"],
+        "avg": _ratio(sums["hits"], ab),
+        "obp": obp,
+        "slg": slg,
+        "ops": obp + slg,
+        "homeRuns": sums["homeRuns"],
+        "rbi": sums["rbi"],
+        "k_rate": _ratio(sums["strikeOuts"], sums["plateAppearances"]),
+    }
+
+
+def _jsonable(values: np.ndarray) -> list:
+    return [None if np.isnan(v) else round(float(v), 3) for v in values]
+
+
+class GameLogService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _rows(self, mlb_id: int, season: int, stat_group: str) -> list[GameLog]:
+        return (
+            self.db.query(GameLog)
+            .filter(GameLog.mlb_id == mlb_id, GameLog.stat_group == stat_group, GameLog.season == season)
+            .order_by(GameLog.game_date, GameLog.game_pk)
+            .all()
+        )
+
+    def ingest(self, mlb_id: int, season: int, stat_group: str = "hitting") -> int:
+        """Fetch games on or after the last stored date and upsert them; returns rows written.
+
+        The last stored day is re-requested so a doubleheader's second game or
+        a game still in progress at the previous sync is picked up.
+        """
+        last_date = self.db.query(func.max(GameLog.game_date)).filter(
+            GameLog.mlb_id == mlb_id, GameLog.stat_group == stat_group, GameLog.season == season,
+        ).scalar()
+        params = {"stats": "gameLog", "group": stat_group, "season": season, "sportId": 1}
+        if last_date:
+            params["startDate"] = last_date
+            params["endDate"] = f"{season}-12-31"
+        data = upstream.fetch_json(
+            f"{upstream.STATSAPI_BASE}/people/{mlb_id}/stats", params=params, endpoint="game_log"
+        )
+        existing = {}
+        if last_date:
+            existing = {
+                r.game_pk: r for r in self.db.query(GameLog).filter(
+                    GameLog.mlb_id == mlb_id, GameLog.stat_group == stat_group, GameLog.game_date >= last_date,
+                )
+            }
+        written = 0
+        for block in data.get("stats", []):
+            for split in block.get("splits", []):
+                game_pk = split.get("game", {}).get("gamePk")
+                if not game_pk or not split.get("date"):
+                    continue
+                row = existing.get(game_pk)
+                if row is None:
+                    row = GameLog(mlb_id=mlb_id, season=season, stat_group=stat_group, game_pk=game_pk)
+                    self.db.add(row)
+                    existing[game_pk] = row
+                row.game_date = split["date"]
+                row.team = split.get("team", {}).get("name", "")
+                row.opponent = split.get("opponent", {}).get("name", "")
+                row.opponent_id = split.get("opponent", {}).get("id")
+                row.is_home = "Y" if split.get("isHome") else "N"
+                row.stats = split.get("stat", {})
+                written += 1
+        self.db.commit()
+        if written:
+            logger.info(f"Game log {mlb_id} {stat_group} {season}: {written} games upserted")
+        return written
+
+    def ensure_synced(self, mlb_id: int, season: int, stat_group: str = "hitting") -> bool:
+        """Ingest new games unless a recent sync is recorded; returns True if upstream was asked."""
+        cache = get_cache()
+        key = f"game_log_synced:{mlb_id}:{stat_group}:{season}"
+        if cache.get(key):
+            return False
+        try:
+            self.ingest(mlb_id, season, stat_group)
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"Game log sync failed for {mlb_id} {season}: {e}")
+            return False
+        ttl = TTL_SYNC_CURRENT if season >= datetime.utcnow().year else TTL_SYNC_PAST
+        cache.set(key, True, ttl)
+        return True
+
+    def get_game_log(self, mlb_id: int, season: int, stat_group: str = "hitting") -> list[dict]:
+        """Game-by-game lines for a season, oldest first."""
+        self.ensure_synced(mlb_id, season, stat_group)
+        return [
+            {
+                "game_pk": r.game_pk,
+                "game_date": r.game_date,
+                "opponent": r.opponent,
+                "home_away": "H" if r.is_home == "Y" else "A",
+                "team": r.team,
+                "stats": r.stats or {},
+            }
+            for r in self._rows(mlb_id, season, stat_group)
+        ]
+
+    def rolling(self, mlb_id: int, season: int, stat_group: str = "hitting", windows=ROLLING_WINDOWS) -> dict:
+        """Trailing last-N-game aggregates after every game, one cumulative sum per window."""
+        self.ensure_synced(mlb_id, season, stat_group)
+        rows = self._rows(mlb_id, season, stat_group)
+        counts = WINDOW_COUNTS[stat_group]
+        matrix = np.array(
+            [
+                [
+                    (innings_to_float(stats.get(c)) if c == "inningsPitched" else parse_stat(stats.get(c))) or 0.0
+                    for c in counts
+                ]
+                for stats in (r.stats or {} for r in rows)
+            ],
+            dtype=float,
+        ).reshape(len(rows), len(counts))
+
+        result = {
+            "mlb_id": mlb_id,
+            "season": season,
+            "stat_group": stat_group,
+            "games": len(rows),
+            "dates": [r.game_date for r in rows],
+            "windows": {},
+            "latest": {},
+        }
+        for window in windows:
+            sums = window_sums(matrix, window)
+            rates = window_rates(stat_group, {c: sums[:, i] for i, c in enumerate(counts)})
+            result["windows"][str(window)] = {k: _jsonable(v) for k, v in rates.items()}
+            result["latest"][str(window)] = {k: (v[-1] if v else None) for k, v in result["windows"][str(window)].items()}
+        return result
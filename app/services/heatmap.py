@@ -0,0 +1,105 @@
+"""app/services/heatmap.py - Filtering and summarising a pitcher's heatmap pitches"""
+from collections import Counter
+from datetime import date
+
+# Named count states accepted by the count filter, besides an exact "balls-strikes"
+COUNT_STATES = {
+    "ahead": lambda b, s: s > b,          # pitcher ahead
+    "behind": lambda b, s: b > s,
+    "even": lambda b, s: b == s,
+    "two_strikes": lambda b, s: s == 2,
+    "first_pitch": lambda b, s: b == 0 and s == 0,
+}
+
+
+def _count_matches(count: str):
+    if count in COUNT_STATES:
+        return COUNT_STATES[count]
+    balls, _, strikes = count.partition("-")
+    try:
+        want = (int(balls), int(strikes))
+    except ValueError:
+        raise ValueError(f"count must be balls-strikes or one of {', '.join(COUNT_STATES)}")
+    if not (0 <= want[0] <= 3 and 0 <= want[1] <= 2):
+        raise ValueError("count must have 0-3 balls and 0-2 strikes")
+    return lambda b, s: (b, s) == want
+
+
+def _iso_date(value: str, name: str) -> str:
+    """value as a canonical YYYY-MM-DD string, comparable with game_date."""
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date (YYYY-MM-DD)")
+
+
+def make_filter(
+    pitch_type: str = None,
+    batter_hand: str = None,
+    count: str = None,
+    date_from: str = None,
+    date_to: str = None,
+):
+    """Predicate for pitches matching every given filter, or None when nothing is filtered.
+
+    pitch_type matches either the code (FF) or the name; a bad count or date raises ValueError.
+    """
+    if date_from:
+        date_from = _iso_date(date_from, "date_from")
+    if date_to:
+        date_to = _iso_date(date_to, "date_to")
+    if date_from and date_to and date_from > date_to:
+        raise ValueError("date_from must not be after date_to")
+    checks = []
+    if pitch_type:
+        checks.append(lambda p: pitch_type in (p.get("pitch_type"), p.get("pitch_name")))
+    if batter_hand:
+        checks.append(lambda p: p.get("stand") == batter_hand)
+    if count:
+        in_count = _count_matches(count)
+        checks.append(lambda p: p.get("balls") is not None and in_count(p["balls"], p["strikes"]))
+    if date_from:
+        checks.append(lambda p: (p.get("game_date") or "") >= date_from)
+    if date_to:
+        checks.append(lambda p: (p.get("game_date") or "") <= date_to)
+    if not checks:
+        return None
+    return lambda p: all(check(p) for check in checks)
+
+
+def filter_pitches(pitches: list[dict], keep=None) -> list[dict]:
+    """Pitches passing a make_filter predicate (all of them for None)."""
+    if keep is None:
+        return pitches
+    return [p for p in pitches if keep(p)]
+
+
+def summarize(pitches: list[dict]) -> dict:
+    """Pitch mix (share and average velocity per pitch), overall velocity and zone distribution."""
+    total = len(pitches)
+    mix = Counter(p.get("pitch_name") or "Unknown" for p in pitches)
+    speed_sum, speed_n = Counter(), Counter()
+    for p in pitches:
+        if p.get("start_speed") is not None:
+            name = p.get("pitch_name") or "Unknown"
+            speed_sum[name] += p["start_speed"]
+            speed_n[name] += 1
+    zones = Counter(p.get("zone") for p in pitches if p.get("zone") is not None)
+    all_speeds = sum(speed_sum.values())
+    all_n = sum(speed_n.values())
+    return {
+        "pitch_mix": [
+            {
+                "pitch_name": name,
+                "count": n,
+                "pct": round(n / total * 100, 1),
+                "avg_velocity": round(speed_sum[name] / speed_n[name], 1) if speed_n[name] else None,
+            }
+            for name, n in mix.most_common()
+        ],
+        "avg_velocity": round(all_speeds / all_n, 1) if all_n else None,
+        "zones": [
+            {"zone": zone, "count": n, "pct": round(n / total * 100, 1)}
+            for zone, n in sorted(zones.items())
+        ],
+    }
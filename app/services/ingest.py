@@ -0,0 +1,226 @@
+"""app/services/ingest.py - Bulk game-feed ingestion with parsing on a process pool"""
+import contextvars
+import io
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from sqlalchemy.orm import Session
+from app.core.cache import get_cache
+from app.db.models import PlateAppearance
+from app.db.session import new_session
+from app.services import upstream
+from app.services.gamefeed import FEED_FIELDS, FEED_URL, GameFeedStore, parse_game_stream
+
+logger = logging.getLogger(__name__)
+
+FETCH_WORKERS = 8
+# Parser processes for jobs started over HTTP; they share the host with the API workers
+JOB_WORKERS = 2
+PROGRESS_EVERY = 25
+LOOKUP_CHUNK = 500
+
+# Background jobs: status kept in the shared cache so any worker can report it
+JOB_TTL = 7 * 86400
+JOB_LEASE = 6 * 3600
+
+
+def fetch_feed_bytes(game_pk: int) -> bytes:
+    """The pruned live feed for one game, undecoded, ready to ship to a parser process."""
+    return upstream.fetch_parsed(
+        FEED_URL.format(game_pk=game_pk),
+        lambda fp: fp.read(),
+        params={"fields": FEED_FIELDS},
+        endpoint="game",
+        timeout=30,
+    )
+
+
+def parse_feed_bytes(raw: bytes, game_pk: int) -> dict:
+    """Process-pool entry point: parse one feed into columnar results.
+
+    Pitches come back as PitchColumns and plate appearances as {column: values},
+    so only flat arrays and lists cross the process boundary.
+    """
+    parsed = parse_game_stream(io.BytesIO(raw), game_pk)
+    pas = parsed["plate_appearances"]
+    parsed["plate_appearances"] = {c: [pa[c] for pa in pas] for c in (pas[0] if pas else ())}
+    return parsed
+
+
+def _pa_rows(columns: dict) -> list[dict]:
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+class FeedIngestor:
+    """Fetch game feeds on threads, parse them on a process pool, store them from this process.
+
+    Network waits overlap on the fetch threads, the CPU-bound JSON decoding
+    and play walking scales across cores, and database writes stay on the
+    caller's session. workers=1 parses inline.
+
+    At most max_in_flight games are between fetch and store at once (by
+    default enough to keep every fetcher busy plus two feeds per parser), so
+    raw feeds can't pile up in memory when parsing falls behind fetching.
+    """
+
+    def __init__(
+        self, db: Session, workers: int = None, fetchers: int = FETCH_WORKERS, progress=None, max_in_flight: int = None
+    ):
+        self.db = db
+        self.workers = workers or os.cpu_count() or 1
+        self.fetchers = fetchers
+        self.progress = progress
+        self.max_in_flight = max_in_flight or fetchers + 2 * self.workers
+
+    def season_game_pks(self, season: int, start_date: str = None, end_date: str = None) -> list[int]:
+        """Every completed regular-season game in the date range."""
+        sched = upstream.fetch_json(
+            f"{upstream.STATSAPI_BASE}/schedule",
+            params={
+                "sportId": 1,
+                "gameType": "R",
+                "startDate": start_date or f"{season}-03-01",
+                "endDate": end_date or f"{season}-11-30",
+            },
+            endpoint="schedule",
+            timeout=30,
+        )
+        return list(dict.fromkeys(
+            game["gamePk"]
+            for date in sched.get("dates", [])
+            for game in date.get("games", [])
+            if game.get("status", {}).get("abstractGameState") == "Final"
+        ))
+
+    def pending(self, game_pks: list[int]) -> list[int]:
+        """Games whose plate appearances aren't stored yet."""
+        stored = set()
+        for i in range(0, len(game_pks), LOOKUP_CHUNK):
+            chunk = game_pks[i:i + LOOKUP_CHUNK]
+            stored.update(
+                gp for (gp,) in self.db.query(PlateAppearance.game_pk)
+                .filter(PlateAppearance.game_pk.in_(chunk))
+                .distinct()
+            )
+        return [gp for gp in game_pks if gp not in stored]
+
+    def _store(self, parsed: dict, stats: dict):
+        parsed["plate_appearances"] = _pa_rows(parsed["plate_appearances"])
+        try:
+            GameFeedStore(self.db).store(parsed)
+        except Exception as e:
+            logger.warning(f"Storing game {parsed['game_pk']} failed: {e}")
+            stats["failed"] += 1
+            return
+        stats["stored"] += 1
+        stats["plate_appearances"] += len(parsed["plate_appearances"])
+        stats["pitches"] += len(parsed["pitches"])
+
+    def run(self, game_pks: list[int]) -> dict:
+        """Ingest the given games; returns counts and elapsed seconds."""
+        start = time.perf_counter()
+        stats = {"games": len(game_pks), "stored": 0, "failed": 0, "plate_appearances": 0, "pitches": 0}
+        if not game_pks:
+            return {**stats, "seconds": 0.0}
+
+        parse_pool = None
+        if self.workers > 1:
+            # spawn: never fork a process that is running fetch threads and holds DB connections
+            parse_pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            with ThreadPoolExecutor(self.fetchers, thread_name_prefix="feed-fetch") as fetch_pool:
+                queue = iter(game_pks)
+                jobs, pending = {}, set()
+
+                def admit(n: int):
+                    # a game holds its slot from fetch until it is stored or has failed; fetches
+                    # run in a copy of the caller's context so upstream.background() still applies
+                    for gp in itertools.islice(queue, n):
+                        future = fetch_pool.submit(contextvars.copy_context().run, fetch_feed_bytes, gp)
+                        jobs[future] = ("fetch", gp)
+                        pending.add(future)
+
+                admit(self.max_in_flight)
+                done_games = 0
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage, gp = jobs.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            logger.warning(f"Game {gp} {stage} failed: {e}")
+                            stats["failed"] += 1
+                        else:
+                            if stage == "fetch" and parse_pool is not None:
+                                parse_future = parse_pool.submit(parse_feed_bytes, result, gp)
+                                jobs[parse_future] = ("parse", gp)
+                                pending.add(parse_future)
+                                continue
+                            parsed = result if stage == "parse" else parse_feed_bytes(result, gp)
+                            self._store(parsed, stats)
+                        done_games += 1
+                        admit(1)
+                        if self.progress and done_games % PROGRESS_EVERY == 0:
+                            self.progress(dict(stats))
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown(cancel_futures=True)
+        stats["seconds"] = round(time.perf_counter() - start, 1)
+        logger.info(
+            f"Ingested {stats['stored']}/{stats['games']} games "
+            f"({stats['pitches']} pitches, {stats['failed']} failed) in {stats['seconds']}s"
+        )
+        return stats
+
+
+def _job_key(job_id: str) -> str:
+    return f"ingest_job:{job_id}"
+
+
+def _set_status(job_id: str, status: dict):
+    get_cache().set(_job_key(job_id), status, JOB_TTL)
+
+
+def job_status(job_id: str) -> dict | None:
+    return get_cache().get(_job_key(job_id))
+
+
+def _run_job(job_id: str, base: dict, workers: int, limit: int):
+    lease = f"ingest_feeds:{base['season']}"
+    db = new_session()
+    try:
+        with upstream.background():
+            ingestor = FeedIngestor(
+                db, workers or min(JOB_WORKERS, os.cpu_count() or 1), progress=lambda stats: _set_status(job_id, {**base, "state": "running", **stats})
+            )
+            game_pks = ingestor.pending(ingestor.season_game_pks(base["season"]))
+            if limit:
+                game_pks = game_pks[:limit]
+            _set_status(job_id, {**base, "state": "running", "games": len(game_pks)})
+            stats = ingestor.run(game_pks)
+        _set_status(job_id, {**base, "state": "done", **stats})
+    except Exception as e:
+        logger.error(f"Ingest job {job_id} failed: {e}")
+        _set_status(job_id, {**base, "state": "failed", "error": str(e)})
+    finally:
+        db.close()
+        get_cache().release_lease(lease)
+
+
+def start_job(season: int, workers: int = None, limit: int = None) -> str | None:
+    """Ingest a season's unstored games on a background thread; None if one is already running."""
+    if not get_cache().try_lease(f"ingest_feeds:{season}", JOB_LEASE):
+        return None
+    job_id = uuid.uuid4().hex[:12]
+    base = {"job_id": job_id, "season": season, "started_at": time.time()}
+    _set_status(job_id, {**base, "state": "queued"})
+    threading.Thread(
+        target=_run_job, args=(job_id, base, workers, limit), name=f"ingest-{job_id}", daemon=True
+    ).start()
+    return job_id
@@ -0,0 +1,264 @@
+"""app/services/leaders.py - Precomputed season leaderboards"""
+import logging
+import threading
+from functools import lru_cache
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.cache import get_cache
+from app.db.models import LeaderboardEntry, LeaderboardState, Player, PlayerSeason
+from app.db.session import new_session
+from app.services.mlb import STAT_FIELDS_HITTING, STAT_FIELDS_PITCHING
+from app.services.statlines import (
+    RATE_COLUMNS, TYPED_COLUMNS_HITTING, TYPED_COLUMNS_PITCHING, innings_to_float, parse_stat,
+)
+
+logger = logging.getLogger(__name__)
+
+# Stats where a smaller number ranks higher
+LOWER_IS_BETTER = {
+    "hitting": {"caughtStealing", "strikeOuts", "groundIntoDoublePlay", "leftOnBase"},
+    "pitching": {
+        "era", "whip", "walksPer9Inn", "hitsPer9Inn", "avg", "obp", "slg", "ops",
+        "losses", "hits", "runs", "earnedRuns", "homeRuns", "walks", "blownSaves", "balls",
+    },
+}
+
+QUALIFIER_STAT = {"hitting": "plateAppearances", "pitching": "inningsPitched"}
+QUALIFIER_COLUMN = {"hitting": "plate_appearances", "pitching": "innings_pitched"}
+
+# Minimum PA / IP for a player-season to qualify: percentile reference population,
+# comps candidates, and the default floor on rate-stat leaderboards
+QUALIFY_MIN = {"hitting": 100, "pitching": 20}
+
+# Longest a background rebuild may hold its lease before another worker may retry
+REFRESH_LEASE = 600
+
+
+def stat_fields(stat_group: str) -> list[str]:
+    return STAT_FIELDS_PITCHING if stat_group == "pitching" else STAT_FIELDS_HITTING
+
+
+def stat_value(stat: str, stats: dict) -> float | None:
+    value = stats.get(stat)
+    return innings_to_float(value) if stat == "inningsPitched" else parse_stat(value)
+
+
+@lru_cache
+def typed_stats(stat_group: str) -> dict[str, str]:
+    """API stat name -> typed PlayerSeason column, for the group's stats that have one."""
+    mapping = TYPED_COLUMNS_PITCHING if stat_group == "pitching" else TYPED_COLUMNS_HITTING
+    fields = set(stat_fields(stat_group))
+    return {stat: column for stat, column in mapping.items() if stat in fields}
+
+
+def rate_stats(stat_group: str) -> set[str]:
+    """Stats that only mean something over a qualifying sample (AVG, ERA, K/9...)."""
+    return {
+        stat for stat, column in typed_stats(stat_group).items()
+        if column in RATE_COLUMNS and column != QUALIFIER_COLUMN[stat_group]
+    }
+
+
+def line_value(row: PlayerSeason, stat: str, stat_group: str) -> float | None:
+    """A stat from its typed column, falling back to the JSON blob for stats without one."""
+    column = typed_stats(stat_group).get(stat)
+    if column is not None:
+        value = getattr(row, column)
+        return None if value is None else float(value)
+    return stat_value(stat, row.stats or {})
+
+
+def season_lines(db: Session, season: int, stat_group: str) -> list[tuple]:
+    """One (PlayerSeason, full_name, qualifier) per player for a season.
+
+    A traded player has a row per team plus possibly a combined row; the row
+    with the most PA/IP is the season total.
+    """
+    rows = (
+        db.query(PlayerSeason, Player.full_name)
+        .outerjoin(Player, Player.mlb_id == PlayerSeason.mlb_id)
+        .filter(PlayerSeason.season == season, PlayerSeason.stat_group == stat_group)
+        .all()
+    )
+    best = {}
+    for row, full_name in rows:
+        qualifier = getattr(row, QUALIFIER_COLUMN[stat_group]) or 0
+        current = best.get(row.mlb_id)
+        if current is None or qualifier > current[2]:
+            best[row.mlb_id] = (row, full_name, qualifier)
+    return list(best.values())
+
+
+class LeaderboardService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _source_snapshot(self, season: int, stat_group: str) -> tuple:
+        """(rows, max id, last update) of a partition; in-place re-ingests move the last one."""
+        count, max_id, updated_at = self.db.query(
+            func.count(PlayerSeason.id), func.max(PlayerSeason.id), func.max(PlayerSeason.updated_at)
+        ).filter(
+            PlayerSeason.season == season,
+            PlayerSeason.stat_group == stat_group,
+        ).one()
+        return count or 0, max_id or 0, updated_at
+
+    def _stale_snapshot(self, season: int, stat_group: str) -> tuple | None:
+        """The partition's current snapshot if the stored rankings weren't built from it, else None."""
+        snapshot = self._source_snapshot(season, stat_group)
+        state = self.db.query(LeaderboardState).filter(
+            LeaderboardState.season == season,
+            LeaderboardState.stat_group == stat_group,
+        ).first()
+        if state and (state.source_rows, state.source_max_id, state.source_updated_at) == snapshot:
+            return None
+        return snapshot
+
+    def ensure_fresh(self, season: int, stat_group: str) -> bool:
+        """Rebuild a season's rankings only if its sr_player_seasons partition has changed."""
+        snapshot = self._stale_snapshot(season, stat_group)
+        if snapshot is None:
+            return False
+        self.refresh(season, stat_group, snapshot)
+        return True
+
+    def refresh(self, season: int, stat_group: str, snapshot: tuple = None):
+        """Recompute every stat's ranking for one (season, stat_group) partition.
+
+        Values come from the typed columns (the JSON blob only for stats without
+        one). Rate stats rank qualified players first, so a 1-for-1 hitter can't
+        take the top of AVG; the rest follow in value order.
+        """
+        source_rows, source_max_id, source_updated_at = snapshot or self._source_snapshot(season, stat_group)
+        lines = season_lines(self.db, season, stat_group)
+
+        entries = []
+        lower = LOWER_IS_BETTER.get(stat_group, set())
+        rates = rate_stats(stat_group)
+        floor = QUALIFY_MIN[stat_group]
+        for stat in stat_fields(stat_group):
+            values = []
+            for row, full_name, qualifier in lines:
+                value = line_value(row, stat, stat_group)
+                if value is not None:
+                    values.append((value, row, full_name, qualifier))
+            sign = 1 if stat in lower else -1
+            if stat in rates:
+                values.sort(key=lambda v: (v[3] < floor, sign * v[0]))
+            else:
+                values.sort(key=lambda v: sign * v[0])
+            for rank, (value, row, full_name, qualifier) in enumerate(values, start=1):
+                entries.append({
+                    "season": season,
+                    "stat_group": stat_group,
+                    "stat": stat,
+                    "rank": rank,
+                    "mlb_id": row.mlb_id,
+                    "full_name": full_name,
+                    "team": row.team,
+                    "value": value,
+                    "qualifier": qualifier,
+                })
+
+        try:
+            self.db.query(LeaderboardEntry).filter(
+                LeaderboardEntry.season == season,
+                LeaderboardEntry.stat_group == stat_group,
+            ).delete(synchronize_session=False)
+            self.db.bulk_insert_mappings(LeaderboardEntry, entries)
+            state = self.db.query(LeaderboardState).filter(
+                LeaderboardState.season == season,
+                LeaderboardState.stat_group == stat_group,
+            ).first()
+            if state is None:
+                state = LeaderboardState(season=season, stat_group=stat_group)
+                self.db.add(state)
+            state.source_rows = source_rows
+            state.source_max_id = source_max_id
+            state.source_updated_at = source_updated_at
+            state.built_at = datetime.utcnow()
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        logger.info(f"Leaderboard {season} {stat_group}: {len(lines)} players, {len(entries)} entries")
+
+        # Percentiles are derived from the same partition, so they go stale together
+        from app.services.percentiles import PercentileService
+        PercentileService(self.db).rebuild(season, stat_group, lines)
+
+    def get_leaders(
+        self,
+        season: int,
+        stat: str,
+        stat_group: str = "hitting",
+        min_qualifier: float = None,
+        team: str = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> dict:
+        """Read a page of a precomputed leaderboard.
+
+        Never rebuilds inline: if the partition changed since the last build,
+        the current rankings are served with stale=True while one background
+        rebuild runs. Rate stats default to the QUALIFY_MIN floor; pass
+        min_qualifier=0 to list everyone.
+        """
+        if min_qualifier is None and stat in rate_stats(stat_group):
+            min_qualifier = QUALIFY_MIN[stat_group]
+        stale = self._stale_snapshot(season, stat_group) is not None
+        if stale:
+            refresh_in_background(season, stat_group)
+        query = self.db.query(LeaderboardEntry).filter(
+            LeaderboardEntry.season == season,
+            LeaderboardEntry.stat_group == stat_group,
+            LeaderboardEntry.stat == stat,
+        )
+        if team:
+            query = query.filter(LeaderboardEntry.team == team)
+        if min_qualifier:
+            query = query.filter(LeaderboardEntry.qualifier >= min_qualifier)
+        total = query.count()
+        page = query.order_by(LeaderboardEntry.rank).offset(offset).limit(limit).all()
+        return {
+            "season": season,
+            "stat_group": stat_group,
+            "stat": stat,
+            "total": total,
+            "min_qualifier": min_qualifier,
+            "stale": stale,
+            "leaders": [
+                {
+                    # rank within the filtered list; ties keep stored order
+                    "rank": offset + i + 1,
+                    "overall_rank": e.rank,
+                    "mlb_id": e.mlb_id,
+                    "full_name": e.full_name,
+                    "team": e.team,
+                    "value": e.value,
+                    "qualifier": e.qualifier,
+                }
+                for i, e in enumerate(page)
+            ],
+        }
+
+
+def refresh_in_background(season: int, stat_group: str) -> bool:
+    """Rebuild one partition on a background thread; False if any worker already holds its lease."""
+    lease = f"leaders_refresh:{season}:{stat_group}"
+    if not get_cache().try_lease(lease, REFRESH_LEASE):
+        return False
+
+    def run():
+        db = new_session()
+        try:
+            LeaderboardService(db).ensure_fresh(season, stat_group)
+        except Exception as e:
+            logger.error(f"Leaderboard refresh {season} {stat_group} failed: {e}")
+        finally:
+            db.close()
+            get_cache().release_lease(lease)
+
+    threading.Thread(target=run, name=f"leaders-{season}-{stat_group}", daemon=True).start()
+    return True
@@ -0,0 +1,355 @@
+"""app/services/llm.py - Single gateway for Claude calls: concurrency cap, retries, prompt caching"""
+import atexit
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
+from app.core import metrics
+from app.core.cache import get_cache
+from app.core.config import get_settings
+from app.db.models import LLMCall
+from app.db.session import new_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "claude-opus-4-6"
+RETRY_STATUSES = (408, 409, 429, 500, 502, 503, 504, 529)  # 529 == overloaded
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+# sr_llm_calls rows are written in batches of up to this many, at least this often
+CALL_FLUSH_ROWS = 50
+CALL_FLUSH_SECONDS = 2.0
+# Shortest prefix the current Opus and Haiku models will cache (older models: 1024-2048)
+CACHE_MIN_TOKENS = 4096
+
+
+class LLMBusy(Exception):
+    """No slot became free within LLM_QUEUE_TIMEOUT."""
+
+
+@lru_cache
+def get_client():
+    # anthropic is a heavy import; only pay for it once a Claude call is actually made
+    from anthropic import Anthropic
+    api_key = get_settings().ANTHROPIC_API_KEY
+    if not api_key:
+        raise RuntimeError("ANTHROPIC_API_KEY is not configured")
+    # retries are handled here so they share the concurrency slot and the backoff policy
+    return Anthropic(api_key=api_key, max_retries=0)
+
+
+class FairGate:
+    """Counting semaphore that admits waiters strictly in arrival order.
+
+    threading.Semaphore wakes an arbitrary waiter, so under load one caller
+    can be starved indefinitely; here each waiter takes a ticket and only the
+    head of the queue may claim a free slot.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float = None) -> bool:
+        ticket = object()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while self._queue[0] is not ticket or self.in_flight >= self.limit:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+                return True
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._queue)
+
+
+@lru_cache
+def get_gate() -> FairGate:
+    return FairGate(get_settings().LLM_MAX_CONCURRENCY)
+
+
+def _retry_delay(exc, attempt: int) -> float | None:
+    """Seconds to wait before retrying exc, or None if it isn't transient."""
+    import anthropic
+    if isinstance(exc, (anthropic.APIConnectionError, anthropic.APITimeoutError)):
+        retry_after = None
+    elif isinstance(exc, anthropic.APIStatusError) and exc.status_code in RETRY_STATUSES:
+        try:
+            retry_after = float(exc.response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = None
+    else:
+        return None
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX)
+    # exponential backoff with full jitter so queued callers don't retry in lockstep
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class CallLog:
+    """Buffers sr_llm_calls rows and writes them in batches from one background thread.
+
+    Recording a call (including every response-cache hit) only appends to a
+    list; a batch is written with a single session every CALL_FLUSH_SECONDS
+    or once CALL_FLUSH_ROWS are waiting, and whatever is left at exit.
+    """
+
+    def __init__(self):
+        self._rows: list[dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, row: dict):
+        with self._lock:
+            self._rows.append(row)
+            full = len(self._rows) >= CALL_FLUSH_ROWS
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="llm-call-log", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write every buffered row; returns once they are committed (or dropped with a warning)."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+            try:
+                db = new_session()
+            except Exception as e:
+                logger.warning(f"LLM call accounting unavailable, dropped {len(rows)} rows: {e}")
+                return 0
+            try:
+                db.bulk_insert_mappings(LLMCall, rows)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Could not record {len(rows)} LLM calls: {e}")
+                return 0
+            finally:
+                db.close()
+            return len(rows)
+
+    def _run(self):
+        while True:
+            self._wake.wait(CALL_FLUSH_SECONDS)
+            self._wake.clear()
+            self.flush()
+
+
+@lru_cache
+def get_call_log() -> CallLog:
+    return CallLog()
+
+
+def flush_calls() -> int:
+    """Write buffered sr_llm_calls rows now, e.g. before reporting over the table."""
+    return get_call_log().flush()
+
+
+def record_call(
+    feature: str,
+    model: str,
+    usage=None,
+    seconds: float = None,
+    status: str = "ok",
+    cache_hit: bool = False,
+    mlb_id: int = None,
+):
+    """Queue a row for sr_llm_calls; written in batches, so callers' sessions are untouched."""
+    get_call_log().add({
+        "created_at": datetime.utcnow(),
+        "feature": feature,
+        "endpoint": metrics.current_route(),
+        "mlb_id": mlb_id,
+        "model": model,
+        "status": status,
+        "cache_hit": "Y" if cache_hit else "N",
+        "input_tokens": getattr(usage, "input_tokens", None) or 0,
+        "output_tokens": getattr(usage, "output_tokens", None) or 0,
+        "cache_read_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+        "cache_write_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+        "latency_ms": seconds * 1000 if seconds is not None else None,
+    })
+
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token count for English prose (real tokenizers give more, not fewer)."""
+    return len(text) // 4
+
+
+def cached_system(prefix: str, instructions: str = None) -> list[dict]:
+    """System blocks: a stable prefix marked for prompt caching, then uncached instructions.
+
+    Only prefixes of at least CACHE_MIN_TOKENS are cached, so a shorter one
+    is logged; keep the per-call data in the user turn.
+    """
+    if estimate_tokens(prefix) < CACHE_MIN_TOKENS:
+        logger.warning(f"Cached system prefix is ~{estimate_tokens(prefix)} tokens, below the {CACHE_MIN_TOKENS} minimum")
+    blocks = [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}]
+    if instructions:
+        blocks.append({"type": "text", "text": instructions})
+    return blocks
+
+
+def complete(
+    feature: str,
+    prompt: str,
+    system: str | list = None,
+    model: str = DEFAULT_MODEL,
+    max_tokens: int = 1000,
+    mlb_id: int = None,
+) -> str:
+    """Send one user prompt through the gateway and return the text reply.
+
+    Waits in FIFO order for one of LLM_MAX_CONCURRENCY slots; transient
+    errors (429, 5xx, overloaded, connection drops) are retried with
+    jittered exponential backoff while keeping the slot. Every call is
+    recorded in sr_llm_calls.
+    """
+    settings = get_settings()
+    gate = get_gate()
+    queued = time.perf_counter()
+    if not gate.acquire(settings.LLM_QUEUE_TIMEOUT):
+        record_call(feature, model, status="busy", mlb_id=mlb_id)
+        raise LLMBusy(f"{feature}: no LLM slot within {settings.LLM_QUEUE_TIMEOUT:.0f}s ({gate.waiting} waiting)")
+    metrics.llm_queue_wait.observe(time.perf_counter() - queued, feature)
+    try:
+        kwargs = dict(model=model, max_tokens=max_tokens, messages=[{"role": "user", "content": prompt}])
+        if system:
+            kwargs["system"] = system
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                response = get_client().messages.create(**kwargs)
+            except Exception as e:
+                delay = _retry_delay(e, attempt)
+                if delay is None or attempt == settings.LLM_MAX_RETRIES:
+                    record_call(feature, model, seconds=time.perf_counter() - start, status="error", mlb_id=mlb_id)
+                    raise
+                metrics.llm_retries.inc(feature)
+                logger.warning(f"LLM {feature} attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            elapsed = time.perf_counter() - start
+            metrics.record_llm_usage(feature, model, elapsed, response.usage)
+            record_call(feature, model, response.usage, elapsed, mlb_id=mlb_id)
+            return response.content[0].text
+    finally:
+        gate.release()
+
+
+def cached_complete(key: str, ttl: float, feature: str, prompt: str, mlb_id: int = None, **kwargs) -> str:
+    """complete(), memoised in the shared cache; hits are recorded in sr_llm_calls too."""
+    cache = get_cache()
+    text = cache.get(key)
+    metrics.record_cache(feature, text is not None)
+    if text is not None:
+        record_call(feature, kwargs.get("model", DEFAULT_MODEL), cache_hit=True, mlb_id=mlb_id)
+        return text
+    text = complete(feature, prompt, mlb_id=mlb_id, **kwargs)
+    cache.set(key, text, ttl)
+    return text
+
+
+class AnthropicBatches:
+    """Message Batches API: asynchronous, billed at a discount, results within 24h."""
+
+    def __init__(self):
+        self.client = get_client()
+
+    def create(self, requests: list[dict]):
+        return self.client.messages.batches.create(requests=requests)
+
+    def retrieve(self, batch_id: str):
+        return self.client.messages.batches.retrieve(batch_id)
+
+    def results(self, batch_id: str):
+        return self.client.messages.batches.results(batch_id)
+
+
+class LocalBatches:
+    """Offline stand-in for AnthropicBatches with the same result shapes.
+
+    respond(custom_id, params) supplies each reply's text; by default a short
+    placeholder, so pregeneration can be exercised without an API key.
+    """
+
+    def __init__(self, respond=None):
+        self.respond = respond or (lambda custom_id, params: f"## Overview\nPlaceholder report for {custom_id}.")
+        self._batches: dict[str, list[dict]] = {}
+
+    def create(self, requests: list[dict]):
+        batch_id = f"local_{len(self._batches) + 1}"
+        self._batches[batch_id] = requests
+        return self.retrieve(batch_id)
+
+    def retrieve(self, batch_id: str):
+        return SimpleNamespace(
+            id=batch_id,
+            processing_status="ended",
+            request_counts=SimpleNamespace(processing=0, succeeded=len(self._batches[batch_id]), errored=0),
+        )
+
+    def results(self, batch_id: str):
+        for req in self._batches[batch_id]:
+            text = self.respond(req["custom_id"], req["params"])
+            usage = SimpleNamespace(input_tokens=0, output_tokens=len(text.split()))
+            message = SimpleNamespace(content=[SimpleNamespace(text=text)], usage=usage)
+            yield SimpleNamespace(custom_id=req["custom_id"], result=SimpleNamespace(type="succeeded", message=message))
+
+
+def run_batch(backend, requests: list[dict], feature: str, poll_interval: float = 30.0, timeout: float = 24 * 3600) -> dict[str, str]:
+    """Submit requests ({custom_id, params}) as one batch, wait for it to end, return {custom_id: text}.
+
+    Failed, expired and cancelled entries are logged and left out.
+    """
+    batch = backend.create(requests)
+    logger.info(f"Submitted batch {batch.id} with {len(requests)} {feature} requests")
+    deadline = time.monotonic() + timeout
+    while batch.processing_status != "ended":
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"batch {batch.id} still {batch.processing_status} after {timeout:.0f}s")
+        time.sleep(poll_interval)
+        batch = backend.retrieve(batch.id)
+        logger.info(f"Batch {batch.id}: {batch.processing_status}, {batch.request_counts.processing} processing")
+
+    models = {r["custom_id"]: r["params"].get("model", DEFAULT_MODEL) for r in requests}
+    texts = {}
+    for entry in backend.results(batch.id):
+        model = models.get(entry.custom_id, DEFAULT_MODEL)
+        mlb_id = int(entry.custom_id.split("-")[0]) if entry.custom_id.split("-")[0].isdigit() else None
+        if entry.result.type != "succeeded":
+            logger.warning(f"Batch {batch.id} entry {entry.custom_id}: {entry.result.type}")
+            record_call(feature, model, status=entry.result.type, mlb_id=mlb_id)
+            continue
+        message = entry.result.message
+        metrics.record_llm_tokens(feature, model, message.usage)
+        record_call(feature, model, message.usage, mlb_id=mlb_id)
+        texts[entry.custom_id] = message.content[0].text
+    return texts
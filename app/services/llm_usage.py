@@ -0,0 +1,49 @@
+"""app/services/llm_usage.py - Reporting over the sr_llm_calls accounting table"""
+from datetime import datetime, timedelta
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from app.db.models import LLMCall
+from app.services import llm
+
+
+class LLMUsageService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def daily_summary(self, days: int = 30, feature: str = None) -> list[dict]:
+        """Calls, cache hits, errors, tokens and latency per (day, feature), newest day first."""
+        llm.flush_calls()
+        day = func.date(LLMCall.created_at)
+        query = self.db.query(
+            day.label("day"),
+            LLMCall.feature,
+            func.count(LLMCall.id),
+            func.sum(case((LLMCall.cache_hit == "Y", 1), else_=0)),
+            func.sum(case((LLMCall.status != "ok", 1), else_=0)),
+            func.sum(LLMCall.input_tokens),
+            func.sum(LLMCall.output_tokens),
+            func.sum(LLMCall.cache_read_tokens),
+            func.sum(LLMCall.cache_write_tokens),
+            func.avg(LLMCall.latency_ms),
+            func.max(LLMCall.latency_ms),
+        ).filter(LLMCall.created_at >= datetime.utcnow() - timedelta(days=days))
+        if feature:
+            query = query.filter(LLMCall.feature == feature)
+        rows = query.group_by(day, LLMCall.feature).order_by(day.desc(), LLMCall.feature).all()
+        results = []
+        for d, feat, calls, hits, errors, tin, tout, tread, twrite, avg_ms, max_ms in rows:
+            results.append({
+                "day": str(d),
+                "feature": feat,
+                "calls": calls,
+                "cache_hits": int(hits or 0),
+                "cache_hit_rate": round((hits or 0) / calls, 3) if calls else 0.0,
+                "errors": int(errors or 0),
+                "input_tokens": int(tin or 0),
+                "output_tokens": int(tout or 0),
+                "cache_read_tokens": int(tread or 0),
+                "cache_write_tokens": int(twrite or 0),
+                "avg_latency_ms": round(avg_ms, 1) if avg_ms is not None else None,
+                "max_latency_ms": round(max_ms, 1) if max_ms is not None else None,
+            })
+        return results
@@ -0,0 +1,260 @@
+"""app/services/matchups.py - Per-PA outcome probabilities for batter vs. pitcher matchups
+
+Each side's season rates are regressed toward the league, their platoon
+splits toward those (scaled by the league's platoon effect), and the two
+are combined with the multinomial log5 / odds-ratio method against the
+league rates for the same handedness matchup. Every step is an array
+operation over all requested matchups at once.
+"""
+import logging
+import numpy as np
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+from app.core.cache import get_cache
+from app.db.models import PlateAppearance, Player
+
+logger = logging.getLogger(__name__)
+
+# Rebuilt on demand and dropped whenever plate appearances for the season are stored
+TTL_COUNTS = 86400
+
+OUTCOMES = ("k", "bb", "hbp", "single", "double", "triple", "hr", "out")
+HANDS = ("L", "R")
+# PA of regression toward the prior per outcome, roughly where each rate stabilizes
+SHRINK_PA = np.array([60, 120, 240, 290, 1600, 1600, 170, 300], dtype=float)
+# Platoon splits are noisier than overall rates, so they regress harder
+PLATOON_SHRINK = 2.0
+
+
+def cache_key(season: int) -> str:
+    return f"matchup_counts:{season}"
+
+
+def invalidate(seasons):
+    cache = get_cache()
+    for season in set(seasons):
+        cache.delete(cache_key(season))
+
+
+def _outcome_sums() -> list:
+    """SQL aggregates in OUTCOMES order, except "out" (whatever PA is left over)."""
+    pa = PlateAppearance
+    hit = pa.is_hit == 1
+
+    def hits_with(bases: int):
+        return func.sum(case((and_(hit, pa.is_hr == 0, pa.total_bases == bases), 1), else_=0))
+
+    return [
+        func.sum(pa.is_k),
+        func.sum(pa.is_walk),
+        func.sum(pa.is_hbp),
+        hits_with(1),
+        hits_with(2),
+        hits_with(3),
+        func.sum(pa.is_hr),
+    ]
+
+
+def _counts(rows, n_outcomes: int = len(OUTCOMES)) -> tuple[list, np.ndarray]:
+    """Split (keys..., pa, outcome sums...) rows into keys and a (rows, OUTCOMES) count matrix."""
+    keys, counts = [], np.zeros((len(rows), n_outcomes))
+    for i, row in enumerate(rows):
+        n_keys = len(row) - n_outcomes
+        keys.append(tuple(row[:n_keys]))
+        pa, sums = row[n_keys], np.array([v or 0 for v in row[n_keys + 1:]], dtype=float)
+        counts[i, :-1] = sums
+        counts[i, -1] = max(pa - sums.sum(), 0)
+    return keys, counts
+
+
+def _select(ids: list[int], counts: np.ndarray, wanted: list[int]) -> np.ndarray:
+    """Rows of counts for wanted ids, in order; players with no stored PAs get zeros."""
+    index = {mlb_id: i for i, mlb_id in enumerate(ids)}
+    rows = np.array([index.get(mlb_id, -1) for mlb_id in wanted], dtype=int)
+    padded = np.concatenate([counts, np.zeros((1,) + counts.shape[1:])])  # row -1 is all zeros
+    return padded[rows]
+
+
+def _rates(counts: np.ndarray) -> np.ndarray:
+    total = counts.sum(axis=-1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, counts / total, np.nan)
+
+
+def _or_league(rates: np.ndarray, league: np.ndarray) -> np.ndarray:
+    return np.where(np.isnan(rates), league, rates)
+
+
+def _platoon_effect(split: np.ndarray, overall: np.ndarray) -> np.ndarray:
+    """League split rate over overall rate per outcome; 1 where the league has none."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(overall > 0, split / overall, 1.0)
+
+
+def shrink(counts: np.ndarray, prior: np.ndarray, k: np.ndarray) -> np.ndarray:
+    """(counts + k * prior) / (pa + k) per outcome, renormalized to sum to 1."""
+    pa = counts.sum(axis=-1, keepdims=True)
+    rates = (counts + k * prior) / (pa + k)
+    return rates / rates.sum(axis=-1, keepdims=True)
+
+
+def log5(batter: np.ndarray, pitcher: np.ndarray, league: np.ndarray) -> np.ndarray:
+    """Multinomial log5: p ∝ batter * pitcher / league per outcome, normalized over outcomes.
+
+    Sides with no outcome in common (only possible on tiny samples) get the league rates.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        odds = np.where(league > 0, batter * pitcher / league, 0.0)
+        total = odds.sum(axis=-1, keepdims=True)
+        return np.where(total > 0, odds / total, league)
+
+
+def _hand_index(hand: str, against: int = None) -> int:
+    """Index into HANDS of a listed hand; S bats opposite the pitcher's hand; unknown is R."""
+    if hand == "S" and against is not None:
+        return 1 - against
+    return HANDS.index(hand) if hand in HANDS else 1
+
+
+def _sides(counts_by_hand: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+    """Index into HANDS of the hand with the most PAs along the second-to-last axis, else the fallback."""
+    n = counts_by_hand.sum(axis=-1)
+    return np.where(n.sum(axis=-1) > 0, n.argmax(axis=-1), fallback)
+
+
+def derived_rates(probs: np.ndarray) -> dict:
+    """AVG/OBP/SLG implied by per-PA outcome probabilities (sacrifices ignored)."""
+    k, bb, hbp, single, double, triple, hr, out = np.moveaxis(probs, -1, 0)
+    hits = single + double + triple + hr
+    ab = 1 - bb - hbp
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "avg": hits / ab,
+            "obp": hits + bb + hbp,
+            "slg": (single + 2 * double + 3 * triple + 4 * hr) / ab,
+        }
+
+
+class MatchupService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _role_counts(self, role: str, season: int) -> tuple[list[int], np.ndarray]:
+        """Every batter's or pitcher's season counts, (players, pitcher hand, batter side, OUTCOMES)."""
+        pa = PlateAppearance
+        col = pa.batter_id if role == "batter" else pa.pitcher_id
+        rows = (
+            self.db.query(col, pa.p_throws, pa.stand, func.count(pa.id), *_outcome_sums())
+            .filter(pa.season == season, pa.p_throws.in_(HANDS), pa.stand.in_(HANDS))
+            .group_by(col, pa.p_throws, pa.stand)
+            .all()
+        )
+        keys, counts = _counts(rows)
+        ids = list(dict.fromkeys(mlb_id for mlb_id, _, _ in keys))
+        index = {mlb_id: i for i, mlb_id in enumerate(ids)}
+        out = np.zeros((len(ids), len(HANDS), len(HANDS), len(OUTCOMES)))
+        for (mlb_id, throws, stand), c in zip(keys, counts):
+            out[index[mlb_id], HANDS.index(throws), HANDS.index(stand)] = c
+        return ids, out
+
+    def season_counts(self, season: int) -> dict:
+        """{role: (ids, counts)} for the season, built in two grouped scans and cached until PAs are stored."""
+        def fetch():
+            built = {}
+            for role in ("batter", "pitcher"):
+                ids, counts = self._role_counts(role, season)
+                built[role] = {"ids": ids, "counts": counts.astype(int).ravel().tolist()}
+            return built if built["batter"]["ids"] else None
+
+        cached = get_cache().get_or_set(cache_key(season), TTL_COUNTS, fetch, name="matchup_counts")
+        result = {}
+        for role in ("batter", "pitcher"):
+            entry = (cached or {}).get(role, {"ids": [], "counts": []})
+            shape = (len(entry["ids"]), len(HANDS), len(HANDS), len(OUTCOMES))
+            result[role] = (entry["ids"], np.array(entry["counts"], dtype=float).reshape(shape))
+        return result
+
+    def _handedness(self, ids: list[int]) -> dict[int, tuple]:
+        """(bats, throws) from sr_players, for players with no stored PAs to infer them from."""
+        if not ids:
+            return {}
+        rows = self.db.query(Player.mlb_id, Player.bats, Player.throws).filter(Player.mlb_id.in_(set(ids))).all()
+        return {mlb_id: (bats, throws) for mlb_id, bats, throws in rows}
+
+    def predict(self, pairs: list[tuple[int, int]], season: int) -> list[dict]:
+        """Outcome probabilities for each (pitcher_id, batter_id) pair's next PA.
+
+        Pairs may mix any number of pitchers and batters (e.g. a whole
+        slate); each player's counts are read once and every matchup is
+        computed in the same array pass.
+        """
+        if not pairs:
+            return []
+        pitcher_ids = list(dict.fromkeys(p for p, _ in pairs))
+        batter_ids = list(dict.fromkeys(b for _, b in pairs))
+        p_index = {p: i for i, p in enumerate(pitcher_ids)}
+        b_index = {b: i for i, b in enumerate(batter_ids)}
+        pi = np.array([p_index[p] for p, _ in pairs])
+        bi = np.array([b_index[b] for _, b in pairs])
+
+        counts = self.season_counts(season)
+        batters = _select(*counts["batter"], batter_ids)               # (B, hand, side, O)
+        pitchers = _select(*counts["pitcher"], pitcher_ids)            # (P, hand, side, O)
+        league = counts["batter"][1].sum(axis=0)                       # (hand, side, O)
+        league_all = _rates(league.sum(axis=(0, 1)))                   # (O,)
+        if np.isnan(league_all).any():
+            logger.warning(f"No stored plate appearances for {season}; matchups unavailable")
+            return []
+        # a handedness cell with no PAs falls back to the league as a whole
+        league_by_hand = _or_league(_rates(league.sum(axis=1)), league_all)   # (hand, O)
+        league_by_side = _or_league(_rates(league.sum(axis=0)), league_all)   # (side, O)
+        league_matchup = _or_league(_rates(league), league_all)               # (hand, side, O)
+
+        # batters vs each pitcher hand; pitchers vs each batter side
+        b_vs_hand = batters.sum(axis=2)                                # (B, hand, O)
+        p_vs_side = pitchers.sum(axis=1)                               # (P, side, O)
+        b_overall = shrink(b_vs_hand.sum(axis=1), league_all, SHRINK_PA)  # (B, O)
+        p_overall = shrink(p_vs_side.sum(axis=1), league_all, SHRINK_PA)  # (P, O)
+        b_split = shrink(
+            b_vs_hand,
+            b_overall[:, None, :] * _platoon_effect(league_by_hand, league_all),
+            SHRINK_PA * PLATOON_SHRINK,
+        )                                                              # (B, hand, O)
+        p_split = shrink(
+            p_vs_side,
+            p_overall[:, None, :] * _platoon_effect(league_by_side, league_all),
+            SHRINK_PA * PLATOON_SHRINK,
+        )                                                              # (P, side, O)
+
+        # pitcher hand and the side each batter takes vs a LHP / RHP: observed in stored PAs,
+        # else listed in sr_players (switch hitters take the opposite side), else right
+        known = self._handedness(pitcher_ids + batter_ids)
+        listed_throws = np.array([_hand_index(known.get(p, (None, None))[1]) for p in pitcher_ids])
+        listed_bats = np.array([
+            [_hand_index(known.get(b, (None, None))[0], against=h) for h in range(len(HANDS))]
+            for b in batter_ids
+        ])
+        hand = _sides(pitchers.sum(axis=2), listed_throws)             # (P,)
+        side_vs = _sides(batters, listed_bats)                         # (B, hand)
+
+        h = hand[pi]
+        s = side_vs[bi, h]
+        probs = log5(b_split[bi, h], p_split[pi, s], league_matchup[h, s])  # (pairs, O)
+        rates = derived_rates(probs)
+        b_pa = b_vs_hand[bi, h].sum(axis=-1)
+        p_pa = p_vs_side[pi, s].sum(axis=-1)
+
+        probs = probs.round(4)
+        results = []
+        for n, (pitcher_id, batter_id) in enumerate(pairs):
+            results.append({
+                "pitcher_id": pitcher_id,
+                "batter_id": batter_id,
+                "throws": HANDS[h[n]],
+                "bats": HANDS[s[n]],
+                "batter_pa": int(b_pa[n]),
+                "pitcher_pa": int(p_pa[n]),
+                "probabilities": dict(zip(OUTCOMES, probs[n].tolist())),
+                **{stat: round(float(v[n]), 3) for stat, v in rates.items()},
+            })
+        return results
@@ -1,8 +1,13 @@
 """app/services/mlb.py - MLB Stats API data layer"""
 import logging
 import statsapi
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from app.core import metrics
+from app.core.cache import get_cache
 from app.db.models import Player, PlayerSeason
+from app.services import upstream
+from app.services.statlines import typed_columns
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +26,10 @@ STAT_FIELDS_PITCHING = [
     "qualityStarts","battersFaced","strikes","balls",
 ]
 
+# Shared-cache TTLs (seconds)
+TTL_SEARCH = 3600
+TTL_CAREER = 6 * 3600
+
 
 class MLBService:
     def __init__(self, db: Session):
@@ -29,7 +38,12 @@ class MLBService:
     def search_players(self, query: str) -> list:
         """Search MLB players by name."""
         try:
-            results = statsapi.lookup_player(query)
+            results = get_cache().get_or_set(
+                f"search:{query.strip().lower()}",
+                TTL_SEARCH,
+                lambda: upstream.call("lookup_player", statsapi.lookup_player, query),
+                name="player_search",
+            )
             return [
                 {
                     "mlb_id": p["id"],
@@ -47,14 +61,16 @@ class MLBService:
     def get_or_fetch_player(self, mlb_id: int) -> Player:
         """Get player from DB or fetch from MLB API."""
         player = self.db.query(Player).filter(Player.mlb_id == mlb_id).first()
-        if player:
+        # Rows created by league ingestion only carry name/team; bats is None until a full fetch
+        complete = player is not None and player.bats is not None
+        metrics.record_cache("player", complete)
+        if complete:
             return player
 
         try:
-            data = statsapi.get("person", {"personId": mlb_id})
+            data = upstream.statsapi_get("person", {"personId": mlb_id})
             p = data["people"][0]
-            player = Player(
-                mlb_id=mlb_id,
+            fields = dict(
                 full_name=p.get("fullName", ""),
                 first_name=p.get("firstName", ""),
                 last_name=p.get("lastName", ""),
@@ -71,7 +87,12 @@ class MLBService:
                 debut=p.get("mlbDebutDate", ""),
                 active="Y" if p.get("active") else "N",
             )
-            self.db.add(player)
+            if player is None:
+                player = Player(mlb_id=mlb_id, **fields)
+                self.db.add(player)
+            else:
+                for key, value in fields.items():
+                    setattr(player, key, value)
             self.db.commit()
             self.db.refresh(player)
             return player
@@ -79,6 +100,18 @@ class MLBService:
             logger.error(f"Failed to fetch player {mlb_id}: {e}")
             raise
 
+    def record_view(self, mlb_id: int):
+        """Count a player page/report view; pregeneration warms the most viewed players first."""
+        try:
+            self.db.query(Player).filter(Player.mlb_id == mlb_id).update(
+                {Player.view_count: func.coalesce(Player.view_count, 0) + 1},
+                synchronize_session=False,
+            )
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"Could not record view for {mlb_id}: {e}")
+
     def get_hitting_stats(self, mlb_id: int, seasons: list[int]) -> list[dict]:
         """Get hitting stats for multiple seasons."""
         results = []
@@ -88,18 +121,20 @@ class MLBService:
                 PlayerSeason.season == season,
                 PlayerSeason.stat_group == "hitting"
             ).first()
+            metrics.record_cache("player_season", cached is not None)
             if cached:
                 results.append({"season": season, "stats": cached.stats, "team": cached.team})
                 continue
             try:
-                data = statsapi.player_stat_data(mlb_id, group="hitting", type="season", sportId=1)
+                data = upstream.call("player_stats", statsapi.player_stat_data, mlb_id, group="hitting", type="season", sportId=1)
                 for s in data.get("stats", []):
                     if s.get("season") == str(season):
-                        stats = {k: s.get(k) for k in STAT_FIELDS_HITTING if k in s}
+                        stat_data = s.get("stats", s)
+                        stats = {k: stat_data.get(k) for k in STAT_FIELDS_HITTING if k in stat_data}
                         team = s.get("team", {}).get("name", "") if isinstance(s.get("team"), dict) else ""
                         row = PlayerSeason(
                             mlb_id=mlb_id, season=season, team=team,
-                            stat_group="hitting", stats=stats
+                            stat_group="hitting", stats=stats, **typed_columns("hitting", stat_data)
                         )
                         try:
                             self.db.merge(row)
@@ -121,18 +156,20 @@ class MLBService:
                 PlayerSeason.season == season,
                 PlayerSeason.stat_group == "pitching"
             ).first()
+            metrics.record_cache("player_season", cached is not None)
             if cached:
                 results.append({"season": season, "stats": cached.stats, "team": cached.team})
                 continue
             try:
-                data = statsapi.player_stat_data(mlb_id, group="pitching", type="season", sportId=1)
+                data = upstream.call("player_stats", statsapi.player_stat_data, mlb_id, group="pitching", type="season", sportId=1)
                 for s in data.get("stats", []):
                     if s.get("season") == str(season):
-                        stats = {k: s.get(k) for k in STAT_FIELDS_PITCHING if k in s}
+                        stat_data = s.get("stats", s)
+                        stats = {k: stat_data.get(k) for k in STAT_FIELDS_PITCHING if k in stat_data}
                         team = s.get("team", {}).get("name", "") if isinstance(s.get("team"), dict) else ""
                         row = PlayerSeason(
                             mlb_id=mlb_id, season=season, team=team,
-                            stat_group="pitching", stats=stats
+                            stat_group="pitching", stats=stats, **typed_columns("pitching", stat_data)
                         )
                         try:
                             self.db.merge(row)
@@ -148,7 +185,12 @@ class MLBService:
     def get_career_stats(self, mlb_id: int, stat_group: str = "hitting") -> list[dict]:
         """Get full career stats across all seasons."""
         try:
-            data = statsapi.player_stat_data(mlb_id, group=stat_group, type="yearByYear", sportId=1)
+            data = get_cache().get_or_set(
+                f"career:{mlb_id}:{stat_group}",
+                TTL_CAREER,
+                lambda: upstream.call("player_stats", statsapi.player_stat_data, mlb_id, group=stat_group, type="yearByYear", sportId=1),
+                name="career_stats",
+            )
             results = []
             for s in data.get("stats", []):
                 season = s.get("season")
@@ -164,23 +206,65 @@ class MLBService:
             logger.error(f"Career stats failed for {mlb_id}: {e}")
             return []
 
-    def get_game_log(self, mlb_id: int, season: int, stat_group: str = "hitting") -> list[dict]:
-        """Get game-by-game log for a season."""
-        try:
-            data = statsapi.player_stat_data(mlb_id, group=stat_group, type="gameLog", sportId=1)
-            results = []
-            for s in data.get("stats", []):
-                if s.get("season") != str(season):
+    def ingest_league_season(self, season: int, stat_group: str = "hitting", page_size: int = 1000) -> int:
+        """Store every player's season line for a group using the paged league-wide stats endpoint."""
+        fields = STAT_FIELDS_HITTING if stat_group == "hitting" else STAT_FIELDS_PITCHING
+        existing = {
+            (r.mlb_id, r.team): r
+            for r in self.db.query(PlayerSeason).filter(
+                PlayerSeason.season == season,
+                PlayerSeason.stat_group == stat_group,
+            )
+        }
+        known_players = {mlb_id for (mlb_id,) in self.db.query(Player.mlb_id)}
+        stored = 0
+        offset = 0
+        while True:
+            data = upstream.fetch_json(
+                f"{upstream.STATSAPI_BASE}/stats",
+                params={
+                    "stats": "season",
+                    "group": stat_group,
+                    "season": season,
+                    "sportIds": 1,
+                    "playerPool": "All",
+                    "limit": page_size,
+                    "offset": offset,
+                },
+                endpoint="league_stats",
+                timeout=30,
+            )
+            splits = [s for block in data.get("stats", []) for s in block.get("splits", [])]
+            for split in splits:
+                person = split.get("player", {})
+                mlb_id = person.get("id")
+                if not mlb_id:
                     continue
-                game = {
-                    "date": s.get("date", ""),
-                    "opponent": s.get("opponent", {}).get("name", "") if isinstance(s.get("opponent"), dict) else "",
-                    "home_away": s.get("isHome", True),
-                }
-                fields = STAT_FIELDS_HITTING if stat_group == "hitting" else STAT_FIELDS_PITCHING
-                game.update({k: s.get(k) for k in fields if k in s})
-                results.append(game)
-            return results
-        except Exception as e:
-            logger.warning(f"Game log failed: {e}")
-            return []
+                stat_data = split.get("stat", {})
+                stats = {k: stat_data.get(k) for k in fields if k in stat_data}
+                team = split.get("team", {}).get("name", "")
+                row = existing.get((mlb_id, team))
+                if row is None:
+                    row = PlayerSeason(mlb_id=mlb_id, season=season, team=team, stat_group=stat_group)
+                    self.db.add(row)
+                    existing[(mlb_id, team)] = row
+                row.stats = stats
+                for column, value in typed_columns(stat_group, stat_data).items():
+                    setattr(row, column, value)
+                if mlb_id not in known_players and person.get("fullName"):
+                    # Stub row so leaderboards can show names; filled in by get_or_fetch_player
+                    self.db.add(Player(
+                        mlb_id=mlb_id,
+                        full_name=person["fullName"],
+                        position=split.get("position", {}).get("abbreviation", ""),
+                        team=team,
+                        team_id=split.get("team", {}).get("id"),
+                    ))
+                    known_players.add(mlb_id)
+                stored += 1
+            self.db.commit()
+            if len(splits) < page_size:
+                break
+            offset += page_size
+        logger.info(f"Ingested {stored} {stat_group} lines for {season}")
+        return stored
@@ -0,0 +1,92 @@
+"""app/services/percentiles.py - League-wide percentile ranks per stat and season"""
+import logging
+from datetime import datetime
+import numpy as np
+from sqlalchemy.orm import Session
+from app.db.models import PlayerPercentiles
+from app.services.leaders import LOWER_IS_BETTER, QUALIFY_MIN, line_value, season_lines, stat_fields
+
+logger = logging.getLogger(__name__)
+
+
+def percentile_matrix(values: np.ndarray, reference: np.ndarray, lower_is_better: np.ndarray) -> np.ndarray:
+    """Percentile of every value against its column of the reference population.
+
+    values: (players, stats), reference: (qualified players, stats), NaN = missing.
+    Uses mid-rank ((below + below_or_equal) / 2) so ties share a percentile.
+    """
+    out = np.full(values.shape, np.nan)
+    ref_sorted = np.sort(reference, axis=0)  # NaNs sort to the end of each column
+    ref_counts = np.count_nonzero(~np.isnan(reference), axis=0)
+    for j in range(values.shape[1]):
+        n = ref_counts[j]
+        if n == 0:
+            continue
+        col = ref_sorted[:n, j]
+        below = np.searchsorted(col, values[:, j], side="left")
+        at_or_below = np.searchsorted(col, values[:, j], side="right")
+        out[:, j] = (below + at_or_below) / (2 * n) * 100
+    out[:, lower_is_better] = 100 - out[:, lower_is_better]
+    out[np.isnan(values)] = np.nan
+    return out
+
+
+class PercentileService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def rebuild(self, season: int, stat_group: str, lines: list = None) -> int:
+        """Recompute percentiles for every player in a season/group in one pass over a stat matrix."""
+        lines = lines if lines is not None else season_lines(self.db, season, stat_group)
+        if not lines:
+            return 0
+        stats = stat_fields(stat_group)
+        values = np.array(
+            [[line_value(row, stat, stat_group) for stat in stats] for row, _, _ in lines],
+            dtype=float,
+        )
+        qualifiers = np.array([q for _, _, q in lines], dtype=float)
+        qualified = qualifiers >= QUALIFY_MIN[stat_group]
+        lower = np.array([s in LOWER_IS_BETTER.get(stat_group, set()) for s in stats])
+        pct = percentile_matrix(values, values[qualified], lower)
+
+        try:
+            self.db.query(PlayerPercentiles).filter(
+                PlayerPercentiles.season == season,
+                PlayerPercentiles.stat_group == stat_group,
+            ).delete(synchronize_session=False)
+            now = datetime.utcnow()
+            self.db.bulk_insert_mappings(PlayerPercentiles, [
+                {
+                    "mlb_id": row.mlb_id,
+                    "season": season,
+                    "stat_group": stat_group,
+                    "qualified": "Y" if qualified[i] else "N",
+                    "percentiles": {
+                        stat: int(round(p)) for stat, p in zip(stats, pct[i]) if not np.isnan(p)
+                    },
+                    "built_at": now,
+                }
+                for i, (row, _, _) in enumerate(lines)
+            ])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        logger.info(f"Percentiles {season} {stat_group}: {len(lines)} players, {int(qualified.sum())} qualified")
+        return len(lines)
+
+    def for_player(self, mlb_id: int, stat_group: str) -> dict[int, dict]:
+        """{season: {stat: percentile}} for every stored season of a player."""
+        rows = self.db.query(PlayerPercentiles).filter(
+            PlayerPercentiles.mlb_id == mlb_id,
+            PlayerPercentiles.stat_group == stat_group,
+        ).all()
+        return {r.season: r.percentiles or {} for r in rows}
+
+    def attach(self, mlb_id: int, stat_group: str, lines: list[dict]) -> list[dict]:
+        """Add a "percentiles" dict to each {"season", "stats", ...} line."""
+        by_season = self.for_player(mlb_id, stat_group)
+        for line in lines:
+            line["percentiles"] = by_season.get(line["season"], {})
+        return lines
@@ -0,0 +1,66 @@
+"""app/services/plate_appearances.py - Batter/pitcher aggregates over stored plate appearances"""
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.db.models import PlateAppearance
+
+
+def _rate(num: float, den: float) -> str:
+    """MLB-style rate string, e.g. .312 or 1.045."""
+    value = num / den if den else 0.0
+    text = f"{value:.3f}"
+    return text[1:] if text.startswith("0") else text
+
+
+def slash_line(ab: int, hits: int, tb: int, bb: int, hbp: int, sf: int) -> dict:
+    obp_den = ab + bb + hbp + sf
+    obp = (hits + bb + hbp) / obp_den if obp_den else 0.0
+    slg = tb / ab if ab else 0.0
+    return {
+        "avg": _rate(hits, ab),
+        "obp": _rate(hits + bb + hbp, obp_den),
+        "slg": _rate(tb, ab),
+        "ops": _rate(obp + slg, 1),
+    }
+
+
+class PlateAppearanceService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def vs_pitcher(self, pitcher_id: int, batter_ids: list[int]) -> dict[int, dict]:
+        """Career line of each batter against one pitcher, in vsPlayerTotal's field names."""
+        if not batter_ids:
+            return {}
+        pa = PlateAppearance
+        rows = (
+            self.db.query(
+                pa.batter_id,
+                func.count(pa.id),
+                func.sum(pa.is_ab),
+                func.sum(pa.is_hit),
+                func.sum(pa.total_bases),
+                func.sum(pa.is_hr),
+                func.sum(pa.is_walk),
+                func.sum(pa.is_hbp),
+                func.sum(pa.is_sf),
+                func.sum(pa.is_k),
+                func.sum(pa.num_pitches),
+            )
+            .filter(pa.pitcher_id == pitcher_id, pa.batter_id.in_(batter_ids))
+            .group_by(pa.batter_id)
+            .all()
+        )
+        lines = {}
+        for batter_id, n, ab, hits, tb, hr, bb, hbp, sf, k, pitches in rows:
+            ab, hits, tb, bb, hbp, sf = (int(v or 0) for v in (ab, hits, tb, bb, hbp, sf))
+            lines[batter_id] = {
+                "plateAppearances": n,
+                "atBats": ab,
+                "hits": hits,
+                "homeRuns": int(hr or 0),
+                "walks": bb,
+                "strikeOuts": int(k or 0),
+                **slash_line(ab, hits, tb, bb, hbp, sf),
+                "numberOfPitches": int(pitches or 0),
+            }
+        return lines
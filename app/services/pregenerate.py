@@ -0,0 +1,127 @@
+"""app/services/pregenerate.py - Bulk scouting-report generation through the message batches API"""
+import logging
+from datetime import datetime
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+from app.db.models import Player, ScoutingReport
+from app.services import llm, upstream
+from app.services.scout import (
+    REPORT_INSTRUCTIONS, REPORT_MAX_TOKENS, REPORT_MODEL, ScoutService, build_report_prompt, scout_system,
+)
+
+logger = logging.getLogger(__name__)
+
+WRITE_CHUNK = 500
+
+
+class ReportPregenerator:
+    def __init__(self, db: Session, backend=None):
+        self.db = db
+        self.backend = backend
+
+    def roster_players(self, season: int) -> list[int]:
+        """Every player on an MLB active roster."""
+        teams = upstream.statsapi_get("teams", {"sportId": 1, "season": season}).get("teams", [])
+        ids = []
+        for team in teams:
+            try:
+                roster = upstream.statsapi_get(
+                    "team_roster", {"teamId": team["id"], "rosterType": "active", "season": season}
+                )
+            except Exception as e:
+                logger.warning(f"Roster for team {team.get('id')} failed: {e}")
+                continue
+            ids.extend(p["person"]["id"] for p in roster.get("roster", []) if p.get("person", {}).get("id"))
+        return ids
+
+    def most_viewed(self, limit: int) -> list[int]:
+        rows = (
+            self.db.query(Player.mlb_id)
+            .filter(func.coalesce(Player.view_count, 0) > 0)
+            .order_by(Player.view_count.desc())
+            .limit(limit)
+            .all()
+        )
+        return [mlb_id for (mlb_id,) in rows]
+
+    def select_players(
+        self,
+        season: int,
+        featured: list[int] = (),
+        top_viewed: int = 200,
+        rosters: bool = True,
+        force: bool = False,
+    ) -> list[int]:
+        """Featured first, then most viewed, then active rosters; players with a report already are skipped."""
+        candidates = list(featured) + self.most_viewed(top_viewed)
+        if rosters:
+            candidates += self.roster_players(season)
+        selected = list(dict.fromkeys(candidates))
+        if force or not selected:
+            return selected
+        done = {
+            mlb_id for (mlb_id,) in self.db.query(ScoutingReport.mlb_id).filter(
+                ScoutingReport.season == season,
+                ScoutingReport.mlb_id.in_(selected),
+            )
+        }
+        return [mlb_id for mlb_id in selected if mlb_id not in done]
+
+    def build_requests(self, mlb_ids: list[int], season: int) -> list[dict]:
+        """One batch request per player, identical in content to an on-demand report."""
+        scout = ScoutService(self.db)
+        system = scout_system(REPORT_INSTRUCTIONS)
+        requests = []
+        for mlb_id in mlb_ids:
+            try:
+                player, career, stat_group, comps = scout.report_inputs(mlb_id, season)
+            except Exception as e:
+                logger.warning(f"Skipping {mlb_id}: {e}")
+                continue
+            if not career:
+                # upstream trouble; don't warm the cache with a stat-less report
+                logger.warning(f"Skipping {mlb_id}: no career stats")
+                continue
+            requests.append({
+                "custom_id": f"{mlb_id}-{season}",
+                "params": {
+                    "model": REPORT_MODEL,
+                    "max_tokens": REPORT_MAX_TOKENS,
+                    "system": system,
+                    "messages": [{"role": "user", "content": build_report_prompt(player, career, stat_group, season, comps=comps)}],
+                },
+            })
+        return requests
+
+    def save_reports(self, reports: dict[tuple[int, int], str]) -> int:
+        """Replace sr_scouting_reports rows for the given (mlb_id, season) keys in bulk."""
+        items = list(reports.items())
+        now = datetime.utcnow()
+        try:
+            for i in range(0, len(items), WRITE_CHUNK):
+                chunk = items[i:i + WRITE_CHUNK]
+                self.db.query(ScoutingReport).filter(
+                    tuple_(ScoutingReport.mlb_id, ScoutingReport.season).in_([key for key, _ in chunk])
+                ).delete(synchronize_session=False)
+                self.db.bulk_insert_mappings(ScoutingReport, [
+                    {"mlb_id": mlb_id, "season": season, "report": report, "generated_at": now}
+                    for (mlb_id, season), report in chunk
+                ])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return len(items)
+
+    def run(self, season: int, mlb_ids: list[int], poll_interval: float = 30.0) -> int:
+        requests = self.build_requests(mlb_ids, season)
+        if not requests:
+            return 0
+        texts = llm.run_batch(self.backend or llm.AnthropicBatches(), requests, "scouting_report_batch", poll_interval)
+        reports = {}
+        for custom_id, text in texts.items():
+            mlb_id, report_season = custom_id.split("-")
+            reports[(int(mlb_id), int(report_season))] = text
+        saved = self.save_reports(reports)
+        logger.info(f"Pregenerated {saved}/{len(requests)} reports for {season}")
+        return saved
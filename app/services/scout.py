@@ -1,50 +1,204 @@
 """app/services/scout.py - Claude-powered scouting reports"""
 import logging
-from anthropic import Anthropic
+import os
+from functools import lru_cache
 from sqlalchemy.orm import Session
-from app.core.config import settings
+from app.core import metrics
 from app.db.models import ScoutingReport
+from app.services import llm
+from app.services.comps import CompsService
+from app.services.mlb import MLBService
+from app.services.percentiles import PercentileService
 
 logger = logging.getLogger(__name__)
-client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
 
+REPORT_MODEL = llm.DEFAULT_MODEL
+TTL_PREVIEW = 6 * 3600
+TTL_MATCHUP = 86400
 
-def _format_hitting(stats: dict) -> str:
+# Benchmarks, scales and style rules shared by reports, previews and matchups. It is
+# the cached system prefix, so it has to stay identical between calls and above
+# llm.CACHE_MIN_TOKENS; anything that varies goes after it or in the user turn.
+REFERENCE_PATH = os.path.join(os.path.dirname(__file__), "scout_reference.md")
+
+REPORT_INSTRUCTIONS = """You are a professional MLB scout writing a detailed scouting report.
+
+You will be given a player's bio, recent stats (with league percentile ranks in parentheses where available), optionally a list of statistical comps, and optionally a question from the user to address.
+
+Write a professional scouting report with these sections:
+
+## Overview
+2-3 sentences on who this player is and their role.
+
+## Strengths
+3 specific, data-backed strengths.
+
+## Weaknesses / Areas of Concern
+2-3 honest weaknesses or red flags.
+
+## Statistical Trends
+Analysis of how their numbers have trended over recent seasons.
+
+## Role & Value
+What role do they fill? Starting caliber, platoon, depth? Contract value assessment.
+
+## Comparable Players
+If STATISTICAL COMPS are listed, discuss the closest ones and what they say about this player's profile, and do not invent other comps. Otherwise give 2 comps — one current player, one historical.
+
+## Bottom Line
+One paragraph summary. Would you sign this player? What's a fair contract?
+
+Be specific, analytical, and honest. Reference the actual stats. Avoid generic platitudes."""
+
+
+PREVIEW_INSTRUCTIONS = """Generate a concise, engaging preview of tonight's MLB game from the matchup in the user turn.
+
+Write a 3-4 paragraph game preview covering:
+1. The pitching matchup and who has the edge
+2. Key storylines or narratives for tonight
+3. What to watch for offensively
+4. Your predicted outcome and final score
+
+Be specific, use the actual stats, and write like a beat reporter."""
+
+MATCHUP_INSTRUCTIONS = """Analyze the MLB matchup between the batter and pitcher in the user turn.
+
+Analyze:
+1. **Matchup Advantage** — Who has the edge and why?
+2. **Key Battle** — What's the critical factor in this matchup?
+3. **Batter's Approach** — What should the batter be looking for?
+4. **Pitcher's Strategy** — How should the pitcher attack this hitter?
+5. **Historical Context** — Any relevant trends or patterns?
+6. **Prediction** — In a 10 AB sample, what outcomes would you expect?
+
+Be specific and reference the actual stats."""
+
+
+@lru_cache
+def scouting_reference() -> str:
+    with open(REFERENCE_PATH, encoding="utf-8") as f:
+        return f.read()
+
+
+def scout_system(instructions: str) -> list[dict]:
+    """System blocks for one analysis: the cached shared reference, then its task instructions."""
+    return llm.cached_system(scouting_reference(), instructions)
+
+
+def _ordinal(n: int) -> str:
+    suffix = "th" if 10 <= n % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
+
+def _stat(label: str, key: str, stats: dict, pct: dict) -> str:
+    text = f"{label}: {stats[key]}"
+    if key in pct:
+        text += f" ({_ordinal(pct[key])} pct)"
+    return text
+
+
+def _format_hitting(stats: dict, pct: dict = None) -> str:
+    pct = pct or {}
     lines = []
-    if stats.get("avg"): lines.append(f"AVG: {stats['avg']}")
-    if stats.get("obp"): lines.append(f"OBP: {stats['obp']}")
-    if stats.get("slg"): lines.append(f"SLG: {stats['slg']}")
-    if stats.get("ops"): lines.append(f"OPS: {stats['ops']}")
-    if stats.get("homeRuns") is not None: lines.append(f"HR: {stats['homeRuns']}")
-    if stats.get("rbi") is not None: lines.append(f"RBI: {stats['rbi']}")
-    if stats.get("runs") is not None: lines.append(f"R: {stats['runs']}")
-    if stats.get("hits") is not None: lines.append(f"H: {stats['hits']}")
-    if stats.get("stolenBases") is not None: lines.append(f"SB: {stats['stolenBases']}")
-    if stats.get("strikeOuts") is not None: lines.append(f"K: {stats['strikeOuts']}")
-    if stats.get("walks") is not None: lines.append(f"BB: {stats['walks']}")
-    if stats.get("gamesPlayed") is not None: lines.append(f"G: {stats['gamesPlayed']}")
+    if stats.get("avg"): lines.append(_stat("AVG", "avg", stats, pct))
+    if stats.get("obp"): lines.append(_stat("OBP", "obp", stats, pct))
+    if stats.get("slg"): lines.append(_stat("SLG", "slg", stats, pct))
+    if stats.get("ops"): lines.append(_stat("OPS", "ops", stats, pct))
+    if stats.get("homeRuns") is not None: lines.append(_stat("HR", "homeRuns", stats, pct))
+    if stats.get("rbi") is not None: lines.append(_stat("RBI", "rbi", stats, pct))
+    if stats.get("runs") is not None: lines.append(_stat("R", "runs", stats, pct))
+    if stats.get("hits") is not None: lines.append(_stat("H", "hits", stats, pct))
+    if stats.get("stolenBases") is not None: lines.append(_stat("SB", "stolenBases", stats, pct))
+    if stats.get("strikeOuts") is not None: lines.append(_stat("K", "strikeOuts", stats, pct))
+    if stats.get("walks") is not None: lines.append(_stat("BB", "walks", stats, pct))
+    if stats.get("gamesPlayed") is not None: lines.append(_stat("G", "gamesPlayed", stats, pct))
     return " | ".join(lines)
 
 
-def _format_pitching(stats: dict) -> str:
+def _format_pitching(stats: dict, pct: dict = None) -> str:
+    pct = pct or {}
     lines = []
-    if stats.get("era"): lines.append(f"ERA: {stats['era']}")
-    if stats.get("whip"): lines.append(f"WHIP: {stats['whip']}")
-    if stats.get("wins") is not None: lines.append(f"W: {stats['wins']}")
-    if stats.get("losses") is not None: lines.append(f"L: {stats['losses']}")
-    if stats.get("saves") is not None: lines.append(f"SV: {stats['saves']}")
-    if stats.get("strikeOuts") is not None: lines.append(f"K: {stats['strikeOuts']}")
-    if stats.get("inningsPitched"): lines.append(f"IP: {stats['inningsPitched']}")
-    if stats.get("strikeoutsPer9Inn"): lines.append(f"K/9: {stats['strikeoutsPer9Inn']}")
-    if stats.get("walksPer9Inn"): lines.append(f"BB/9: {stats['walksPer9Inn']}")
-    if stats.get("gamesStarted") is not None: lines.append(f"GS: {stats['gamesStarted']}")
+    if stats.get("era"): lines.append(_stat("ERA", "era", stats, pct))
+    if stats.get("whip"): lines.append(_stat("WHIP", "whip", stats, pct))
+    if stats.get("wins") is not None: lines.append(_stat("W", "wins", stats, pct))
+    if stats.get("losses") is not None: lines.append(_stat("L", "losses", stats, pct))
+    if stats.get("saves") is not None: lines.append(_stat("SV", "saves", stats, pct))
+    if stats.get("strikeOuts") is not None: lines.append(_stat("K", "strikeOuts", stats, pct))
+    if stats.get("inningsPitched"): lines.append(_stat("IP", "inningsPitched", stats, pct))
+    if stats.get("strikeoutsPer9Inn"): lines.append(_stat("K/9", "strikeoutsPer9Inn", stats, pct))
+    if stats.get("walksPer9Inn"): lines.append(_stat("BB/9", "walksPer9Inn", stats, pct))
+    if stats.get("gamesStarted") is not None: lines.append(_stat("GS", "gamesStarted", stats, pct))
     return " | ".join(lines)
 
 
+PITCHER_POSITIONS = ["SP", "RP", "P", "CL"]
+REPORT_MAX_TOKENS = 1500
+
+
+def build_report_prompt(
+    player: dict,
+    career_stats: list,
+    stat_group: str,
+    season: int,
+    question: str = None,
+    comps: list = None,
+) -> str:
+    """The per-player half of a report prompt; the instructions live in REPORT_INSTRUCTIONS."""
+    recent = [s for s in career_stats if s["season"] >= season - 4]
+    stat_lines = []
+    for s in recent:
+        pct = s.get("percentiles")
+        formatted = _format_pitching(s["stats"], pct) if stat_group == "pitching" else _format_hitting(s["stats"], pct)
+        stat_lines.append(f"  {s['season']} ({s.get('team','')}) — {formatted}")
+
+    comp_lines = [
+        f"  {c['full_name'] or c['mlb_id']} ({c['season']}) — similarity {c['similarity']:.2f}"
+        for c in comps or []
+    ]
+    comps_block = ""
+    if comp_lines:
+        comps_block = f"STATISTICAL COMPS (nearest player-seasons by rate stats, for {comps[0]['for_season']}):\n" + "\n".join(comp_lines)
+
+    return f"""PLAYER: {player['full_name']}
+POSITION: {player.get('position', 'Unknown')}
+TEAM: {player.get('team', 'Unknown')}
+BATS/THROWS: {player.get('bats', '?')}/{player.get('throws', '?')}
+HEIGHT/WEIGHT: {player.get('height', '?')} / {player.get('weight', '?')} lbs
+MLB DEBUT: {player.get('debut', 'Unknown')}
+
+RECENT STATS ({stat_group.upper()}, league percentile in parentheses where available):
+{chr(10).join(stat_lines) if stat_lines else 'No stats available'}
+
+{comps_block}
+
+{"USER QUESTION: " + question if question else ""}"""
+
+
 class ScoutService:
     def __init__(self, db: Session):
         self.db = db
 
+    def report_inputs(self, mlb_id: int, season: int) -> tuple[dict, list, str, list]:
+        """(player, career_stats, stat_group, comps) for a report, as the prompt expects them."""
+        mlb_svc = MLBService(self.db)
+        player = mlb_svc.get_or_fetch_player(mlb_id)
+        player_dict = {
+            "mlb_id": player.mlb_id,
+            "full_name": player.full_name,
+            "position": player.position,
+            "team": player.team,
+            "bats": player.bats,
+            "throws": player.throws,
+            "height": player.height,
+            "weight": player.weight,
+            "debut": player.debut,
+        }
+        stat_group = "pitching" if player.position in PITCHER_POSITIONS else "hitting"
+        career = PercentileService(self.db).attach(mlb_id, stat_group, mlb_svc.get_career_stats(mlb_id, stat_group))
+        comps_svc = CompsService(self.db)
+        comps = comps_svc.get_comps(mlb_id, stat_group, season, k=5) or comps_svc.get_comps(mlb_id, stat_group, k=5)
+        return player_dict, career, stat_group, comps
+
     def generate_report(
         self,
         player: dict,
@@ -52,67 +206,28 @@ class ScoutService:
         stat_group: str,
         season: int,
         question: str = None,
+        comps: list = None,
     ) -> str:
         # Check cache
         cached = self.db.query(ScoutingReport).filter(
             ScoutingReport.mlb_id == player["mlb_id"],
             ScoutingReport.season == season,
         ).first()
+        if not question:
+            metrics.record_cache("scouting_report", cached is not None)
         if cached and not question:
+            llm.record_call("scouting_report", REPORT_MODEL, cache_hit=True, mlb_id=player["mlb_id"])
             return cached.report
 
-        # Build stat lines
-        recent = [s for s in career_stats if s["season"] >= season - 4]
-        stat_lines = []
-        for s in recent:
-            formatted = _format_pitching(s["stats"]) if stat_group == "pitching" else _format_hitting(s["stats"])
-            stat_lines.append(f"  {s['season']} ({s.get('team','')}) — {formatted}")
-
-        prompt = f"""You are a professional MLB scout writing a detailed scouting report.
-
-PLAYER: {player['full_name']}
-POSITION: {player.get('position', 'Unknown')}
-TEAM: {player.get('team', 'Unknown')}
-BATS/THROWS: {player.get('bats', '?')}/{player.get('throws', '?')}
-HEIGHT/WEIGHT: {player.get('height', '?')} / {player.get('weight', '?')} lbs
-MLB DEBUT: {player.get('debut', 'Unknown')}
-
-RECENT STATS ({stat_group.upper()}):
-{chr(10).join(stat_lines) if stat_lines else 'No stats available'}
-
-{"USER QUESTION: " + question if question else ""}
-
-Write a professional scouting report with these sections:
-
-## Overview
-2-3 sentences on who this player is and their role.
-
-## Strengths
-3 specific, data-backed strengths.
-
-## Weaknesses / Areas of Concern
-2-3 honest weaknesses or red flags.
-
-## Statistical Trends
-Analysis of how their numbers have trended over recent seasons.
-
-## Role & Value
-What role do they fill? Starting caliber, platoon, depth? Contract value assessment.
-
-## Comparable Players
-2 comps — one current player, one historical.
-
-## Bottom Line
-One paragraph summary. Would you sign this player? What's a fair contract?
-
-Be specific, analytical, and honest. Reference the actual stats. Avoid generic platitudes."""
-
-        response = client.messages.create(
-            model="claude-opus-4-6",
-            max_tokens=1500,
-            messages=[{"role": "user", "content": prompt}]
+        prompt = build_report_prompt(player, career_stats, stat_group, season, question, comps)
+        report = llm.complete(
+            "scouting_report",
+            prompt,
+            system=scout_system(REPORT_INSTRUCTIONS),
+            model=REPORT_MODEL,
+            max_tokens=REPORT_MAX_TOKENS,
+            mlb_id=player["mlb_id"],
         )
-        report = response.content[0].text
 
         # Cache if no custom question
         if not question:
@@ -131,3 +246,52 @@ Be specific, analytical, and honest. Reference the actual stats. Avoid generic p
             self.db.commit()
 
         return report
+
+    def game_preview(self, game: dict, away: dict, home: dict) -> str:
+        """Beat-reporter style preview of one game; away/home are starters as {name, throws, career}."""
+        for starter in (away, home):
+            starter["lines"] = "\n".join(
+                f"  {s['season']}: ERA {s['stats'].get('era','?')} | WHIP {s['stats'].get('whip','?')} | "
+                f"K {s['stats'].get('strikeOuts','?')} | W {s['stats'].get('wins','?')} | IP {s['stats'].get('inningsPitched','?')}"
+                for s in starter.get("career", [])[-3:]
+            )
+        prompt = f"""{game['away_name']} @ {game['home_name']} at {game['venue_name']}
+
+AWAY STARTER: {away.get('name') or 'TBD'} (Throws: {away.get('throws') or '?'})
+Recent stats:
+{away.get('lines') or 'No data'}
+
+HOME STARTER: {home.get('name') or 'TBD'} (Throws: {home.get('throws') or '?'})
+Recent stats:
+{home.get('lines') or 'No data'}"""
+
+        return llm.cached_complete(
+            f"preview:{game['game_id']}",
+            TTL_PREVIEW,
+            "game_preview",
+            prompt,
+            system=scout_system(PREVIEW_INSTRUCTIONS),
+            max_tokens=800,
+        )
+
+    def matchup_analysis(self, batter: dict, pitcher: dict, batter_career: list, pitcher_career: list) -> str:
+        """Batter-vs-pitcher breakdown from both players' last four seasons."""
+        batter_lines = "\n".join(f"  {s['season']}: {_format_hitting(s['stats'])}" for s in batter_career[-4:])
+        pitcher_lines = "\n".join(f"  {s['season']}: {_format_pitching(s['stats'])}" for s in pitcher_career[-4:])
+        prompt = f"""BATTER: {batter['full_name']} ({batter.get('position')}, {batter.get('team')})
+Bats: {batter.get('bats')} | Recent stats:
+{batter_lines or 'No data'}
+
+PITCHER: {pitcher['full_name']} ({pitcher.get('position')}, {pitcher.get('team')})
+Throws: {pitcher.get('throws')} | Recent stats:
+{pitcher_lines or 'No data'}"""
+
+        return llm.cached_complete(
+            f"matchup:{batter['mlb_id']}:{pitcher['mlb_id']}",
+            TTL_MATCHUP,
+            "matchup",
+            prompt,
+            mlb_id=batter["mlb_id"],
+            system=scout_system(MATCHUP_INSTRUCTIONS),
+            max_tokens=1000,
+        )
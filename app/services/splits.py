@@ -0,0 +1,131 @@
+"""app/services/splits.py - Platoon, home/away, monthly and by-count splits from stored plate appearances"""
+import logging
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.cache import get_cache
+from app.db.models import PlateAppearance, Pitch
+
+logger = logging.getLogger(__name__)
+
+# Rebuilt on demand and dropped whenever one of the player's games is ingested
+TTL_SPLITS = 7 * 86400
+
+COUNT_COLUMNS = ["is_ab", "is_hit", "total_bases", "is_hr", "is_walk", "is_hbp", "is_sf", "is_k", "rbi"]
+
+
+def cache_key(role: str, mlb_id: int, season: int) -> str:
+    return f"splits:{role}:{mlb_id}:{season}"
+
+
+def invalidate(plate_appearances: list[dict]):
+    """Drop cached splits for every batter and pitcher appearing in newly stored plate appearances."""
+    cache = get_cache()
+    keys = set()
+    for pa in plate_appearances:
+        keys.add(cache_key("batter", pa["batter_id"], pa["season"]))
+        keys.add(cache_key("pitcher", pa["pitcher_id"], pa["season"]))
+    for key in keys:
+        cache.delete(key)
+
+
+def split_lines(df, by) -> list[dict]:
+    """One line per group: PA plus slash stats and K/BB rates, all computed column-wise."""
+    if df.empty:
+        return []
+    g = df.groupby(by, sort=True)[COUNT_COLUMNS].sum()
+    g["pa"] = df.groupby(by, sort=True).size()
+    ab, hits, tb = g["is_ab"], g["is_hit"], g["total_bases"]
+    on_base = hits + g["is_walk"] + g["is_hbp"]
+    obp_den = ab + g["is_walk"] + g["is_hbp"] + g["is_sf"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        g["avg"] = hits / ab
+        g["obp"] = on_base / obp_den
+        g["slg"] = tb / ab
+        g["k_rate"] = g["is_k"] / g["pa"]
+        g["bb_rate"] = g["is_walk"] / g["pa"]
+    g["ops"] = g["obp"] + g["slg"]
+    g = g.rename(columns={"is_ab": "ab", "is_hit": "h", "is_hr": "hr", "is_walk": "bb", "is_k": "so"})
+    g = g[["pa", "ab", "h", "hr", "bb", "so", "rbi", "avg", "obp", "slg", "ops", "k_rate", "bb_rate"]]
+    g = g.replace([np.inf, -np.inf], np.nan).round(3).astype(object).where(g.notna(), None)
+    lines = []
+    for split, row in g.iterrows():
+        line = {"split": split}
+        for col, value in row.items():
+            line[col] = int(value) if col in ("pa", "ab", "h", "hr", "bb", "so", "rbi") else value
+        lines.append(line)
+    return lines
+
+
+class SplitsService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _frame(self, mlb_id: int, season: int, role: str):
+        # pandas is a heavy import; only pay for it once splits are actually built
+        import pandas as pd
+        pa = PlateAppearance
+        player_col = pa.batter_id if role == "batter" else pa.pitcher_id
+        rows = (
+            self.db.query(
+                pa.game_pk, pa.at_bat_number, pa.game_date, pa.stand, pa.p_throws, pa.batter_home,
+                *[getattr(pa, c) for c in COUNT_COLUMNS],
+            )
+            .filter(player_col == mlb_id, pa.season == season)
+            .all()
+        )
+        df = pd.DataFrame(rows, columns=["game_pk", "at_bat_number", "game_date", "stand", "p_throws", "batter_home", *COUNT_COLUMNS])
+        if df.empty:
+            return df
+        df[COUNT_COLUMNS] = df[COUNT_COLUMNS].fillna(0).astype(int)
+
+        # Count the PA was decided on = pre-pitch count of its last pitch
+        pitch_player_col = Pitch.batter_id if role == "batter" else Pitch.pitcher_id
+        pitches = pd.DataFrame(
+            self.db.query(Pitch.game_pk, Pitch.at_bat_number, Pitch.pitch_number, Pitch.balls, Pitch.strikes)
+            .filter(pitch_player_col == mlb_id, Pitch.season == season)
+            .all(),
+            columns=["game_pk", "at_bat_number", "pitch_number", "balls", "strikes"],
+        )
+        if not pitches.empty:
+            last = pitches.sort_values("pitch_number").groupby(["game_pk", "at_bat_number"]).tail(1)
+            # a NULL ball or strike upcasts the column to float; leave those PAs out of the count splits
+            last = last.dropna(subset=["balls", "strikes"])
+            balls, strikes = last["balls"].astype(int).astype(str), last["strikes"].astype(int).astype(str)
+            last = last.assign(count=balls + "-" + strikes)
+            df = df.merge(last[["game_pk", "at_bat_number", "count"]], on=["game_pk", "at_bat_number"], how="left")
+        else:
+            df["count"] = None
+        return df
+
+    def build(self, mlb_id: int, season: int, role: str = "batter") -> dict:
+        import pandas as pd
+        df = self._frame(mlb_id, season, role)
+        result = {"mlb_id": mlb_id, "season": season, "role": role, "pa": int(len(df)), "splits": {}}
+        if df.empty:
+            return result
+        if role == "batter":
+            hand = "vs " + df["p_throws"].fillna("?") + "HP"
+            home = np.where(df["batter_home"] == "Y", "Home", "Away")
+        else:
+            hand = "vs " + df["stand"].fillna("?") + "HB"
+            home = np.where(df["batter_home"] == "Y", "Away", "Home")
+        df = df.assign(
+            platoon=hand,
+            home_away=home,
+            month=pd.to_datetime(df["game_date"], errors="coerce").dt.strftime("%Y-%m"),
+        )
+        result["splits"] = {
+            "platoon": split_lines(df, "platoon"),
+            "home_away": split_lines(df, "home_away"),
+            "monthly": split_lines(df.dropna(subset=["month"]), "month"),
+            "count": split_lines(df.dropna(subset=["count"]), "count"),
+        }
+        return result
+
+    def get_splits(self, mlb_id: int, season: int, role: str = "batter") -> dict:
+        return get_cache().get_or_set(
+            cache_key(role, mlb_id, season),
+            TTL_SPLITS,
+            lambda: self.build(mlb_id, season, role),
+            name="splits",
+        )
@@ -0,0 +1,154 @@
+"""app/services/statcast.py - Chunked import of Baseball Savant (Statcast) CSV exports into sr_pitches"""
+import logging
+from sqlalchemy.orm import Session
+from app.db.models import Pitch
+from app.services import arsenal
+
+logger = logging.getLogger(__name__)
+
+SAVANT_BASE = "https://baseballsavant.mlb.com/statcast_search/csv"
+
+CHUNK_ROWS = 50_000
+INSERT_CHUNK = 5_000
+KEY_COLUMNS = ["game_pk", "at_bat_number", "pitch_number"]
+FLOAT_COLUMNS = ["start_speed", "plate_x", "plate_z"]
+
+# Savant column -> compact dtype; everything else in the export is never read
+STATCAST_DTYPES = {
+    "game_pk": "Int32",
+    "at_bat_number": "Int16",
+    "pitch_number": "Int16",
+    "game_date": "category",
+    "game_year": "Int16",
+    "pitcher": "Int32",
+    "batter": "Int32",
+    "stand": "category",
+    "p_throws": "category",
+    "balls": "Int8",
+    "strikes": "Int8",
+    "pitch_type": "category",
+    "pitch_name": "category",
+    "description": "category",
+    "type": "category",
+    "release_speed": "float32",
+    "plate_x": "float32",
+    "plate_z": "float32",
+    "zone": "Int8",
+}
+RENAMES = {"game_year": "season", "pitcher": "pitcher_id", "batter": "batter_id", "release_speed": "start_speed"}
+
+# Savant names that differ from the live feed's, so both sources group together
+PITCH_NAME_ALIASES = {"4-Seam Fastball": "Four-Seam Fastball", "Split-Finger": "Splitter"}
+DESCRIPTIONS = {
+    "ball": "Ball",
+    "blocked_ball": "Ball In Dirt",
+    "called_strike": "Called Strike",
+    "swinging_strike": "Swinging Strike",
+    "swinging_strike_blocked": "Swinging Strike (Blocked)",
+    "foul": "Foul",
+    "foul_tip": "Foul Tip",
+    "foul_bunt": "Foul Bunt",
+    "missed_bunt": "Missed Bunt",
+    "bunt_foul_tip": "Foul Tip Bunt",
+    "hit_by_pitch": "Hit By Pitch",
+    "hit_into_play": "In play",
+    "pitchout": "Pitchout",
+}
+
+
+def normalize_chunk(chunk):
+    """One CSV chunk in sr_pitches' column names and vocabulary, deduped on the pitch key.
+
+    Like the import as a whole, the first occurrence of a pitch wins.
+    """
+    df = chunk.rename(columns=RENAMES)
+    df = df.dropna(subset=KEY_COLUMNS + ["pitcher_id", "batter_id"])
+    df = df.drop_duplicates(subset=KEY_COLUMNS, keep="first")
+    # mapping a categorical touches each distinct value once, not every row; blanks stay NaN
+    df["pitch_name"] = df["pitch_name"].map(lambda name: PITCH_NAME_ALIASES.get(name, name), na_action="ignore")
+    df["description"] = df["description"].map(
+        lambda d: DESCRIPTIONS.get(d, d.replace("_", " ").capitalize()), na_action="ignore"
+    )
+    df["is_strike"] = (df["type"] == "S").astype("int8")
+    df["is_in_play"] = (df["type"] == "X").astype("int8")
+    df["game_date"] = df["game_date"].astype("string")
+    return df.drop(columns=["type"])
+
+
+def _records(df) -> list[dict]:
+    """Row dicts for the DB, with pandas NA/NaN and categories turned into plain values."""
+    df = df.copy()
+    for c in FLOAT_COLUMNS:
+        # float32 in memory; back to the CSV's own precision for the database
+        df[c] = df[c].astype("float64").round(4)
+    out = df.astype(object).where(df.notna(), None)
+    return out.to_dict("records")
+
+
+class StatcastImporter:
+    """Stream a Savant CSV in fixed-size chunks so memory stays flat however large the file is.
+
+    The first occurrence of a pitch wins, whatever the chunk size: rows whose
+    (game_pk, at_bat_number, pitch_number) is already stored (from an earlier
+    chunk or import, or an ingested game feed) are skipped, and so are later
+    repeats within a chunk.
+    """
+
+    def __init__(self, db: Session, archive=None, chunk_rows: int = CHUNK_ROWS):
+        self.db = db
+        self.archive = archive
+        self.chunk_rows = chunk_rows
+
+    def _existing_keys(self, game_pks: list[int]) -> set[tuple]:
+        keys = set()
+        for i in range(0, len(game_pks), 500):
+            keys.update(
+                self.db.query(Pitch.game_pk, Pitch.at_bat_number, Pitch.pitch_number)
+                .filter(Pitch.game_pk.in_(game_pks[i:i + 500]))
+            )
+        return keys
+
+    def import_chunk(self, chunk) -> tuple[int, int]:
+        """Store one raw CSV chunk; returns (inserted, skipped as duplicate or keyless)."""
+        df = normalize_chunk(chunk)
+        existing = self._existing_keys([int(gp) for gp in df["game_pk"].unique()])
+        if existing:
+            keys = list(zip(df["game_pk"].astype(int), df["at_bat_number"].astype(int), df["pitch_number"].astype(int)))
+            df = df[[key not in existing for key in keys]]
+        skipped = len(chunk) - len(df)
+        if df.empty:
+            return 0, skipped
+        columns = [c for c in df.columns if hasattr(Pitch, c)]
+        records = _records(df[columns])
+        try:
+            for i in range(0, len(records), INSERT_CHUNK):
+                self.db.bulk_insert_mappings(Pitch, records[i:i + INSERT_CHUNK])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        arsenal.invalidate(set(zip(df["pitcher_id"].astype(int), df["season"].astype(int))))
+        if self.archive is not None:
+            self.archive.write(self.archive.to_table(df[columns]))
+        return len(records), skipped
+
+    def run(self, path: str, progress=None) -> dict:
+        import pandas as pd
+
+        stats = {"rows": 0, "inserted": 0, "skipped": 0}
+        reader = pd.read_csv(
+            path,
+            usecols=list(STATCAST_DTYPES),
+            dtype=STATCAST_DTYPES,
+            chunksize=self.chunk_rows,
+            na_values=["", "null", "NA"],
+        )
+        for chunk in reader:
+            inserted, skipped = self.import_chunk(chunk)
+            stats["rows"] += len(chunk)
+            stats["inserted"] += inserted
+            stats["skipped"] += skipped
+            if progress:
+                progress(dict(stats))
+        logger.info(f"Statcast import {path}: {stats['inserted']} inserted, {stats['skipped']} skipped")
+        return stats
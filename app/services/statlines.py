@@ -0,0 +1,88 @@
+"""app/services/statlines.py - Parsing MLB stat values into typed numbers"""
+
+# API stat key -> typed PlayerSeason column, per stat group. Callers pass the full API
+# stat object, so keys outside STAT_FIELDS_* (e.g. baseOnBalls) still fill their column.
+TYPED_COLUMNS_HITTING = {
+    "gamesPlayed": "games_played",
+    "plateAppearances": "plate_appearances",
+    "atBats": "at_bats",
+    "runs": "runs",
+    "hits": "hits",
+    "doubles": "doubles",
+    "triples": "triples",
+    "homeRuns": "home_runs",
+    "rbi": "rbi",
+    "stolenBases": "stolen_bases",
+    "baseOnBalls": "walks",
+    "walks": "walks",
+    "strikeOuts": "strike_outs",
+    "avg": "avg",
+    "obp": "obp",
+    "slg": "slg",
+    "ops": "ops",
+}
+
+TYPED_COLUMNS_PITCHING = {
+    "gamesPlayed": "games_played",
+    "gamesStarted": "games_started",
+    "wins": "wins",
+    "losses": "losses",
+    "saves": "saves",
+    "inningsPitched": "innings_pitched",
+    "battersFaced": "batters_faced",
+    "hits": "hits",
+    "earnedRuns": "earned_runs",
+    "homeRuns": "home_runs",
+    "baseOnBalls": "walks",
+    "walks": "walks",
+    "strikeOuts": "strike_outs",
+    "era": "era",
+    "whip": "whip",
+    "strikeoutsPer9Inn": "k_per_9",
+    "walksPer9Inn": "bb_per_9",
+    "hitsPer9Inn": "h_per_9",
+    "avg": "avg",
+    "obp": "obp",
+    "slg": "slg",
+    "ops": "ops",
+}
+
+RATE_COLUMNS = {"avg", "obp", "slg", "ops", "era", "whip", "k_per_9", "bb_per_9", "h_per_9", "innings_pitched"}
+
+
+def innings_to_float(value) -> float | None:
+    """'180.1' means 180 and one third innings, not 180.1."""
+    if value is None or value == "":
+        return None
+    whole, _, outs = str(value).partition(".")
+    try:
+        return int(whole or 0) + (int(outs) / 3 if outs else 0)
+    except ValueError:
+        return None
+
+
+def parse_stat(value) -> float | None:
+    """Parse an API stat value (int, float, or strings like '.312', '3.45', '-.--')."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def typed_columns(stat_group: str, stats: dict) -> dict:
+    """Map a stats blob onto the typed PlayerSeason columns for its group."""
+    mapping = TYPED_COLUMNS_PITCHING if stat_group == "pitching" else TYPED_COLUMNS_HITTING
+    out = {}
+    for key, column in mapping.items():
+        if key not in stats:
+            continue
+        value = innings_to_float(stats[key]) if key == "inningsPitched" else parse_stat(stats[key])
+        if value is not None and column not in RATE_COLUMNS:
+            value = int(value)
+        if value is not None or column not in out:
+            out[column] = value
+    return out
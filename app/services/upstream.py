@@ -0,0 +1,141 @@
+"""app/services/upstream.py - Instrumented, rate-limited access to the MLB Stats API"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlparse
+import requests
+import statsapi
+from app.core import jsonlib, metrics
+from app.core.breaker import CircuitOpenError, get_breaker
+from app.core.ratelimit import get_limiter
+
+logger = logging.getLogger(__name__)
+
+STATSAPI_BASE = "https://statsapi.mlb.com/api/v1"
+STATSAPI_HOST = "statsapi.mlb.com"
+MAX_RETRIES = 3
+THROTTLE_STATUSES = (429, 503)
+
+_priority: ContextVar[str] = ContextVar("sr_upstream_priority", default="interactive")
+
+
+@contextmanager
+def background():
+    """Mark upstream calls in this block as background work (warmers, ingest jobs).
+
+    Background calls only use the top half of each host's token bucket, so
+    interactive requests keep headroom while a job runs.
+    """
+    token = _priority.set("background")
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def _observe(endpoint: str, start: float, outcome: str):
+    elapsed = time.perf_counter() - start
+    metrics.upstream_latency.observe(elapsed, endpoint)
+    metrics.add_timing("upstream", elapsed)
+    metrics.upstream_calls.inc(endpoint, outcome)
+
+
+def _retry_after(response) -> float | None:
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_outage(exc: Exception) -> bool:
+    """Timeouts, connection errors, 5xx/429 and an open circuit mean the upstream is unhealthy; other 4xx don't."""
+    if isinstance(exc, CircuitOpenError):
+        return True
+    if isinstance(exc, requests.HTTPError):
+        status = exc.response.status_code if exc.response is not None else 0
+        return status >= 500 or status in THROTTLE_STATUSES or status == 0
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+def _limited(host: str, endpoint: str, send):
+    """Run send() under the host's rate limit and the endpoint's circuit breaker.
+
+    Retries with backoff on 429/503. While the endpoint's circuit is open this
+    raises CircuitOpenError straight away instead of waiting on the upstream.
+    """
+    limiter = get_limiter()
+    breaker = get_breaker(endpoint)
+    try:
+        breaker.before_call()
+    except CircuitOpenError:
+        metrics.upstream_calls.inc(endpoint, "short_circuit")
+        raise
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            limiter.acquire(host, _priority.get())
+        except Exception:
+            breaker.release()
+            raise
+        start = time.perf_counter()
+        try:
+            result = send()
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else 0
+            if status in THROTTLE_STATUSES:
+                limiter.report(host, status, _retry_after(e.response))
+                _observe(endpoint, start, "throttled")
+                if attempt < MAX_RETRIES:
+                    continue
+            _observe(endpoint, start, "error")
+            if is_outage(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        except Exception as e:
+            _observe(endpoint, start, "error")
+            if is_outage(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        limiter.report(host, 200)
+        _observe(endpoint, start, "ok")
+        breaker.record_success()
+        return result
+
+
+def fetch_json(url: str, params: dict = None, endpoint: str = "other", timeout: float = 10):
+    """GET a JSON document from the MLB API, recording call count and latency."""
+    def send():
+        r = requests.get(url, params=params, timeout=timeout)
+        r.raise_for_status()
+        return jsonlib.loads(r.content)
+
+    return _limited(urlparse(url).hostname, endpoint, send)
+
+
+def fetch_parsed(url: str, parse, params: dict = None, endpoint: str = "other", timeout: float = 10):
+    """GET a JSON document and hand the raw (decompressed) body stream to parse(fp).
+
+    For large documents that parse() can consume incrementally, so the body
+    never has to be held in memory as one string plus one big dict.
+    """
+    def send():
+        with requests.get(url, params=params, timeout=timeout, stream=True) as r:
+            r.raise_for_status()
+            r.raw.decode_content = True
+            return parse(r.raw)
+
+    return _limited(urlparse(url).hostname, endpoint, send)
+
+
+def call(endpoint: str, fn, *args, **kwargs):
+    """Invoke a statsapi helper (statsapi.get, player_stat_data, ...) with instrumentation."""
+    return _limited(STATSAPI_HOST, endpoint, lambda: fn(*args, **kwargs))
+
+
+def statsapi_get(endpoint: str, params: dict):
+    """statsapi.get with the statsapi endpoint name used as the metric label."""
+    return call(endpoint, statsapi.get, endpoint, params)
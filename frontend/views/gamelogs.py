@@ -48,10 +48,9 @@ def render():
     # Figure out stat type
     with st.spinner("Loading..."):
         try:
-            requests.post(f"{API}/players/{mlb_id}", timeout=10)
-            profile_resp = requests.get(f"{API}/players/{mlb_id}/profile", timeout=10)
+            profile_resp = requests.get(f"{API}/players/{mlb_id}", timeout=10)
             profile = profile_resp.json()
-            is_pitcher = profile.get("position", "") in ("SP", "RP", "P", "CP")
+            is_pitcher = profile.get("position", "") in ("SP", "RP", "P", "CL")
             stat_type = "pitching" if is_pitcher else "hitting"
 
             logs_resp = requests.get(
@@ -60,6 +59,11 @@ def render():
                 timeout=30,
             )
             logs = logs_resp.json()
+            rolling = requests.get(
+                f"{API}/players/{mlb_id}/gamelogs/rolling",
+                params={"season": season, "stat_type": stat_type},
+                timeout=30,
+            ).json()
         except Exception as e:
             st.error(f"Error: {e}")
             return
@@ -80,21 +84,23 @@ def render():
     df = pd.DataFrame(rows)
     st.dataframe(df, use_container_width=True, hide_index=True)
 
-    # Rolling average chart
-    if not is_pitcher and "avg" in df.columns:
-        st.subheader("📈 Rolling AVG (10-game)")
-        df["avg_num"] = pd.to_numeric(df.get("avg", 0), errors="coerce").fillna(0)
-        df["rolling_avg"] = df["avg_num"].rolling(10, min_periods=1).mean()
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=df["Date"], y=df["avg_num"], name="Game AVG", line=dict(color="#aaaaaa", width=1), opacity=0.5))
-        fig.add_trace(go.Scatter(x=df["Date"], y=df["rolling_avg"], name="10-Game Rolling", line=dict(color="#6c63ff", width=2)))
-        fig.update_layout(height=300, margin=dict(t=10, b=0), hovermode="x unified")
-        st.plotly_chart(fig, use_container_width=True)
+    windows = rolling.get("windows", {})
+    latest = rolling.get("latest", {})
+    metric, label = ("era", "ERA") if is_pitcher else ("ops", "OPS")
+
+    if latest:
+        cols = st.columns(len(latest))
+        for col, (window, values) in zip(cols, latest.items()):
+            col.metric(f"Last {window} G {label}", values.get(metric) if values.get(metric) is not None else "—")
 
-    if is_pitcher and "era" in df.columns:
-        st.subheader("📈 ERA by Game")
-        df["era_num"] = pd.to_numeric(df.get("era", 0), errors="coerce").fillna(0)
+    if windows:
+        st.subheader(f"📈 Rolling {label}")
+        colors = {"7": "#6c63ff", "15": "#f39c12", "30": "#aaaaaa"}
         fig = go.Figure()
-        fig.add_trace(go.Bar(x=df["Date"], y=df["era_num"], name="ERA", marker_color="#f44336"))
-        fig.update_layout(height=300, margin=dict(t=10, b=0))
+        for window, values in windows.items():
+            fig.add_trace(go.Scatter(
+                x=rolling["dates"], y=values.get(metric), name=f"Last {window} games",
+                line=dict(color=colors.get(window, "#888"), width=2 if window == "7" else 1),
+            ))
+        fig.update_layout(height=300, margin=dict(t=10, b=0), hovermode="x unified")
         st.plotly_chart(fig, use_container_width=True)
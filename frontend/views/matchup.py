@@ -1,8 +1,6 @@
 """frontend/views/matchup.py"""
 import streamlit as st
 import requests
-import anthropic, os
-from dotenv import load_dotenv
 
 API_BASE = "http://localhost:8000"
 HEADSHOT_URL = "https://img.mlbstatic.com/mlb-photos/image/upload/v1/people/{mlb_id}/headshot/67/current"
@@ -70,8 +68,6 @@ def render():
                 try:
                     batter_career = requests.get(f"{API_BASE}/players/{batter_id}/stats/career", params={"group": "hitting"}, timeout=15).json()
                     pitcher_career = requests.get(f"{API_BASE}/players/{pitcher_id}/stats/career", params={"group": "pitching"}, timeout=15).json()
-                    batter_info = requests.get(f"{API_BASE}/players/{batter_id}", timeout=10).json()
-                    pitcher_info = requests.get(f"{API_BASE}/players/{pitcher_id}", timeout=10).json()
                 except Exception as e:
                     st.error(f"Error: {e}")
                     return
@@ -110,49 +106,15 @@ def render():
 
             st.markdown('<div class="section-header">AI Matchup Analysis</div>', unsafe_allow_html=True)
 
-            def fmt_hitting(s):
-                if not s: return "No data"
-                st2 = s["stats"]
-                return f"AVG {st2.get('avg','?')} | OBP {st2.get('obp','?')} | SLG {st2.get('slg','?')} | OPS {st2.get('ops','?')} | HR {st2.get('homeRuns','?')} | K {st2.get('strikeOuts','?')}"
-
-            def fmt_pitching(s):
-                if not s: return "No data"
-                st2 = s["stats"]
-                return f"ERA {st2.get('era','?')} | WHIP {st2.get('whip','?')} | K {st2.get('strikeOuts','?')} | BB/9 {st2.get('walksPer9Inn','?')} | K/9 {st2.get('strikeoutsPer9Inn','?')}"
-
-            load_dotenv()
-            client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-
-            batter_lines = "\n".join([f"  {s['season']}: {fmt_hitting(s)}" for s in batter_career[-4:]])
-            pitcher_lines = "\n".join([f"  {s['season']}: {fmt_pitching(s)}" for s in pitcher_career[-4:]])
-
-            prompt = f"""Analyze this MLB matchup between a batter and pitcher.
-
-BATTER: {batter_name} ({batter_info.get('position')}, {batter_info.get('team')})
-Bats: {batter_info.get('bats')} | Recent stats:
-{batter_lines}
-
-PITCHER: {pitcher_name} ({pitcher_info.get('position')}, {pitcher_info.get('team')})
-Throws: {pitcher_info.get('throws')} | Recent stats:
-{pitcher_lines}
-
-Analyze:
-1. **Matchup Advantage** — Who has the edge and why?
-2. **Key Battle** — What's the critical factor in this matchup?
-3. **Batter's Approach** — What should the batter be looking for?
-4. **Pitcher's Strategy** — How should the pitcher attack this hitter?
-5. **Historical Context** — Any relevant trends or patterns?
-6. **Prediction** — In a 10 AB sample, what outcomes would you expect?
-
-Be specific and reference the actual stats."""
-
             with st.spinner("Generating matchup analysis..."):
-                resp = client.messages.create(
-                    model="claude-opus-4-6",
-                    max_tokens=1000,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-            st.markdown(f'<div class="report-body">{resp.content[0].text}</div>', unsafe_allow_html=True)
+                try:
+                    resp = requests.get(f"{API_BASE}/players/{batter_id}/matchup/{pitcher_id}", timeout=180)
+                    resp.raise_for_status()
+                    analysis = resp.json()["analysis"]
+                except Exception as e:
+                    st.error(f"Analysis failed: {e}")
+                    return
+            st.markdown(f'<div class="report-body">{analysis}</div>', unsafe_allow_html=True)
     else:
         st.markdown("""
         <div style="border: 1px dashed #222; padding: 3rem; text-align: center; margin-top: 2rem;">
@@ -1,13 +1,10 @@
 """frontend/views/today.py - Today's Games with pitcher heatmaps"""
+import json
 import streamlit as st
 import requests
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import datetime
-import anthropic
-import os
-from dotenv import load_dotenv
-load_dotenv()
 
 API_BASE = "http://localhost:8000"
 HEADSHOT_URL = "https://img.mlbstatic.com/mlb-photos/image/upload/v1/people/{mlb_id}/headshot/67/current"
@@ -22,14 +19,30 @@ def get_today_games():
         return []
 
 
-def get_pitcher_heatmap(mlb_id: int, season: int = 2024):
+def stream_pitcher_heatmap(mlb_id: int, season: int = 2024, **filters):
+    """Yield the heatmap's NDJSON chunks as the API parses each game feed."""
+    params = {"season": season, "stream": "true", **{k: v for k, v in filters.items() if v and v != "ALL"}}
     try:
-        resp = requests.get(f"{API_BASE}/games/pitcher-heatmap/{mlb_id}", params={"season": season}, timeout=60)
+        with requests.get(f"{API_BASE}/games/pitcher-heatmap/{mlb_id}", params=params, timeout=60, stream=True) as resp:
+            for line in resp.iter_lines():
+                if line:
+                    yield json.loads(line)
+    except Exception as e:
+        yield {"type": "error", "error": str(e)}
+
+
+def get_pitcher_arsenal(mlb_id: int, season: int = 2024):
+    try:
+        resp = requests.get(f"{API_BASE}/players/{mlb_id}/arsenal", params={"season": season}, timeout=15)
         return resp.json()
     except:
         return {}
 
 
+def fmt_pct(value) -> str:
+    return "—" if value is None else f"{value * 100:.1f}%"
+
+
 def get_pitcher_vs_team(pitcher_id: int, team_id: int):
     try:
         resp = requests.get(f"{API_BASE}/games/pitcher-vs-team/{pitcher_id}/{team_id}", timeout=30)
@@ -38,6 +51,14 @@ def get_pitcher_vs_team(pitcher_id: int, team_id: int):
         return []
 
 
+def get_lineup_matchups(pitcher_id: int, team_id: int, season: int = 2024):
+    try:
+        resp = requests.get(f"{API_BASE}/games/matchups/{pitcher_id}/{team_id}", params={"season": season}, timeout=30)
+        return resp.json()
+    except:
+        return {}
+
+
 def draw_strike_zone():
     shapes = [
         # Outer strike zone — brighter, thicker
@@ -61,18 +82,12 @@ def draw_strike_zone():
     return shapes
 
 
-def render_heatmap(pitch_data: dict, pitch_type_filter: str = "ALL", hand_filter: str = "ALL"):
+def render_heatmap(pitch_data: dict, key: str = None):
     if not pitch_data or not pitch_data.get("pitches"):
         st.markdown('<div style="color:#444;font-family:IBM Plex Mono,monospace;font-size:0.7rem;letter-spacing:0.2em;">NO PITCH DATA AVAILABLE</div>', unsafe_allow_html=True)
         return
 
-    pitches = pitch_data["pitches"]
-    df = pd.DataFrame(pitches)
-
-    if pitch_type_filter != "ALL" and "pitch_name" in df.columns:
-        df = df[df["pitch_name"] == pitch_type_filter]
-    if hand_filter != "ALL" and "stand" in df.columns:
-        df = df[df["stand"] == hand_filter]
+    df = pd.DataFrame(pitch_data["pitches"])
 
     if df.empty or "plate_x" not in df.columns:
         st.markdown('<div style="color:#444;font-family:IBM Plex Mono,monospace;font-size:0.7rem;">NO DATA FOR SELECTION</div>', unsafe_allow_html=True)
@@ -142,7 +157,25 @@ def render_heatmap(pitch_data: dict, pitch_type_filter: str = "ALL", hand_filter
             x=1.02, y=1
         ),
     )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig, use_container_width=True, key=key)
+
+
+def load_heatmap_progressively(pitcher_id: int, season: int, **filters) -> dict:
+    """Stream the heatmap, redrawing a provisional chart as each game arrives."""
+    placeholder = st.empty()
+    data = {"pitches": []}
+    for chunk in stream_pitcher_heatmap(pitcher_id, season, **filters):
+        if chunk["type"] == "game" and chunk["pitches"]:
+            data["pitches"].extend(chunk["pitches"])
+            with placeholder.container():
+                st.markdown(f'<div style="font-family:IBM Plex Mono,monospace;font-size:0.6rem;color:#555;letter-spacing:0.2em;">LOADING · {len(data["pitches"])} PITCHES SO FAR</div>', unsafe_allow_html=True)
+                render_heatmap(data, key=f"hm_progress_{pitcher_id}_{len(data['pitches'])}")
+        elif chunk["type"] == "summary":
+            data.update({k: v for k, v in chunk.items() if k != "type"})
+        elif chunk["type"] == "error":
+            data["error"] = chunk["error"]
+    placeholder.empty()
+    return data
 
 
 def render():
@@ -213,58 +246,11 @@ def render():
 
     preview_key = f"preview_{selected_game.get('game_id')}"
     if st.button("⚡ AI Game Preview", key=f"btn_{preview_key}"):
-        away_pitcher = selected_game.get("away_probable_pitcher", "TBD")
-        home_pitcher = selected_game.get("home_probable_pitcher", "TBD")
-        away_pitcher_id = selected_game.get("away_pitcher_id")
-        home_pitcher_id = selected_game.get("home_pitcher_id")
-
         with st.spinner("Generating game preview..."):
-            def get_pitcher_stats(pid):
-                if not pid:
-                    return {}
-                try:
-                    career = requests.get(f"{API_BASE}/players/{pid}/stats/career", params={"group": "pitching"}, timeout=15).json()
-                    info = requests.get(f"{API_BASE}/players/{pid}", timeout=10).json()
-                    recent = career[-3:] if career else []
-                    lines = []
-                    for s in recent:
-                        st2 = s["stats"]
-                        lines.append(f"  {s['season']}: ERA {st2.get('era','?')} | WHIP {st2.get('whip','?')} | K {st2.get('strikeOuts','?')} | W {st2.get('wins','?')} | IP {st2.get('inningsPitched','?')}")
-                    return {"name": info.get("full_name", ""), "throws": info.get("throws",""), "lines": "\n".join(lines)}
-                except:
-                    return {}
-
-            away_stats = get_pitcher_stats(away_pitcher_id)
-            home_stats = get_pitcher_stats(home_pitcher_id)
-
-            prompt = f"""Generate a concise, engaging game preview for tonight's MLB game.
-
-{away} @ {home} at {venue}
-
-AWAY STARTER: {away_pitcher} (Throws: {away_stats.get('throws','?')})
-Recent stats:
-{away_stats.get('lines', 'No data')}
-
-HOME STARTER: {home_pitcher} (Throws: {home_stats.get('throws','?')})
-Recent stats:
-{home_stats.get('lines', 'No data')}
-
-Write a 3-4 paragraph game preview covering:
-1. The pitching matchup and who has the edge
-2. Key storylines or narratives for tonight
-3. What to watch for offensively
-4. Your predicted outcome and final score
-
-Be specific, use the actual stats, and write like a beat reporter."""
-
             try:
-                client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-                resp = client.messages.create(
-                    model="claude-opus-4-6",
-                    max_tokens=800,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                st.session_state[preview_key] = resp.content[0].text
+                resp = requests.get(f"{API_BASE}/games/{selected_game.get('game_id')}/preview", timeout=180)
+                resp.raise_for_status()
+                st.session_state[preview_key] = resp.json()["preview"]
             except Exception as e:
                 st.error(f"Preview failed: {e}")
 
@@ -334,41 +320,71 @@ Be specific, use the actual stats, and write like a beat reporter."""
             # Heatmap — all 3 filters on one row
             st.markdown('<div class="section-header">Pitch Location Heatmap</div>', unsafe_allow_html=True)
 
-            hm_col1, hm_col2, hm_col3 = st.columns([2, 2, 2])
+            hm_col1, hm_col2, hm_col3, hm_col4 = st.columns([2, 2, 2, 2])
             with hm_col1:
                 season_sel = st.selectbox("Season", [2025, 2024, 2023, 2022], key=f"hm_season_{pitcher_id}")
             with hm_col2:
                 hand_filter = st.selectbox("vs Batter Hand", ["ALL", "L", "R"], key=f"hand_{pitcher_id}")
-
-            hm_cache_key = f"heatmap_{pitcher_id}_{season_sel}"
+            with hm_col3:
+                count_filter = st.selectbox("Count", ["ALL", "first_pitch", "ahead", "behind", "even", "two_strikes"],
+                                            key=f"count_{pitcher_id}")
+            # Pitch type options come from the response, so read the last choice before fetching
+            pitch_filter = st.session_state.get(f"pt_{pitcher_id}", "ALL")
+
+            # Filtering and the mix/velocity/zone summary happen server-side
+            hm_cache_key = f"heatmap_{pitcher_id}_{season_sel}_{hand_filter}_{count_filter}_{pitch_filter}"
             if hm_cache_key not in st.session_state:
-                with st.spinner("Loading pitch data..."):
-                    st.session_state[hm_cache_key] = get_pitcher_heatmap(pitcher_id, season_sel)
+                st.session_state[hm_cache_key] = load_heatmap_progressively(
+                    pitcher_id, season_sel, pitch_type=pitch_filter, batter_hand=hand_filter, count=count_filter
+                )
 
             heatmap_data = st.session_state.get(hm_cache_key, {})
 
-            if heatmap_data.get("pitches"):
-                pitch_types = ["ALL"] + sorted(set(p.get("pitch_name","") for p in heatmap_data["pitches"] if p.get("pitch_name")))
-                with hm_col3:
-                    pitch_filter = st.selectbox("Pitch Type", pitch_types, key=f"pt_{pitcher_id}")
+            if heatmap_data.get("season_pitches") or heatmap_data.get("pitches"):
+                pitch_types = ["ALL"] + heatmap_data.get("pitch_types", [])
+                if pitch_filter not in pitch_types:
+                    st.session_state[f"pt_{pitcher_id}"] = "ALL"
+                with hm_col4:
+                    st.selectbox("Pitch Type", pitch_types, key=f"pt_{pitcher_id}")
 
                 total = heatmap_data.get("total_pitches", len(heatmap_data["pitches"]))
+                summary = heatmap_data.get("summary", {})
                 hand_label = f" · VS {hand_filter} BATTERS" if hand_filter != "ALL" else ""
-                st.markdown(f'<div style="font-family:IBM Plex Mono,monospace;font-size:0.6rem;color:#555;letter-spacing:0.2em;margin-bottom:0.5rem;">{total} PITCHES · {season_sel} SEASON · CATCHER\'S PERSPECTIVE{hand_label}</div>', unsafe_allow_html=True)
-                render_heatmap(heatmap_data, pitch_filter, hand_filter)
-
-                df_pitches = pd.DataFrame(heatmap_data["pitches"])
-                if "pitch_name" in df_pitches.columns:
-                    st.markdown('<div class="section-header">Pitch Arsenal</div>', unsafe_allow_html=True)
-                    mix = df_pitches["pitch_name"].value_counts()
-                    mix_pct = (mix / mix.sum() * 100).round(1)
-                    cols = st.columns(min(len(mix), 5))
-                    for col, (pname, pct) in zip(cols, mix_pct.items()):
-                        with col:
-                            st.markdown(f'<div class="stat-card"><div class="stat-label">{pname}</div><div class="stat-value" style="font-size:1.6rem;">{pct}%</div></div>', unsafe_allow_html=True)
+                velo_label = f" · AVG {summary['avg_velocity']} MPH" if summary.get("avg_velocity") else ""
+                stale_label = f" · CACHED AS OF {heatmap_data['as_of'][:16].replace('T', ' ')} UTC" if heatmap_data.get("stale") else ""
+                st.markdown(f'<div style="font-family:IBM Plex Mono,monospace;font-size:0.6rem;color:#555;letter-spacing:0.2em;margin-bottom:0.5rem;">{total} PITCHES · {season_sel} SEASON · CATCHER\'S PERSPECTIVE{hand_label}{velo_label}{stale_label}</div>', unsafe_allow_html=True)
+                render_heatmap(heatmap_data)
             else:
                 st.markdown('<div style="color:#444;font-family:IBM Plex Mono,monospace;font-size:0.65rem;letter-spacing:0.15em;padding:1rem 0;">NO PITCH DATA AVAILABLE FOR THIS SEASON</div>', unsafe_allow_html=True)
 
+            # Full arsenal from stored pitches; the heatmap sample's mix is the fallback
+            arsenal = get_pitcher_arsenal(pitcher_id, season_sel)
+            mix = heatmap_data.get("summary", {}).get("pitch_mix", [])
+            if arsenal.get("arsenal"):
+                st.markdown('<div class="section-header">Pitch Arsenal</div>', unsafe_allow_html=True)
+                df_arsenal = pd.DataFrame([
+                    {
+                        "Pitch": a["pitch_name"] or a["pitch_type"],
+                        "Usage": fmt_pct(a["usage"]),
+                        "Velo": a["velocity"]["mean"],
+                        "Velo P10–P90": f'{a["velocity"]["p10"]}–{a["velocity"]["p90"]}',
+                        "Zone%": fmt_pct(a["zone_rate"]),
+                        "Chase%": fmt_pct(a["chase_rate"]),
+                        "Whiff%": fmt_pct(a["whiff_rate"]),
+                        "CSW%": fmt_pct(a["csw_rate"]),
+                    }
+                    for a in arsenal["arsenal"]
+                ])
+                st.dataframe(df_arsenal, use_container_width=True, hide_index=True)
+                st.markdown(f'<div style="font-family:IBM Plex Mono,monospace;font-size:0.6rem;color:#555;letter-spacing:0.2em;">{arsenal["pitches"]} STORED PITCHES · {season_sel}</div>', unsafe_allow_html=True)
+            elif mix:
+                st.markdown('<div class="section-header">Pitch Arsenal</div>', unsafe_allow_html=True)
+                cols = st.columns(min(len(mix), 5))
+                for col, m in zip(cols, mix):
+                    velo = f"{m['avg_velocity']} MPH" if m.get("avg_velocity") else ""
+                    with col:
+                        st.markdown(f'<div class="stat-card"><div class="stat-label">{m["pitch_name"]}</div><div class="stat-value" style="font-size:1.6rem;">{m["pct"]}%</div><div class="stat-label">{velo}</div></div>', unsafe_allow_html=True)
+
             opp_logo = TEAM_LOGO_URL.format(team_id=pitcher["opponent_id"])
             st.markdown(f"""
             <div class="section-header" style="display:flex;align-items:center;gap:0.5rem;">
@@ -392,3 +408,24 @@ Be specific, use the actual stats, and write like a beat reporter."""
                     st.dataframe(df_display, use_container_width=True, hide_index=True)
             else:
                 st.markdown('<div style="color:#333;font-family:IBM Plex Mono,monospace;font-size:0.65rem;letter-spacing:0.15em;">NO HEAD-TO-HEAD DATA AVAILABLE</div>', unsafe_allow_html=True)
+
+            # Modeled per-PA outcomes: season rates and platoon splits, regressed for small samples
+            matchups = get_lineup_matchups(pitcher_id, pitcher["opponent_id"], season_sel)
+            if matchups.get("batters"):
+                st.markdown(f'<div class="section-header">VS {pitcher["opponent"].upper()} — MODELED MATCHUPS ({season_sel})</div>', unsafe_allow_html=True)
+                df_model = pd.DataFrame([
+                    {
+                        "Batter": b["full_name"],
+                        "POS": b["position"],
+                        "Bats": b["bats"],
+                        "K%": fmt_pct(b["probabilities"]["k"]),
+                        "BB%": fmt_pct(b["probabilities"]["bb"]),
+                        "HR%": fmt_pct(b["probabilities"]["hr"]),
+                        "xAVG": f'{b["avg"]:.3f}',
+                        "xOBP": f'{b["obp"]:.3f}',
+                        "xSLG": f'{b["slg"]:.3f}',
+                        "PA vs Hand": b["batter_pa"],
+                    }
+                    for b in matchups["batters"]
+                ])
+                st.dataframe(df_model, use_container_width=True, hide_index=True)
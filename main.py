@@ -1,11 +1,18 @@
 """main.py"""
-from fastapi import FastAPI
+import time
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from app.core import metrics, profiler
+from app.core.auth import is_admin, require_admin
+from app.core.config import get_settings
+from app.core.responses import TimedJSONResponse
 from app.api.players import router as players_router
 from app.api.games import router as games_router
-from app.db.session import init_db
+from app.api.leaders import router as leaders_router
+from app.api.llm import router as llm_router
 
-app = FastAPI(title="ScoutingReport API", version="1.0.0")
+app = FastAPI(title="ScoutingReport API", version="1.0.0", default_response_class=TimedJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,13 +21,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.on_event("startup")
-def startup():
-    init_db()
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    state = metrics.start_request(request.scope)
+    start = time.perf_counter()
+    status = 500
+    prof = None
+    settings = get_settings()
+    # profiles are written to disk, so only admins can ask for one
+    if settings.PROFILING_ENABLED and (
+        request.query_params.get("profile") == "1" or request.headers.get("x-profile") == "1"
+    ) and is_admin(request.headers.get("x-admin-token"), request.headers.get("authorization")):
+        prof = profiler.SamplingProfiler(settings.PROFILE_INTERVAL_MS / 1000).start()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        if prof is not None:
+            prof.stop()
+            response.headers["X-Profile-Id"] = profiler.save_profile(prof, settings.PROFILE_DIR)
+            prof = None
+        response.headers["Server-Timing"] = metrics.server_timing_header(state, time.perf_counter() - start)
+        return response
+    finally:
+        if prof is not None:
+            prof.stop()
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        metrics.http_latency.observe(time.perf_counter() - start, request.method, route_path)
+        metrics.http_requests.inc(request.method, route_path, str(status))
+        metrics.db_queries_per_request.observe(state["db_queries"], route_path)
 
 app.include_router(players_router, prefix="/players", tags=["players"])
 app.include_router(games_router, prefix="/games", tags=["games"])
+app.include_router(leaders_router, prefix="/leaders", tags=["leaders"])
+app.include_router(llm_router, prefix="/llm", tags=["llm"])
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_admin)])
+def prometheus_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profiles/{profile_id}", include_in_schema=False, dependencies=[Depends(require_admin)])
+def get_profile(profile_id: str):
+    folded = profiler.load_profile(profile_id, get_settings().PROFILE_DIR)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(folded)
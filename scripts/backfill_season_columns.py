@@ -0,0 +1,33 @@
+"""Populate the typed stat columns on sr_player_seasons from each row's JSON stats."""
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from app.db.session import init_db, new_session
+from app.db.models import PlayerSeason
+from app.services.statlines import typed_columns
+
+BATCH = 500
+
+init_db()
+db = new_session()
+updated = 0
+last_id = 0
+try:
+    while True:
+        rows = (
+            db.query(PlayerSeason)
+            .filter(PlayerSeason.id > last_id)
+            .order_by(PlayerSeason.id)
+            .limit(BATCH)
+            .all()
+        )
+        if not rows:
+            break
+        for row in rows:
+            for column, value in typed_columns(row.stat_group, row.stats or {}).items():
+                setattr(row, column, value)
+        db.commit()
+        updated += len(rows)
+        last_id = rows[-1].id
+finally:
+    db.close()
+print(f"Backfilled {updated} rows")
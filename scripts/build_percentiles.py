@@ -0,0 +1,18 @@
+"""Recompute league percentile ranks for the given seasons.
+
+Usage: python scripts/build_percentiles.py 2024 [2023 ...]
+"""
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from app.db.session import new_session
+from app.services.percentiles import PercentileService
+
+seasons = [int(a) for a in sys.argv[1:]] or [2024]
+db = new_session()
+try:
+    for season in seasons:
+        for group in ("hitting", "pitching"):
+            n = PercentileService(db).rebuild(season, group)
+            print(f"{season} {group}: {n} players")
+finally:
+    db.close()
@@ -0,0 +1,27 @@
+"""Write stored pitches (sr_pitches) into the Parquet archive, one file per pitcher-season.
+
+Needs pyarrow. Usage: python scripts/build_pitch_archive.py 2024 [2023 ...] [--pitchers 543037,592450]
+"""
+import argparse
+import logging
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from app.db.session import new_session
+from app.services.archive import PitchArchive
+
+parser = argparse.ArgumentParser()
+parser.add_argument("seasons", type=int, nargs="*", default=[2024])
+parser.add_argument("--pitchers", default="", help="comma-separated MLB ids (default: every pitcher with stored pitches)")
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+pitchers = [int(x) for x in args.pitchers.split(",") if x.strip()] or None
+archive = PitchArchive()
+db = new_session()
+try:
+    for season in args.seasons:
+        n = archive.export_from_db(db, season, pitchers)
+        print(f"{season}: {n} pitcher partitions written to {archive.root}")
+finally:
+    db.close()
@@ -0,0 +1,30 @@
+"""Import Baseball Savant (Statcast) CSV exports into sr_pitches in bounded memory.
+
+Usage: python scripts/import_statcast_csv.py export.csv [more.csv ...] [--chunk-rows 50000] [--archive]
+
+--archive also writes the imported pitches to the Parquet archive (needs pyarrow).
+"""
+import argparse
+import logging
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from app.db.session import new_session
+from app.services.archive import PitchArchive
+from app.services.statcast import CHUNK_ROWS, StatcastImporter
+
+parser = argparse.ArgumentParser()
+parser.add_argument("paths", nargs="+")
+parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+parser.add_argument("--archive", action="store_true", help="also write to the Parquet pitch archive")
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+db = new_session()
+try:
+    importer = StatcastImporter(db, PitchArchive() if args.archive else None, args.chunk_rows)
+    for path in args.paths:
+        stats = importer.run(path, progress=lambda s: print(f"  {s['rows']} rows read, {s['inserted']} inserted"))
+        print(f"{path}: {stats['inserted']} pitches inserted, {stats['skipped']} duplicates or unkeyed rows skipped")
+finally:
+    db.close()
@@ -0,0 +1,50 @@
+"""Store plate appearances and pitches for a season's completed games, parsing feeds on a process pool.
+
+Usage: python scripts/ingest_game_feeds.py [--season 2024] [--start 2024-04-01] [--end 2024-04-30]
+                                           [--workers N] [--fetchers 8] [--limit N] [--force]
+"""
+import argparse
+import logging
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from app.db.session import new_session
+from app.services import upstream
+from app.services.ingest import FETCH_WORKERS, FeedIngestor
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--season", type=int, default=2024)
+    parser.add_argument("--start", default=None, help="first schedule date (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="last schedule date (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count; 1 parses inline)")
+    parser.add_argument("--fetchers", type=int, default=FETCH_WORKERS, help="concurrent feed downloads")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="re-ingest games that are already stored")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    db = new_session()
+    try:
+        ingestor = FeedIngestor(
+            db, args.workers, args.fetchers,
+            progress=lambda s: print(f"  {s['stored']} stored, {s['failed']} failed, {s['pitches']} pitches"),
+        )
+        with upstream.background():
+            game_pks = ingestor.season_game_pks(args.season, args.start, args.end)
+            if not args.force:
+                game_pks = ingestor.pending(game_pks)
+            if args.limit:
+                game_pks = game_pks[:args.limit]
+            print(f"{len(game_pks)} games to ingest with {ingestor.workers} parser processes")
+            stats = ingestor.run(game_pks)
+        print(f"{stats['stored']} games, {stats['plate_appearances']} PAs, {stats['pitches']} pitches "
+              f"in {stats['seconds']}s ({stats['failed']} failed)")
+    finally:
+        db.close()
+
+
+# the guard keeps spawned parser processes from re-running the CLI
+if __name__ == "__main__":
+    main()
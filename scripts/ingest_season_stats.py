@@ -0,0 +1,22 @@
+"""Load league-wide season stats into sr_player_seasons and rebuild leaderboards.
+
+Usage: python scripts/ingest_season_stats.py 2024 [2023 ...]
+"""
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from app.db.session import new_session
+from app.services.leaders import LeaderboardService
+from app.services import upstream
+from app.services.mlb import MLBService
+
+seasons = [int(a) for a in sys.argv[1:]] or [2024]
+db = new_session()
+try:
+    for season in seasons:
+        for group in ("hitting", "pitching"):
+            with upstream.background():
+                n = MLBService(db).ingest_league_season(season, group)
+            LeaderboardService(db).ensure_fresh(season, group)
+            print(f"{season} {group}: {n} player lines")
+finally:
+    db.close()
@@ -0,0 +1,44 @@
+"""Pregenerate default scouting reports in bulk with the message batches API.
+
+Usage: python scripts/pregenerate_reports.py [--season 2024] [--featured 660271,592450]
+                                             [--top-viewed 200] [--no-rosters] [--limit N]
+                                             [--force] [--backend anthropic|local]
+"""
+import argparse
+import logging
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from app.db.session import new_session
+from app.services import llm, upstream
+from app.services.pregenerate import ReportPregenerator
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--season", type=int, default=2024)
+parser.add_argument("--featured", default="", help="comma-separated MLB ids to always include")
+parser.add_argument("--top-viewed", type=int, default=200)
+parser.add_argument("--no-rosters", action="store_true", help="skip active-roster players")
+parser.add_argument("--limit", type=int, default=None)
+parser.add_argument("--force", action="store_true", help="regenerate players that already have a report")
+parser.add_argument("--backend", choices=["anthropic", "local"], default="anthropic")
+parser.add_argument("--poll", type=float, default=30.0, help="seconds between batch status checks")
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+featured = [int(x) for x in args.featured.split(",") if x.strip()]
+backend = llm.LocalBatches() if args.backend == "local" else llm.AnthropicBatches()
+
+db = new_session()
+try:
+    pregen = ReportPregenerator(db, backend)
+    with upstream.background():
+        mlb_ids = pregen.select_players(
+            args.season, featured, args.top_viewed, rosters=not args.no_rosters, force=args.force
+        )
+        if args.limit:
+            mlb_ids = mlb_ids[:args.limit]
+        print(f"{len(mlb_ids)} players selected for {args.season}")
+        saved = pregen.run(args.season, mlb_ids, poll_interval=args.poll)
+    print(f"{saved} reports written")
+finally:
+    db.close()
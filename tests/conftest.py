@@ -0,0 +1,27 @@
+"""Shared fixtures: a scratch SQLite database and shared cache per test."""
+import pytest
+from app.core.cache import get_cache
+from app.core.config import get_settings
+from app.db.models import Base
+from app.db.session import get_engine, new_session
+
+
+def _reset():
+    get_settings.cache_clear()
+    get_cache.cache_clear()
+    get_engine.cache_clear()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A session on an empty schema; new_session() and get_cache() point at the same scratch files."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    monkeypatch.setenv("CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setenv("RATE_LIMIT_PATH", str(tmp_path / "ratelimit.sqlite3"))
+    _reset()
+    Base.metadata.create_all(get_engine())
+    session = new_session()
+    yield session
+    session.close()
+    get_engine().dispose()
+    _reset()
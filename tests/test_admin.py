@@ -0,0 +1,55 @@
+"""Operational endpoints answer only to ADMIN_TOKEN."""
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import get_settings
+from app.services import ingest
+from main import app
+
+TOKEN = "s3cret"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", TOKEN)
+    get_settings.cache_clear()
+    yield TestClient(app)
+    get_settings.cache_clear()
+
+
+def test_metrics_need_the_admin_token(client):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"X-Admin-Token": TOKEN}).status_code == 200
+    assert client.get("/metrics", headers={"Authorization": f"Bearer {TOKEN}"}).status_code == 200
+
+
+def test_metrics_are_off_without_a_token(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "")
+    get_settings.cache_clear()
+    try:
+        assert TestClient(app).get("/metrics", headers={"X-Admin-Token": ""}).status_code == 404
+    finally:
+        get_settings.cache_clear()
+
+
+def test_profiles_need_the_admin_token(client, monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILING_ENABLED", "true")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    get_settings.cache_clear()
+
+    assert "X-Profile-Id" not in client.get("/health?profile=1").headers
+    profile_id = client.get("/health?profile=1", headers={"X-Admin-Token": TOKEN}).headers["X-Profile-Id"]
+
+    assert client.get(f"/debug/profiles/{profile_id}").status_code == 401
+    assert client.get(f"/debug/profiles/{profile_id}", headers={"X-Admin-Token": TOKEN}).status_code == 200
+
+
+def test_starting_an_ingest_job_needs_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(ingest, "start_job", lambda season, workers, limit: "job-1")
+    monkeypatch.setattr(ingest, "job_status", lambda job_id: {"job_id": job_id, "state": "running"})
+
+    assert client.post("/games/ingest?season=2024").status_code == 401
+    response = client.post("/games/ingest?season=2024", headers={"Authorization": f"Bearer {TOKEN}"})
+    assert response.status_code == 202 and response.json()["job_id"] == "job-1"
+    # progress stays readable without the token
+    assert client.get("/games/ingest/job-1").status_code == 200
@@ -0,0 +1,48 @@
+"""Parquet pitch archive: merge rules and concurrent partition writes."""
+import threading
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app.services.archive import PitchArchive  # noqa: E402
+
+
+def _pitch(game_pk, at_bat, pitch_number=1, description="ball", pitcher_id=543037, season=2024):
+    return {
+        "game_pk": game_pk, "at_bat_number": at_bat, "pitch_number": pitch_number, "game_date": "2024-04-02",
+        "season": season, "pitcher_id": pitcher_id, "batter_id": 592450, "description": description,
+    }
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return PitchArchive(str(tmp_path))
+
+
+def test_write_keeps_the_stored_copy_of_a_pitch(archive):
+    assert archive.write(archive.to_table([_pitch(1, 1, description="Statcast")])) == 1
+    archive.write(archive.to_table([_pitch(1, 1, description="feed"), _pitch(1, 2), _pitch(1, 2, description="again")]))
+
+    rows = archive.read_rows(543037)
+    assert [(r["at_bat_number"], r["description"]) for r in rows] == [(1, "Statcast"), (2, "ball")]
+
+
+def test_write_splits_partitions(archive):
+    table = archive.to_table([_pitch(1, 1), _pitch(1, 2, pitcher_id=605400), _pitch(2, 1, season=2023)])
+
+    assert archive.write(table) == 3
+    assert archive.seasons(543037) == [2023, 2024]
+    assert len(archive.read_rows(605400)) == 1
+
+
+def test_concurrent_writers_to_one_partition_lose_no_pitches(archive):
+    def write(game_pk):
+        archive.write(archive.to_table([_pitch(game_pk, ab) for ab in range(1, 51)]))
+
+    threads = [threading.Thread(target=write, args=(game_pk,)) for game_pk in range(1, 9)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(archive.read_rows(543037, columns=["game_pk"])) == 8 * 50
@@ -0,0 +1,116 @@
+"""Outage handling: the circuit breaker, outage classification and the vs-team build."""
+import pytest
+import requests
+from app.api import games
+from app.core.breaker import CircuitBreaker, CircuitOpenError
+from app.services import upstream
+
+
+def _http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status}", response=response)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.breaker.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", threshold=3, cooldown=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    breaker.before_call()
+    breaker.record_success()  # a success resets the streak
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker("test", threshold=1, cooldown=30)
+    breaker.record_failure()
+    clock[0] += 31
+
+    breaker.before_call()  # the trial
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()  # failed trial re-opens for another cooldown
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock[0] += 31
+    breaker.before_call()
+    breaker.record_success()
+    breaker.before_call()
+    breaker.before_call()
+
+
+@pytest.mark.parametrize("exc, outage", [
+    (_http_error(500), True),
+    (_http_error(503), True),
+    (_http_error(429), True),
+    (_http_error(404), False),
+    (_http_error(400), False),
+    (requests.Timeout(), True),
+    (requests.ConnectionError(), True),
+    (CircuitOpenError("open"), True),
+    (ValueError("bad json"), False),
+])
+def test_outage_classification(exc, outage):
+    assert upstream.is_outage(exc) is outage
+
+
+def test_open_circuit_short_circuits_without_sending(monkeypatch):
+    breaker = CircuitBreaker("test_short", threshold=1)
+    breaker.record_failure()
+    monkeypatch.setattr(upstream, "get_breaker", lambda name: breaker)
+    sent = []
+
+    with pytest.raises(CircuitOpenError):
+        upstream._limited("statsapi.mlb.com", "test_short", lambda: sent.append(1))
+    assert sent == []
+
+
+@pytest.fixture
+def roster(db, monkeypatch):
+    players = [
+        {"person": {"id": pid, "fullName": f"Batter {pid}"}, "position": {"abbreviation": "SS"}}
+        for pid in (1, 2, 3)
+    ]
+    monkeypatch.setattr(games, "_roster", lambda team_id: players)
+
+
+def _vs_line(at_bats: int) -> dict:
+    return {"stats": [{"type": {"displayName": "vsPlayerTotal"}, "splits": [{"stat": {"atBats": at_bats, "hits": 2}}]}]}
+
+
+def test_vs_team_skips_a_batter_with_a_client_error(roster, monkeypatch):
+    def fetch_json(url, params, endpoint):
+        if params["opposingPlayerId"] == 2:
+            raise _http_error(404)
+        return _vs_line(10) if params["opposingPlayerId"] == 1 else {}
+
+    monkeypatch.setattr(upstream, "fetch_json", fetch_json)
+    lines = games._build_vs_team(99, 147)
+
+    assert [line["mlb_id"] for line in lines] == [1]
+
+
+@pytest.mark.parametrize("error", [_http_error(503), requests.Timeout(), CircuitOpenError("open")])
+def test_vs_team_fails_the_build_during_an_outage(roster, monkeypatch, error):
+    def fetch_json(url, params, endpoint):
+        if params["opposingPlayerId"] == 2:
+            raise error
+        return _vs_line(10)
+
+    monkeypatch.setattr(upstream, "fetch_json", fetch_json)
+    with pytest.raises(type(error)):
+        games._build_vs_team(99, 147)
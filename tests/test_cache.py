@@ -0,0 +1,149 @@
+"""Shared SQLite cache: TTLs, LRU eviction, leases and stale-while-revalidate."""
+import threading
+import time
+import types
+import pytest
+from app.core import cache as cache_module
+from app.core.cache import SharedCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return SharedCache(str(tmp_path / "cache.sqlite3"), max_entries=3)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_entries_expire_but_stay_readable_as_stale(cache, clock):
+    cache.set("k", {"v": 1}, ttl=10)
+    clock.now += 5
+    assert cache.get("k") == {"v": 1}
+
+    clock.now += 6
+    assert cache.get("k", "gone") == "gone"
+    value, stored_at, expires_at = cache.get_entry("k")
+    assert value == {"v": 1} and expires_at - stored_at == 10
+
+
+def test_get_or_set_fetches_once_and_skips_none(cache):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return [1, 2]
+
+    assert cache.get_or_set("k", 60, fetch) == [1, 2]
+    assert cache.get_or_set("k", 60, fetch) == [1, 2]
+    assert len(calls) == 1
+
+    assert cache.get_or_set("none", 60, lambda: None) is None
+    assert cache.get_entry("none") is None
+
+
+def test_ttl_can_depend_on_the_value(cache, clock):
+    cache.get_or_set("final", lambda v: 3600 if v["final"] else 30, lambda: {"final": True})
+    cache.get_or_set("live", lambda v: 3600 if v["final"] else 30, lambda: {"final": False})
+    clock.now += 60
+
+    assert cache.get("final") == {"final": True}
+    assert cache.get("live") is None
+
+
+def test_evict_drops_the_least_recently_used(cache, clock):
+    for key in ("a", "b", "c", "d"):
+        cache.set(key, key, ttl=86400)
+        clock.now += 1
+    # reads re-stamp accessed_at once _TOUCH_INTERVAL has passed
+    clock.now += cache_module._TOUCH_INTERVAL + 1
+    cache.get("a")
+
+    cache.evict()
+
+    assert [k for k in "abcd" if cache.get(k) is not None] == ["a", "c", "d"]
+
+
+def test_evict_keeps_the_file_under_its_byte_budget(tmp_path, clock):
+    cache = SharedCache(str(tmp_path / "cache.sqlite3"), max_bytes=1000)
+    for i in range(10):
+        cache.set(f"k{i}", "x" * 200, ttl=86400)
+        clock.now += 1
+
+    cache.evict()
+
+    kept = [i for i in range(10) if cache.get(f"k{i}") is not None]
+    assert kept == list(range(10 - len(kept), 10)) and len(kept) * 202 <= 900
+
+
+def test_leases_are_exclusive_until_released_or_expired(cache, clock):
+    assert cache.try_lease("job", 30)
+    assert not cache.try_lease("job", 30)
+
+    cache.release_lease("job")
+    assert cache.try_lease("job", 30)
+
+    clock.now += 31
+    assert cache.try_lease("job", 30)
+
+
+def test_a_miss_fetches_inline_and_propagates_errors(cache):
+    assert cache.get_or_revalidate("k", 60, lambda: 1) == (1, cache_module.time.time(), False)
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_revalidate("other", 60, boom)
+
+
+def test_stale_entries_are_served_while_one_refresh_runs(cache, clock):
+    cache.set("k", "old", ttl=10)
+    clock.now += 11
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "new"
+
+    assert cache.get_or_revalidate("k", 10, fetch)[::2] == ("old", True)
+    # the first refresh holds the lease, so a second stale read doesn't start another
+    assert cache.get_or_revalidate("k", 10, fetch)[::2] == ("old", True)
+    release.set()
+    _wait_for(lambda: cache.get("k") == "new")
+
+    assert len(calls) == 1
+    assert cache.get_or_revalidate("k", 10, fetch)[::2] == ("new", False)
+
+
+def test_a_failed_refresh_keeps_the_last_good_value(cache, clock):
+    cache.set("k", "good", ttl=10)
+    clock.now += 11
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    assert cache.revalidate("k", 10, boom)
+    _wait_for(lambda: cache.try_refresh_lease("k"))
+
+    assert cache.get_entry("k")[0] == "good"
@@ -0,0 +1,96 @@
+"""Comparable player-seasons: the incremental feature index and its queries."""
+import pytest
+from app.db.models import Player, PlayerSeason
+from app.services import comps
+from app.services.comps import CompsIndex, CompsService
+
+POWER = dict(avg=".250", obp=".340", slg=".540", homeRuns=40, walks=70, strikeOuts=170, stolenBases=2)
+CONTACT = dict(avg=".310", obp=".360", slg=".420", homeRuns=8, walks=40, strikeOuts=60, stolenBases=25)
+
+
+def _season(db, mlb_id, season=2024, pa=600, team="NYY", **stats):
+    if db.get(Player, mlb_id) is None:
+        db.add(Player(mlb_id=mlb_id, full_name=f"Player {mlb_id}", birth_date="1995-06-01"))
+    row = PlayerSeason(mlb_id=mlb_id, season=season, team=team, stat_group="hitting", stats={"plateAppearances": pa, **stats})
+    db.add(row)
+    db.commit()
+    return row
+
+
+@pytest.fixture
+def league(db):
+    _season(db, 1, **POWER)
+    _season(db, 2, **{**POWER, "avg": ".245", "homeRuns": 38})
+    _season(db, 3, **CONTACT)
+    _season(db, 4, **{**CONTACT, "avg": ".305", "stolenBases": 30})
+    _season(db, 5, **{**POWER, "avg": ".270", "slg": ".480", "homeRuns": 25, "strikeOuts": 120})
+    return db
+
+
+@pytest.mark.parametrize("metric", ["cosine", "mahalanobis"])
+def test_nearest_comps_share_a_profile(league, metric):
+    index = CompsIndex("hitting")
+    index.update(league)
+
+    power = index.query(1, 2024, k=2, metric=metric)
+    contact = index.query(3, 2024, k=1, metric=metric)
+
+    assert power[0]["mlb_id"] == 2 and contact[0]["mlb_id"] == 4
+    assert power[0]["similarity"] >= power[1]["similarity"]
+
+
+def test_own_seasons_and_unqualified_lines_are_left_out(league):
+    _season(league, 2, season=2023, **POWER)
+    _season(league, 6, pa=20, **POWER)
+    index = CompsIndex("hitting")
+    index.update(league)
+
+    assert (6, 2024) not in index.positions
+    found = index.query(2, 2024, k=10)
+    assert {c["mlb_id"] for c in found} == {1, 3, 4, 5}
+
+
+def test_update_only_pulls_changed_rows(league):
+    index = CompsIndex("hitting")
+    assert index.update(league) == 5
+    assert index.update(league) == 0
+
+    _season(league, 7, **CONTACT)
+    assert index.update(league) == 1
+    assert index.query(3, 2024, k=1)[0]["mlb_id"] == 7
+
+
+def test_in_place_updates_replace_the_stale_vector(league):
+    index = CompsIndex("hitting")
+    index.update(league)
+    row = league.query(PlayerSeason).filter_by(mlb_id=5).one()
+
+    # player 5 turns into a contact hitter mid-season
+    row.stats = {"plateAppearances": 620, **CONTACT}
+    league.commit()
+
+    assert index.update(league) == 1
+    assert len(index.keys) == 5
+    assert index.query(5, 2024, k=1)[0]["mlb_id"] in (3, 4)
+
+
+def test_a_traded_players_season_total_stands_for_the_season(db):
+    _season(db, 1, pa=250, team="MIA", **CONTACT)
+    _season(db, 1, pa=600, team="TOT", **POWER)
+    _season(db, 2, **POWER)
+    _season(db, 3, **CONTACT)
+    index = CompsIndex("hitting")
+    index.update(db)
+
+    assert len(index.keys) == 3
+    assert index.query(1, 2024, k=1)[0]["mlb_id"] == 2
+
+
+def test_service_defaults_to_the_latest_season(league, monkeypatch):
+    monkeypatch.setattr(comps, "_indexes", {})
+    _season(league, 1, season=2023, **CONTACT)
+
+    found = CompsService(league).get_comps(1, k=1)
+
+    assert found == [{"mlb_id": 2, "season": 2024, "similarity": found[0]["similarity"], "full_name": "Player 2", "for_season": 2024}]
+    assert CompsService(league).get_comps(99) == []
@@ -0,0 +1,69 @@
+"""Game-feed parsing (streamed and whole-document) and storage."""
+import io
+import json
+import os
+import sys
+import pytest
+from app.db.models import PlateAppearance, Pitch
+from app.services.gamefeed import GameFeedStore, parse_game_feed, parse_game_stream
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "game_feed_sample.json")
+
+
+def _raw() -> bytes:
+    with open(FIXTURE, "rb") as f:
+        return f.read()
+
+
+def _plain(parsed: dict) -> dict:
+    return {**parsed, "pitches": list(parsed["pitches"].rows())}
+
+
+def test_streamed_parse_matches_the_whole_document_parse():
+    pytest.importorskip("ijson")
+    streamed = _plain(parse_game_stream(io.BytesIO(_raw())))
+    whole = _plain(parse_game_feed(json.loads(_raw())))
+
+    assert streamed == whole
+
+
+def test_stream_falls_back_without_ijson(monkeypatch):
+    monkeypatch.setitem(sys.modules, "ijson", None)
+
+    assert _plain(parse_game_stream(io.BytesIO(_raw()))) == _plain(parse_game_feed(json.loads(_raw())))
+
+
+def test_feed_rows():
+    parsed = _plain(parse_game_stream(io.BytesIO(_raw())))
+
+    assert (parsed["final"], parsed["game_pk"], parsed["season"], parsed["game_date"]) == (True, 745301, 2024, "2024-04-02")
+    # the caught-stealing play's pitch is kept, but it ended no plate appearance
+    assert [pa["event_type"] for pa in parsed["plate_appearances"]] == ["strikeout", "home_run"]
+    assert len(parsed["pitches"]) == 7
+    strikeout = parsed["plate_appearances"][0]
+    assert (strikeout["is_ab"], strikeout["is_k"], strikeout["num_pitches"], strikeout["batter_home"]) == (1, 1, 4, "N")
+    # pre-pitch count, and the pickoff attempt between pitches 2 and 3 isn't a pitch
+    third = parsed["pitches"][2]
+    assert (third["pitch_number"], third["balls"], third["strikes"], third["pitch_type"]) == (3, 1, 1, "SL")
+    assert third["start_speed"] == pytest.approx(88.1)
+    in_play = parsed["pitches"][5]
+    assert in_play["is_in_play"] == 1 and in_play["start_speed"] is None and in_play["zone"] is None
+
+
+def test_store_keeps_pitches_imported_from_statcast(db):
+    db.add_all([
+        # same key as the feed's first pitch, and one the feed doesn't have
+        Pitch(game_pk=745301, at_bat_number=1, pitch_number=1, pitcher_id=543037, batter_id=592450, description="Statcast"),
+        Pitch(game_pk=745301, at_bat_number=9, pitch_number=1, pitcher_id=543037, batter_id=592450, description="Statcast"),
+    ])
+    db.commit()
+    store = GameFeedStore(db)
+
+    assert store.store(parse_game_stream(io.BytesIO(_raw()))) == 2
+    assert store.store(parse_game_stream(io.BytesIO(_raw()))) == 2
+
+    assert db.query(PlateAppearance).count() == 2
+    assert db.query(Pitch).count() == 8
+    kept = db.query(Pitch).filter_by(game_pk=745301, at_bat_number=1, pitch_number=1).one()
+    assert kept.description == "Statcast"
+    assert db.query(Pitch).filter_by(at_bat_number=9).count() == 1
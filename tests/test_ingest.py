@@ -0,0 +1,52 @@
+"""Bulk feed ingestion: upstream priority and the in-flight bound."""
+import threading
+import time
+import pytest
+from app.services import ingest, upstream
+from app.services.ingest import FeedIngestor
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """Record the upstream priority each fetch sees and how many games are in flight."""
+    seen = {"priorities": [], "in_flight": 0, "max_in_flight": 0}
+    lock = threading.Lock()
+
+    def fetch_parsed(url, parse, **kwargs):
+        with lock:
+            seen["priorities"].append(upstream._priority.get())
+            seen["in_flight"] += 1
+            seen["max_in_flight"] = max(seen["max_in_flight"], seen["in_flight"])
+        time.sleep(0.01)
+        return b"{}"
+
+    def store(self, parsed, stats):
+        with lock:
+            seen["in_flight"] -= 1
+        stats["stored"] += 1
+
+    monkeypatch.setattr(upstream, "fetch_parsed", fetch_parsed)
+    monkeypatch.setattr(ingest, "parse_feed_bytes", lambda raw, gp: {"game_pk": gp})
+    monkeypatch.setattr(FeedIngestor, "_store", store)
+    return seen
+
+
+def test_fetch_threads_keep_the_callers_background_priority(fetches):
+    with upstream.background():
+        stats = FeedIngestor(None, workers=1, fetchers=4).run(list(range(10)))
+
+    assert stats["stored"] == 10
+    assert fetches["priorities"] == ["background"] * 10
+
+
+def test_fetch_threads_default_to_interactive(fetches):
+    FeedIngestor(None, workers=1, fetchers=4).run(list(range(3)))
+
+    assert fetches["priorities"] == ["interactive"] * 3
+
+
+def test_games_in_flight_stay_within_the_bound(fetches):
+    stats = FeedIngestor(None, workers=1, fetchers=8, max_in_flight=3).run(list(range(30)))
+
+    assert stats["stored"] == 30 and stats["failed"] == 0
+    assert fetches["max_in_flight"] <= 3
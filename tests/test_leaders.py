@@ -0,0 +1,56 @@
+"""Leaderboard rebuilds from the typed season columns."""
+from app.db.models import Player, PlayerSeason
+from app.services.leaders import LeaderboardService
+from app.services.statlines import typed_columns
+
+
+def _season(db, mlb_id, name, **stats):
+    db.add(Player(mlb_id=mlb_id, full_name=name))
+    row = PlayerSeason(mlb_id=mlb_id, season=2024, team="NYY", stat_group="hitting", stats=stats)
+    for column, value in typed_columns("hitting", stats).items():
+        setattr(row, column, value)
+    db.add(row)
+    db.commit()
+    return row
+
+
+def _ids(board):
+    return [line["mlb_id"] for line in board["leaders"]]
+
+
+def test_rate_stats_default_to_qualified_players(db):
+    _season(db, 1, "Regular", plateAppearances=600, avg=".310", homeRuns=30)
+    _season(db, 2, "Callup", plateAppearances=1, avg="1.000", homeRuns=1)
+    _season(db, 3, "Slugger", plateAppearances=550, avg=".250", homeRuns=45)
+    svc = LeaderboardService(db)
+    svc.refresh(2024, "hitting")
+
+    board = svc.get_leaders(2024, "avg")
+    assert _ids(board) == [1, 3]
+    assert board["min_qualifier"] == 100 and board["stale"] is False
+    # everyone on request, but unqualified lines rank after the qualified ones
+    assert _ids(svc.get_leaders(2024, "avg", min_qualifier=0)) == [1, 3, 2]
+    # counting stats have no default floor
+    assert _ids(svc.get_leaders(2024, "homeRuns")) == [3, 1, 2]
+
+
+def test_values_come_from_the_typed_columns(db):
+    row = _season(db, 1, "Regular", plateAppearances=600, avg=".310")
+    row.avg = 0.275
+    db.commit()
+    svc = LeaderboardService(db)
+    svc.refresh(2024, "hitting")
+
+    assert svc.get_leaders(2024, "avg")["leaders"][0]["value"] == 0.275
+
+
+def test_in_place_updates_mark_the_board_stale(db):
+    row = _season(db, 1, "Regular", plateAppearances=600, homeRuns=30)
+    svc = LeaderboardService(db)
+    svc.refresh(2024, "hitting")
+    assert svc.ensure_fresh(2024, "hitting") is False
+
+    row.home_runs = 31
+    db.commit()
+    assert svc.ensure_fresh(2024, "hitting") is True
+    assert svc.get_leaders(2024, "homeRuns")["leaders"][0]["value"] == 31
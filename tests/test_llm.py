@@ -0,0 +1,53 @@
+"""LLM gateway accounting: every call and response-cache hit lands in sr_llm_calls."""
+from types import SimpleNamespace
+import pytest
+from app.db.models import LLMCall
+from app.services import llm
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    """A fake Anthropic client whose replies report prompt-cache usage."""
+    llm.get_call_log.cache_clear()
+    # only explicit flushes write, so the tests can count them
+    monkeypatch.setattr(llm, "CALL_FLUSH_SECONDS", 3600)
+    sent = []
+
+    def create(**kwargs):
+        sent.append(kwargs)
+        usage = SimpleNamespace(
+            input_tokens=120, output_tokens=40, cache_read_input_tokens=4800, cache_creation_input_tokens=0,
+        )
+        return SimpleNamespace(content=[SimpleNamespace(text="report")], usage=usage)
+
+    monkeypatch.setattr(llm, "get_client", lambda: SimpleNamespace(messages=SimpleNamespace(create=create)))
+    yield sent
+    llm.flush_calls()
+    llm.get_call_log.cache_clear()
+
+
+def test_prompt_cache_reads_are_recorded(db, client):
+    system = llm.cached_system("x" * 4 * llm.CACHE_MIN_TOKENS, "Write a report.")
+    assert llm.complete("scouting_report", "PLAYER: Test", system=system, mlb_id=7) == "report"
+    llm.flush_calls()
+
+    assert client[0]["system"][0]["cache_control"] == {"type": "ephemeral"}
+    call = db.query(LLMCall).one()
+    assert (call.feature, call.mlb_id, call.status, call.cache_hit) == ("scouting_report", 7, "ok", "N")
+    assert (call.input_tokens, call.output_tokens, call.cache_read_tokens) == (120, 40, 4800)
+
+
+def test_cache_hits_are_written_in_one_batch(db, client, monkeypatch):
+    llm.cached_complete("preview:1", 60, "game_preview", "prompt")
+    llm.flush_calls()
+    sessions = []
+    new_session = llm.new_session
+    monkeypatch.setattr(llm, "new_session", lambda: sessions.append(1) or new_session())
+
+    for _ in range(5):
+        assert llm.cached_complete("preview:1", 60, "game_preview", "prompt") == "report"
+    llm.flush_calls()
+
+    assert len(client) == 1
+    assert len(sessions) == 1
+    assert db.query(LLMCall).filter(LLMCall.cache_hit == "Y").count() == 5
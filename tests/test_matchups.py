@@ -0,0 +1,75 @@
+"""Matchup model: log5, shrinkage toward the league, and whole-lineup predictions."""
+import math
+import numpy as np
+import pytest
+from app.db.models import PlateAppearance
+from app.services.matchups import OUTCOMES, SHRINK_PA, MatchupService, log5, shrink
+
+K = OUTCOMES.index("k")
+LEAGUE = np.array([0.22, 0.08, 0.01, 0.14, 0.045, 0.004, 0.03, 0.471])
+
+
+def test_log5_of_league_average_sides_is_the_league():
+    np.testing.assert_allclose(log5(LEAGUE, LEAGUE, LEAGUE), LEAGUE)
+
+
+def test_log5_matches_the_binomial_formula():
+    b, p, lg = 0.300, 0.250, 0.260
+    expected = (b * p / lg) / (b * p / lg + (1 - b) * (1 - p) / (1 - lg))
+    probs = log5(np.array([b, 1 - b]), np.array([p, 1 - p]), np.array([lg, 1 - lg]))
+    assert probs[0] == pytest.approx(expected)
+
+
+def test_log5_falls_back_to_the_league_when_sides_share_no_outcome():
+    batter = np.array([1.0, 0.0])
+    pitcher = np.array([0.0, 1.0])
+    league = np.array([0.5, 0.5])
+    np.testing.assert_allclose(log5(batter, pitcher, league), league)
+
+
+def test_shrink_pulls_small_samples_to_the_prior():
+    no_pa = shrink(np.zeros(len(OUTCOMES)), LEAGUE, SHRINK_PA)
+    np.testing.assert_allclose(no_pa, LEAGUE)
+
+    all_k = np.zeros(len(OUTCOMES))
+    all_k[K] = 10
+    few = shrink(all_k, LEAGUE, SHRINK_PA)
+    many = shrink(all_k * 100, LEAGUE, SHRINK_PA)
+    assert LEAGUE[K] < few[K] < many[K] < 1
+    assert few.sum() == pytest.approx(1) and many.sum() == pytest.approx(1)
+
+
+def _pas(db, pitcher_id, batter_id, events: dict, game_pk: int):
+    at_bat = 0
+    for event, n in events.items():
+        for _ in range(n):
+            at_bat += 1
+            db.add(PlateAppearance(
+                game_pk=game_pk, at_bat_number=at_bat, season=2024, batter_id=batter_id, pitcher_id=pitcher_id,
+                stand="R", p_throws="R", event_type=event,
+                is_k=int(event == "strikeout"), is_walk=int(event == "walk"), is_hbp=0,
+                is_hit=int(event in ("single", "home_run")), is_hr=int(event == "home_run"),
+                total_bases={"single": 1, "home_run": 4}.get(event, 0),
+            ))
+    db.commit()
+
+
+def test_predict_separates_a_strikeout_bat_from_a_contact_bat(db):
+    _pas(db, 100, 1, {"strikeout": 150, "field_out": 150}, game_pk=1)
+    _pas(db, 100, 2, {"single": 80, "field_out": 200, "walk": 20}, game_pk=2)
+    _pas(db, 200, 3, {"strikeout": 60, "single": 60, "home_run": 20, "walk": 30, "field_out": 130}, game_pk=3)
+
+    lines = {p["batter_id"]: p for p in MatchupService(db).predict([(200, 1), (200, 2), (200, 99)], 2024)}
+
+    assert set(lines) == {1, 2, 99}
+    for line in lines.values():
+        assert sum(line["probabilities"].values()) == pytest.approx(1, abs=1e-3)
+        assert all(math.isfinite(line[stat]) for stat in ("avg", "obp", "slg"))
+    assert lines[1]["probabilities"]["k"] > lines[99]["probabilities"]["k"] > lines[2]["probabilities"]["k"]
+    assert lines[2]["avg"] > lines[1]["avg"]
+    # no stored PAs: the batter is the league average against this pitcher
+    assert lines[99]["batter_pa"] == 0 and lines[1]["batter_pa"] == 300
+
+
+def test_predict_without_plate_appearances_is_empty(db):
+    assert MatchupService(db).predict([(200, 1)], 2024) == []
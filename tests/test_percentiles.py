@@ -0,0 +1,59 @@
+"""League percentile ranks: the vectorised mid-rank and the per-season rebuild."""
+import numpy as np
+from app.db.models import Player, PlayerSeason
+from app.services.percentiles import PercentileService, percentile_matrix
+from app.services.statlines import typed_columns
+
+NAN = np.nan
+
+
+def test_mid_rank_percentiles_share_ties():
+    reference = np.array([[1.0], [2.0], [2.0], [4.0]])
+    values = np.array([[1.0], [2.0], [4.0], [3.0], [0.0], [9.0]])
+
+    pct = percentile_matrix(values, reference, np.array([False]))
+
+    np.testing.assert_allclose(pct[:, 0], [12.5, 50.0, 87.5, 75.0, 0.0, 100.0])
+
+
+def test_lower_is_better_flips_and_missing_values_stay_missing():
+    reference = np.array([[1.0, 10.0], [2.0, NAN], [3.0, 30.0]])
+    values = np.array([[1.0, NAN], [3.0, 30.0]])
+
+    pct = percentile_matrix(values, reference, np.array([True, False]))
+
+    # the lowest ERA-like value ranks highest; the NaN reference row doesn't count towards column 2
+    np.testing.assert_allclose(pct[:, 0], [100 - 100 / 6, 100 / 6])
+    assert np.isnan(pct[0, 1]) and pct[1, 1] == 75.0
+
+
+def test_a_column_with_no_reference_values_is_all_missing():
+    pct = percentile_matrix(np.array([[1.0]]), np.array([[NAN]]), np.array([False]))
+
+    assert np.isnan(pct).all()
+
+
+def _season(db, mlb_id, **stats):
+    db.add(Player(mlb_id=mlb_id, full_name=f"Player {mlb_id}"))
+    row = PlayerSeason(mlb_id=mlb_id, season=2024, team="NYY", stat_group="hitting", stats=stats)
+    for column, value in typed_columns("hitting", stats).items():
+        setattr(row, column, value)
+    db.add(row)
+    db.commit()
+
+
+def test_rebuild_ranks_against_qualified_players_only(db):
+    _season(db, 1, plateAppearances=600, avg=".300", strikeOuts=100)
+    _season(db, 2, plateAppearances=500, avg=".250", strikeOuts=150)
+    # a callup's 1.000 average is ranked but doesn't move the qualified population
+    _season(db, 3, plateAppearances=2, avg="1.000", strikeOuts=0)
+    svc = PercentileService(db)
+
+    assert svc.rebuild(2024, "hitting") == 3
+
+    one, two, callup = (svc.for_player(mlb_id, "hitting")[2024] for mlb_id in (1, 2, 3))
+    assert (one["avg"], two["avg"], callup["avg"]) == (75, 25, 100)
+    # fewer strikeouts is better
+    assert one["strikeOuts"] > two["strikeOuts"]
+    lines = svc.attach(1, "hitting", [{"season": 2024, "stats": {}}, {"season": 2023, "stats": {}}])
+    assert lines[0]["percentiles"] == one and lines[1]["percentiles"] == {}
@@ -0,0 +1,103 @@
+"""Per-host token buckets and AIMD backoff."""
+import types
+import pytest
+from app.core import ratelimit
+from app.core.ratelimit import MAX_BACKOFF, RateLimiter, RateLimitTimeout
+
+HOST = "statsapi.mlb.com"
+
+
+class Clock:
+    """Stands in for time.time/monotonic; sleep() advances it instead of blocking."""
+
+    def __init__(self):
+        self.now = 1_000.0
+        self.slept = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # a real sleep always lets some time pass, even when a rounding shortfall asks for ~0s
+        seconds = max(seconds, 1e-6)
+        self.now += seconds
+        self.slept += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit, "time", types.SimpleNamespace(time=clock.time, monotonic=clock.time, sleep=clock.sleep))
+    return clock
+
+
+@pytest.fixture
+def limiter(tmp_path, clock):
+    return RateLimiter(str(tmp_path / "ratelimit.sqlite3"), {HOST: 10.0})
+
+
+def _bucket(limiter) -> dict:
+    row = limiter._conn().execute(
+        "SELECT tokens, rate, blocked_until, backoff FROM buckets WHERE host = ?", (HOST,)
+    ).fetchone()
+    return dict(zip(("tokens", "rate", "blocked_until", "backoff"), row))
+
+
+def test_a_full_bucket_allows_a_burst_then_paces_at_the_rate(limiter, clock):
+    for _ in range(20):
+        limiter.acquire(HOST)
+    assert clock.slept == 0
+
+    for _ in range(10):
+        limiter.acquire(HOST)
+    assert clock.slept == pytest.approx(1.0)
+
+
+def test_background_callers_leave_a_reserve_for_interactive_ones(limiter, clock):
+    for _ in range(10):
+        limiter.acquire(HOST, priority="background")
+    assert clock.slept == 0
+
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(HOST, priority="background", timeout=0.05)
+    for _ in range(10):
+        limiter.acquire(HOST)
+    assert clock.slept == 0
+
+
+def test_throttling_halves_the_rate_and_backs_off_exponentially(limiter, clock):
+    limiter.report(HOST, 429)
+    first = _bucket(limiter)
+    assert first["rate"] == 5.0 and first["backoff"] == 1.0 and first["blocked_until"] == clock.now + 1.0
+
+    limiter.report(HOST, 503)
+    second = _bucket(limiter)
+    assert second["rate"] == 2.5 and second["backoff"] == 2.0
+
+    limiter.acquire(HOST)
+    assert clock.slept == pytest.approx(2.0)
+
+
+def test_retry_after_overrides_the_backoff(limiter, clock):
+    limiter.report(HOST, 429, retry_after=7)
+
+    assert _bucket(limiter)["blocked_until"] == clock.now + 7
+
+
+def test_backoff_and_rate_are_bounded(limiter):
+    for _ in range(20):
+        limiter.report(HOST, 429)
+
+    bucket = _bucket(limiter)
+    assert bucket["backoff"] == MAX_BACKOFF and bucket["rate"] == pytest.approx(10.0 / 20)
+
+
+def test_successes_grow_the_rate_back_to_the_ceiling(limiter):
+    limiter.report(HOST, 429)
+    limiter.report(HOST, 200)
+    bucket = _bucket(limiter)
+    assert bucket["rate"] == pytest.approx(5.2) and bucket["backoff"] == 0
+
+    for _ in range(30):
+        limiter.report(HOST, 200)
+    assert _bucket(limiter)["rate"] == 10.0
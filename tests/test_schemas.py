@@ -0,0 +1,82 @@
+"""The pre-encoded endpoints' real payloads match the response models in app/models/schemas.py."""
+import io
+import json
+import os
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from app.api import games
+from app.db.models import Player
+from app.models.schemas import CareerSeason, HeatmapResponse, LineupMatchups, VsTeamLine
+from app.services import upstream
+from app.services.gamefeed import GameFeedStore, parse_game_stream
+from main import app
+
+FEED = os.path.join(os.path.dirname(__file__), "fixtures", "game_feed_sample.json")
+PITCHER, TEAM = 605400, 147
+
+
+def _feed(game_pk: int) -> bytes:
+    with open(FEED) as f:
+        feed = json.load(f)
+    feed["gamePk"] = feed["gameData"]["game"]["pk"] = game_pk
+    return json.dumps(feed).encode()
+
+
+def _valid(model, body):
+    TypeAdapter(model).validate_python(body, strict=True)
+    return body
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    roster = [
+        {"person": {"id": pid, "fullName": name}, "position": {"abbreviation": pos}}
+        for pid, name, pos in ((646240, "Rafael Devers", "3B"), (608324, "Alex Bregman", "3B"), (PITCHER, "Nestor Cortes", "SP"))
+    ]
+    monkeypatch.setattr(games, "_roster", lambda team_id: roster)
+    monkeypatch.setattr(games, "_heatmap_game_pks", lambda mlb_id, season: [1, 2, 3])
+    monkeypatch.setattr(
+        upstream, "fetch_parsed", lambda url, parse, **kwargs: parse(io.BytesIO(_feed(int(url.split("/")[-3]))))
+    )
+    # three stored games, so every PA-based endpoint has data
+    for game_pk in (1, 2, 3):
+        GameFeedStore(db).store(parse_game_stream(io.BytesIO(_feed(game_pk))))
+    return TestClient(app)
+
+
+def test_heatmap(client):
+    body = _valid(HeatmapResponse, client.get(f"/games/pitcher-heatmap/{PITCHER}").json())
+    # two of the pitcher's three pitches per game carry plate coordinates
+    assert body["total_pitches"] == 6 and body["summary"]["pitch_mix"]
+
+
+def test_vs_team_from_the_mlb_api(client, monkeypatch):
+    line = {"stats": [{"type": {"displayName": "vsPlayerTotal"}, "splits": [{"stat": {
+        "atBats": 12, "hits": 4, "homeRuns": 1, "baseOnBalls": 2, "strikeOuts": 3,
+        "avg": ".333", "obp": ".429", "slg": ".583", "ops": "1.012", "numberOfPitches": 61,
+    }}]}]}
+    monkeypatch.setattr(upstream, "fetch_json", lambda url, params, endpoint: line)
+
+    body = _valid(list[VsTeamLine], client.get(f"/games/pitcher-vs-team/{PITCHER}/{TEAM}").json())
+    assert len(body) == 2
+
+
+def test_vs_team_from_stored_plate_appearances(client):
+    body = _valid(list[VsTeamLine], client.get(f"/games/pitcher-vs-team/{PITCHER}/{TEAM}?source=local").json())
+    assert [line["mlb_id"] for line in body] == [646240]
+
+
+def test_lineup_matchups(client):
+    body = _valid(LineupMatchups, client.get(f"/games/matchups/{PITCHER}/{TEAM}").json())
+    assert {b["mlb_id"] for b in body["batters"]} == {646240, 608324}
+
+
+def test_career_stats(client, db, monkeypatch):
+    db.add(Player(mlb_id=646240, full_name="Rafael Devers", bats="L"))
+    db.commit()
+    career = {"stats": [{"season": "2024", "team": {"name": "Boston Red Sox"}, "stats": {"avg": ".272", "homeRuns": 28}}]}
+    monkeypatch.setattr(upstream, "call", lambda name, fn, *args, **kwargs: career)
+
+    body = _valid(list[CareerSeason], client.get("/players/646240/stats/career").json())
+    assert body[0]["season"] == 2024
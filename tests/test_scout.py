@@ -0,0 +1,28 @@
+"""Prompt layout for Claude calls: a shared, cacheable system prefix."""
+from app.services import llm, scout
+
+
+def test_reference_prefix_is_long_enough_to_cache():
+    assert llm.estimate_tokens(scout.scouting_reference()) >= llm.CACHE_MIN_TOKENS
+
+
+def test_every_feature_shares_the_cached_prefix():
+    systems = [
+        scout.scout_system(scout.REPORT_INSTRUCTIONS),
+        scout.scout_system(scout.PREVIEW_INSTRUCTIONS),
+        scout.scout_system(scout.MATCHUP_INSTRUCTIONS),
+    ]
+    prefixes = [system[0] for system in systems]
+    assert all(p == prefixes[0] for p in prefixes)
+    assert prefixes[0]["cache_control"] == {"type": "ephemeral"}
+    # task instructions come after the breakpoint, so they don't split the cache
+    assert all("cache_control" not in system[1] for system in systems)
+
+
+def test_report_prompt_keeps_player_data_out_of_the_system_prompt():
+    player = {"mlb_id": 1, "full_name": "Test Player", "position": "SS"}
+    career = [{"season": 2024, "team": "NYY", "stats": {"avg": ".301"}, "percentiles": {"avg": 91}}]
+    prompt = scout.build_report_prompt(player, career, "hitting", 2024)
+
+    assert "Test Player" in prompt and "AVG: .301 (91st pct)" in prompt
+    assert "Test Player" not in scout.scouting_reference()
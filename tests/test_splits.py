@@ -0,0 +1,95 @@
+"""Splits engine: column-wise split lines and the per-player build from stored PAs and pitches."""
+import pandas as pd
+import pytest
+from app.core.cache import get_cache
+from app.db.models import PlateAppearance, Pitch
+from app.services import splits
+from app.services.splits import COUNT_COLUMNS, SplitsService, split_lines
+
+BATTER, PITCHER = 646240, 605400
+EVENTS = {
+    "single": dict(is_ab=1, is_hit=1, total_bases=1),
+    "home_run": dict(is_ab=1, is_hit=1, total_bases=4, is_hr=1, rbi=2),
+    "strikeout": dict(is_ab=1, is_k=1),
+    "walk": dict(is_walk=1),
+    "sac_fly": dict(is_sf=1, rbi=1),
+}
+
+
+def _row(event: str, **extra) -> dict:
+    return {**{c: 0 for c in COUNT_COLUMNS}, **EVENTS[event], **extra}
+
+
+def test_split_lines_slash_stats():
+    df = pd.DataFrame([
+        _row("single", side="L"), _row("home_run", side="L"), _row("strikeout", side="L"),
+        _row("walk", side="L"), _row("sac_fly", side="L"), _row("walk", side="R"),
+    ])
+
+    left, right = split_lines(df, "side")
+
+    assert (left["split"], left["pa"], left["ab"], left["h"], left["hr"], left["rbi"]) == ("L", 5, 3, 2, 1, 3)
+    assert (left["avg"], left["obp"], left["slg"], left["ops"]) == (0.667, 0.6, 1.667, 2.267)
+    assert (left["k_rate"], left["bb_rate"]) == (0.2, 0.2)
+    # no at-bats: rate stats are missing rather than NaN or infinite
+    assert right["pa"] == 1 and right["avg"] is None and right["slg"] is None and right["obp"] == 1.0
+
+
+def test_split_lines_of_nothing():
+    assert split_lines(pd.DataFrame(columns=["side", *COUNT_COLUMNS]), "side") == []
+
+
+def _pa(db, game_pk, at_bat, event, game_date, p_throws="R", batter_home="Y", counts=((0, 0),)):
+    db.add(PlateAppearance(
+        game_pk=game_pk, at_bat_number=at_bat, season=2024, game_date=game_date, batter_id=BATTER,
+        pitcher_id=PITCHER, stand="L", p_throws=p_throws, batter_home=batter_home, event_type=event,
+        **{c: v for c, v in _row(event).items()},
+    ))
+    for number, (balls, strikes) in enumerate(counts, start=1):
+        db.add(Pitch(
+            game_pk=game_pk, at_bat_number=at_bat, pitch_number=number, season=2024,
+            batter_id=BATTER, pitcher_id=PITCHER, balls=balls, strikes=strikes,
+        ))
+
+
+@pytest.fixture
+def season(db):
+    _pa(db, 1, 1, "single", "2024-04-02", counts=((0, 0), (1, 0)))
+    _pa(db, 1, 2, "home_run", "2024-04-02", counts=((0, 0), (0, 1), (1, 1)))
+    _pa(db, 2, 1, "strikeout", "2024-05-10", p_throws="L", batter_home="N", counts=((0, 0), (0, 1), (1, 1)))
+    # the last pitch's count wasn't recorded: the PA counts everywhere but the count splits
+    _pa(db, 2, 2, "walk", "2024-05-10", p_throws="L", batter_home="N", counts=((0, 0), (None, None)))
+    db.commit()
+    return db
+
+
+def test_build_splits_a_batters_season(season):
+    result = SplitsService(season).build(BATTER, 2024)
+
+    assert result["pa"] == 4
+    by = {name: {line["split"]: line for line in lines} for name, lines in result["splits"].items()}
+    assert {k: v["pa"] for k, v in by["platoon"].items()} == {"vs LHP": 2, "vs RHP": 2}
+    assert {k: v["pa"] for k, v in by["home_away"].items()} == {"Away": 2, "Home": 2}
+    assert list(by["monthly"]) == ["2024-04", "2024-05"]
+    assert {k: v["pa"] for k, v in by["count"].items()} == {"1-0": 1, "1-1": 2}
+    assert by["count"]["1-1"]["hr"] == 1
+
+
+def test_pitcher_splits_flip_the_home_side(season):
+    result = SplitsService(season).build(PITCHER, 2024, role="pitcher")
+
+    by = {line["split"]: line["pa"] for line in result["splits"]["home_away"]}
+    assert by == {"Away": 2, "Home": 2} and result["splits"]["platoon"][0]["split"] == "vs LHB"
+
+
+def test_cached_splits_drop_when_a_game_is_stored(season):
+    svc = SplitsService(season)
+    assert svc.get_splits(BATTER, 2024)["pa"] == 4
+    _pa(season, 3, 1, "walk", "2024-06-01")
+    season.commit()
+    assert svc.get_splits(BATTER, 2024)["pa"] == 4
+
+    splits.invalidate([{"batter_id": BATTER, "pitcher_id": PITCHER, "season": 2024}])
+
+    assert get_cache().get(splits.cache_key("batter", BATTER, 2024)) is None
+    assert svc.get_splits(BATTER, 2024)["pa"] == 5
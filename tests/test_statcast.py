@@ -0,0 +1,54 @@
+"""Statcast CSV import against a small Savant-format fixture."""
+import os
+import pytest
+from app.db.models import Pitch
+from app.services.statcast import StatcastImporter
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "statcast_sample.csv")
+
+
+def _pitch(db, game_pk, at_bat, number):
+    return db.query(Pitch).filter_by(game_pk=game_pk, at_bat_number=at_bat, pitch_number=number).one()
+
+
+def test_import_normalizes_savant_rows(db):
+    stats = StatcastImporter(db).run(FIXTURE)
+
+    # 7 rows: one repeated pitch key and one row without a pitcher are skipped
+    assert stats == {"rows": 7, "inserted": 5, "skipped": 2}
+    first = _pitch(db, 745301, 1, 1)
+    assert first.pitcher_id == 543037 and first.season == 2024 and first.game_date == "2024-04-02"
+    assert first.pitch_name == "Four-Seam Fastball"
+    assert first.description == "Called Strike"
+    assert first.start_speed == pytest.approx(95.3)
+    assert (first.is_strike, first.is_in_play) == (1, 0)
+    assert _pitch(db, 745301, 1, 3).is_in_play == 1
+    assert _pitch(db, 745420, 4, 6).pitch_name == "Splitter"
+
+
+def test_blank_fields_are_stored_as_null(db):
+    StatcastImporter(db).run(FIXTURE)
+
+    blank = _pitch(db, 745301, 2, 1)
+    assert blank.description is None
+    assert blank.pitch_type is None and blank.pitch_name is None
+    assert blank.start_speed is None and blank.zone is None and blank.plate_x is None
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 2, 3, 50])
+def test_first_occurrence_wins_whatever_the_chunk_size(db, chunk_rows):
+    stats = StatcastImporter(db, chunk_rows=chunk_rows).run(FIXTURE)
+
+    assert stats["inserted"] == 5
+    duplicate = _pitch(db, 745301, 1, 2)
+    assert duplicate.description == "Swinging Strike"
+    assert duplicate.start_speed == pytest.approx(88.1)
+
+
+def test_reimport_skips_stored_pitches(db):
+    importer = StatcastImporter(db)
+    importer.run(FIXTURE)
+    stats = importer.run(FIXTURE)
+
+    assert stats == {"rows": 7, "inserted": 0, "skipped": 7}
+    assert db.query(Pitch).count() == 5